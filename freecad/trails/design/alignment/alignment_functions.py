@@ -27,47 +27,68 @@ Define Alignment Object functions.
 
 import FreeCAD
 import Draft, Part
+import numpy
 
 from .alignment_model import AlignmentModel
-from ..geometry import support
+from . import model_codec, stationing
 
 from copy import deepcopy
 
 
 
 class DataFunctions:
-    def get_shape(self, lines, curves, spirals, base):
-        line_obj = []
-        for line in lines:
-            points = []
-            for pnt in line:
-                points.append(FreeCAD.Vector(pnt).sub(base))
-            wire = Part.makePolygon(points)
-            line_obj.append(wire)
-
-        line_comp = Part.makeCompound(line_obj)
-
-        curve_obj = []
-        for curve in curves:
-            points = []
-            for pnt in curve:
-                points.append(FreeCAD.Vector(pnt).sub(base))
-            wire = Part.makePolygon(points)
-            curve_obj.append(wire)
-
-        curve_comp = Part.makeCompound(curve_obj)
-
-        spiral_obj = []
-        for spiral in spirals:
-            points = []
-            for pnt in spiral:
-                points.append(FreeCAD.Vector(pnt).sub(base))
-            wire = Part.makePolygon(points)
-            spiral_obj.append(wire)
-
-        spiral_comp = Part.makeCompound(spiral_obj)
-
-        return Part.makeCompound([line_comp, curve_comp, spiral_comp])
+    @property
+    def model(self):
+        """
+        The alignment model, decoded from the stored data on first access.
+        Decoding leaves the object properties as they are, so reading the
+        model does not modify the document.
+        """
+
+        source = getattr(self, 'model_source', None)
+
+        if getattr(self, '_model', None) is None and source:
+
+            self.model_source = None
+            self.build_model(source)
+
+        return getattr(self, '_model', None)
+
+    @model.setter
+    def model(self, value):
+        self._model = value
+
+    def get_shape(self, points, offsets, types, base):
+        """
+        Build the alignment shape from the discretized geometry as a
+        compound of line, curve and spiral compounds
+        """
+        wires = {'Line': [], 'Curve': [], 'Spiral': []}
+
+        points = points - numpy.array(tuple(base))
+
+        for i, geo_type in enumerate(types):
+            element = points[offsets[i]:offsets[i + 1]]
+            wires.get(geo_type, wires['Line']).append(
+                Part.makePolygon([FreeCAD.Vector(*pnt) for pnt in element]))
+
+        return Part.makeCompound([
+            Part.makeCompound(wires['Line']),
+            Part.makeCompound(wires['Curve']),
+            Part.makeCompound(wires['Spiral'])])
+
+    def get_discretization(self, obj):
+        """
+        Return the discretized geometry the shape is built from, as
+        (points, offsets, types), see AlignmentModel.discretize()
+        """
+
+        if getattr(self, 'discretization', None) is None and self.model:
+
+            self.discretization = self.model.discretize(
+                [0.0], obj.Method, obj.Seg_Value)
+
+        return getattr(self, 'discretization', None)
 
     def initialize_model(self, model, obj):
         """
@@ -129,48 +150,48 @@ class DataFunctions:
 
     def build_curve_edge_dict(self, obj):
         """
-        Build the dictionary which correlates edges to their corresponding
-        curves for quick lookup when curve editing
+        Build the dictionary which correlates curves to the range of their
+        edge indices for quick lookup when curve editing.
+
+        The shape holds the line, curve and spiral polylines of the
+        discretization in that order, with n - 1 edges for an element of
+        n points, so the ranges follow from the discretization offsets.
         """
 
         curve_dict = {}
-        curves = self.model.data.get('geometry')
-
-        #iterate the curves, creating the dictionary for each curve
-        #that lists it's wire edges keyed by it's Edge index
-        for _i, curve in enumerate(curves):
+        data = self.get_discretization(obj)
 
-            #curve.set('ObjectID', f'{curve.get('Type')}{str(_i)}')
+        if not data or not data[2]:
+            self.curve_edges = curve_dict
+            return
 
-            if curve.get('Type') == 'Line':
-                continue
+        _, offsets, types = data
 
-            curve_edges = obj.Shape.Edges
-            curve_pts = [curve.get('Start'), curve.get('End')]
-            edge_dict = {}
+        _types, _bounds, _geometry = \
+            stationing.get_elements(self.model, geometry=True)
 
-            #iterate edge list, add edges that fall within curve limits
-            for _i, edge in enumerate(curve_edges):
+        #elements without length are not discretized
+        _geometry = [
+            _geo for _geo, _b in zip(_geometry, _bounds) if _b[1] > _b[0]]
 
-                edge_pts = [edge.Vertexes[0].Point, edge.Vertexes[1].Point]
+        edge_counts = numpy.diff(offsets) - 1
+        ranges = [None] * len(types)
+        start = 0
 
-                #empty list means we haven't found the start yet
-                if not edge_dict:
+        for key in ['Line', 'Curve', 'Spiral']:
 
-                    if not support.within_tolerance(curve_pts[0], edge_pts[0]):
-                        continue
+            for i, geo_type in enumerate(types):
 
-                #still here?  then we're within the geometry
-                edge_dict['Edge' + str(_i + 1)] = edge
+                if key == geo_type or (key == 'Line' and \
+                    geo_type not in ['Curve', 'Spiral']):
 
-                #if this edge fits the end, we're done
-                if support.within_tolerance(curve_pts[1], edge_pts[1]):
-                    break
+                    ranges[i] = range(start, start + edge_counts[i])
+                    start += edge_counts[i]
 
-            #calculate a unique hash based on the curve start and end points
-            #and save the edge list to it
+        for curve, edge_range in zip(_geometry, ranges):
 
-            curve_dict[curve['Hash']] = edge_dict
+            if curve and curve.get('Type') != 'Line':
+                curve_dict[curve['Hash']] = edge_range
 
         self.curve_edges = curve_dict
 
@@ -181,12 +202,23 @@ class DataFunctions:
 
         return self.model.get_pi_coords()
 
-    def get_edges(self):
+    def get_edges(self, curve_hash=None):
         """
-        Return the dictionary of curve edges
+        Return the edges of the curve matching the specified hash, keyed
+        by edge name.  If no hash, return the edges of all curves, keyed
+        by curve hash.
         """
 
-        return self.curve_edges
+        edges = self.Object.Shape.Edges
+        curve_edges = self.curve_edges or {}
+
+        def _get_edges(edge_range):
+            return {'Edge' + str(_i + 1): edges[_i] for _i in edge_range}
+
+        if curve_hash is not None:
+            return _get_edges(curve_edges.get(curve_hash, []))
+
+        return {_k: _get_edges(_v) for _k, _v in curve_edges.items()}
 
     def get_data(self):
         """
@@ -254,7 +286,33 @@ class DataFunctions:
     def set_geometry(self, geometry, zero_reference=False):
         """
         Assign geometry to the alignment object
+        geometry - the data set or it's encoded string
         """
+        if isinstance(geometry, str):
+            geometry = model_codec.decode(geometry)
+
+        # Store before construction, which modifies the data set.
+        encoded = model_codec.encode(geometry)
+
+        if self.Object.ModelKeeper != encoded:
+            self.Object.ModelKeeper = encoded
+
+        self.build_model(geometry, zero_reference)
+
+        self.assign_meta_data()
+
+        return self.model.errors
+
+    def build_model(self, geometry, zero_reference=False):
+        """
+        Build the alignment model from the data set or it's encoded
+        string, without assigning any object property
+        """
+        if isinstance(geometry, str):
+            geometry = model_codec.decode(geometry)
+
+        self.model_source = None
+        self.discretization = None
         self.model = AlignmentModel(geometry, zero_reference)
 
         if self.model.errors:
@@ -265,10 +323,6 @@ class DataFunctions:
 
             self.model.errors.clear()
 
-        self.assign_meta_data()
-
-        return self.model.errors
-
     def assign_meta_data(self, model=None):
         """
         Extract the meta data for the alignment from the data set
@@ -300,32 +354,61 @@ class DataFunctions:
 
 
 class ViewFunctions:
-    def get_stations(self, obj):
+    def get_polylines(self, points, offsets, types):
+        """
+        Group the discretized elements by type, returning for each type
+        the points, the vertex count of each polyline and the index of
+        it's element in the discretization
+        """
+
+        elements = {'Line': [], 'Curve': [], 'Spiral': []}
+
+        for i, geo_type in enumerate(types):
+            elements.get(geo_type, elements['Line']).append(i)
+
+        result = {}
+
+        for key, indices in elements.items():
+            counts = numpy.array(
+                [offsets[i + 1] - offsets[i] for i in indices], dtype=int)
+
+            result[key] = (
+                numpy.concatenate([numpy.empty((0, 3))] + [
+                    points[offsets[i]:offsets[i + 1]] for i in indices]),
+                counts, indices)
+
+        return result
+
+    def get_station_ticks(self, obj, major, minor):
         """
-        Retrieve the coordinates of the start and end points of the station
-        tick mark orthogonal to the alignment
+        Return the stations along the alignment at multiples of the major
+        and minor intervals, evaluated at once:
+
+        stations - array of stations
+        coords - (N,3) array of coordinates
+        orthos - (N,3) array of left orthogonal vectors
+        is_major - bool array, True where the station is a major station
         """
 
-        start = obj.Proxy.model.data['meta']['StartStation']
-        length = obj.Proxy.model.data['meta']['Length']
-        end = start + length/1000
+        model = obj.Proxy.model
+        segments = model.get_index()['Segments']
 
-        stations = {}
+        positions = {}
 
-        for sta in range(int(start), int(end)):
-            if sta % 10 == 0:
-                tuple_coord, tuple_vec =\
-                    obj.Proxy.model.get_orthogonal( sta, "Left", True)
+        for key, interval in [('Major', major), ('Minor', minor)]:
+            positions[key] = numpy.round(stationing.sample_range(
+                segments, segments[0][0], segments[1][-1], interval), 6)
 
-                coord = FreeCAD.Vector(tuple_coord)
-                vec = FreeCAD.Vector(tuple_vec)
+        all_positions = numpy.unique(
+            numpy.concatenate([positions['Major'], positions['Minor']]))
 
-                left_vec = deepcopy(vec)
-                right_vec = deepcopy(vec)
+        stations = stationing.to_station(segments, all_positions)
+        coords, vecs = model.get_tangents_at(all_positions)
 
-                left_side = coord.add(left_vec.multiply(1500))
-                right_side = coord.add(right_vec.negative().multiply(1500))
+        orthos = numpy.zeros(vecs.shape)
+        orthos[:, 0] = -vecs[:, 1]
+        orthos[:, 1] = vecs[:, 0]
 
-                stations[sta] = [left_side, right_side]
+        is_major = numpy.isin(all_positions, positions['Major'])
 
-        return stations
+        return stations, coords, orthos, is_major
@@ -29,6 +29,8 @@ __title__ = "alignment_group.py"
 __author__ = "Joel Graff"
 __url__ = "https://www.freecadweb.org"
 
+import hashlib
+
 import FreeCAD as App
 
 from pivy_trackers.coin.todo import todo
@@ -82,6 +84,7 @@ class _AlignmentGroup():
         self.data = None
         self.importer = AlignmentImporter()
         self.registrar = AlignmentRegistrar()
+        self.fragments = {}
 
         properties.add(obj, 'String', 'ID', 'Alignment group name', '',
                        is_read_only=True)
@@ -103,6 +106,7 @@ class _AlignmentGroup():
         self.Object = obj
 
         self.registrar = AlignmentRegistrar()
+        self.fragments = {}
 
         self.registrar.set_group(self)
 
@@ -116,7 +120,8 @@ class _AlignmentGroup():
             )
 
         group = alignment.InList[0]
-        self.data = AlignmentImporter().import_file(group.Xml_Path)
+        self.data = AlignmentImporter().import_file(
+            group.Xml_Path, surfaces=())
 
         if not group.OutList:
             print(f'WARNING: No alignments found in group {group.Name}')
@@ -146,7 +151,8 @@ class _AlignmentGroup():
         """
         Return a reference to the XML data
         """
-        self.data = AlignmentImporter().import_file(group.Xml_Path)
+        self.data = AlignmentImporter().import_file(
+            group.Xml_Path, surfaces=())
 
         _aligns = self.data.get('Alignments')
 
@@ -165,15 +171,33 @@ class _AlignmentGroup():
         Serialize the object data and it's children to xml files
         """
 
-        _list = []
+        exporter = AlignmentExporter()
+
+        fragments = {}
 
-        #iterate the list of children, acquiring their data sets
-        #and creating a total data set for alignments.
+        #fragments are written in document units, so they are reused
+        #only while the units and the exporter stay the same
+        _format = repr((AlignmentExporter.VERSION,
+            units.get_doc_units()[1], units.scale_factor())).encode()
+
+        #iterate the list of children, serializing only the alignments
+        #whose stored data changed since the last save
         for _obj in self.Object.OutList:
-            if _obj.Proxy.Type == 'Trails::HorizontalAlignment':
-                _list.append(_obj.Proxy.get_data())
 
-        exporter = AlignmentExporter()
+            if _obj.Proxy.Type != 'Trails::HorizontalAlignment':
+                continue
+
+            _hash = hashlib.sha1(
+                _format + _obj.ModelKeeper.encode()).hexdigest()
+            _cached = self.fragments.get(_obj.Name)
+
+            if not _cached or _cached[0] != _hash:
+                _cached = (_hash, exporter.get_fragment(_obj.Proxy.get_data()))
+
+            fragments[_obj.Name] = _cached
+
+        #drop deleted alignments
+        self.fragments = fragments
 
         template_path = resources.__path__[0] + '/data/'
 
@@ -181,12 +205,13 @@ class _AlignmentGroup():
 
         xml_path = App.ActiveDocument.TransientDir + '/alignment.xml'
 
-        exporter.write(_list, template_path + template_file, xml_path)
+        exporter.write_fragments(
+            [_v[1] for _v in fragments.values()],
+            template_path + template_file, xml_path
+        )
 
         self.Object.Xml_Path = xml_path
 
-        self.data = self.importer.import_file(xml_path)
-
     def __getstate__(self):
         return self.Type
 
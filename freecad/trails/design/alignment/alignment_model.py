@@ -25,11 +25,15 @@
 Class for managing 2D Horizontal Alignment data
 """
 import ast
+import bisect
+
+import numpy
 
 from FreeCAD import Vector
 
 from ..project.support import units
 from ..geometry import arc, line, spiral, support
+from . import stationing
 from freecad_python_support.tuple_math import TupleMath
 
 _CLASS_NAME = 'AlignmentModel'
@@ -53,12 +57,58 @@ class AlignmentModel:
         Default Constructor
         """
         self.errors = []
+        self._index = None
         self.data = []
 
         if geometry:
             if not self.construct_geometry(geometry, zero_reference):
                 print('Errors encountered generating alignment model')
 
+    @property
+    def data(self):
+        """
+        The alignment data set
+        """
+
+        return self._data
+
+    @data.setter
+    def data(self, value):
+        """
+        Assign a new data set, discarding the lookup index
+        """
+
+        self._data = value
+        self.invalidate()
+
+    def invalidate(self):
+        """
+        Discard the lookup index.  Call after editing the geometry or
+        station equations in place.
+        """
+
+        self._index = None
+
+    def get_index(self):
+        """
+        Return the lookup index of the geometry and station equations,
+        rebuilding it if the geometry or equation lists were replaced
+        """
+
+        _key = (
+            id(self.data.get('geometry')), len(self.data.get('geometry')),
+            id(self.data.get('station')), len(self.data.get('station') or []),
+            self.data.get('meta').get('StartStation'),
+            self.data.get('meta').get('Length')
+        )
+
+        if self._index is None or self._index['Key'] != _key:
+
+            self._index = stationing.get_index(self)
+            self._index['Key'] = _key
+
+        return self._index
+
     def get_datum(self):
         """
         Return the alignment datum
@@ -512,6 +562,12 @@ class AlignmentModel:
         if (prev_coord is None) or (prev_station is None):
             return
 
+        self.invalidate()
+
+        #element positions are not known until the loop completes, so
+        #stations are resolved against the station equations alone
+        _station_index = stationing.get_station_index(self)
+
         for _geo in self.data.get('geometry'):
 
             if not _geo:
@@ -543,43 +599,51 @@ class AlignmentModel:
             prev_station = _geo.get('StartStation') \
                 + _geo.get('Length')/units.scale_factor()
 
-            int_sta = self.get_internal_station(geo_station)
+            int_sta = self.get_internal_station(geo_station, _station_index)
 
             _geo['InternalStation'] = (int_sta, int_sta + _geo.get('Length'))
 
-    def get_internal_station(self, station):
+        #element positions have changed
+        self.invalidate()
+
+    def get_internal_station(self, station, index=None):
         """
         Using the station equations, determine the internal station
         (position) along the alignment, scaled to the document units
+
+        index - station index to resolve against, the lookup index of
+                the model by default (see stationing.get_station_index())
         """
-        start_sta = self.data.get('meta').get('StartStation')
 
-        if not start_sta:
-            start_sta = 0.0
+        _index = index
+
+        if _index is None:
+            _index = self.get_index()
 
-        eqs = self.data.get('station')
+        _starts, _ends, _stations = _index['Segments']
 
-        #default to distance from starting station
-        position = 0.0
+        #stations before the first / after the last equation extrapolate
+        _i = len(_stations) - 1
 
-        for _eq in eqs[1:]:
+        if _index['Monotonic']:
+            _i = max(0, bisect.bisect_right(_stations, station) - 1)
 
-            #if station falls within equation, quit
-            if start_sta < station < _eq['Back']:
-                break
+        else:
 
-            #increment the position by the equaion length and
-            #set the starting station to the next equation
-            position += _eq['Back'] - start_sta
-            start_sta = _eq['Ahead']
+            #overlapping equations resolve to the first containing segment
+            for _j, _sta in enumerate(_stations):
 
-        #add final distance to position
-        position += station - start_sta
+                if _sta <= station <= _index['StationEnds'][_j]:
+                    _i = _j
+                    break
+
+        position = (station - _stations[_i]) * units.scale_factor() \
+            + _starts[_i]
 
         if support.within_tolerance(position):
             position = 0.0
 
-        return position * units.scale_factor()
+        return float(position)
 
     def get_alignment_station(self, internal_station=None, coordinate=None):
         """
@@ -588,68 +652,40 @@ class AlignmentModel:
         """
 
         if coordinate is not None:
-            internal_station = self.get_station_offset(coordinate)[0]
 
-        if internal_station is None:
-            return None
+            _stations, _, _elements = self.get_station_offsets([coordinate])
 
-        _start_sta = self.data.get('meta').get('StartStation')
-        _dist = internal_station
+            if _elements[0] < 0:
+                return None
 
-        for _eq in self.data.get('station'):
+            return float(_stations[0])
 
-            #station equation adjustments should be limited to equations
-            #on the same alignment
-            if _eq['Description'] != _eq['Alignment']:
-                continue
+        if internal_station is None:
+            return None
 
-            #if the raw station exceeds the end of the first station
-            #deduct the length of the first equation
-            if _eq['Back'] >= _start_sta + _dist:
-                break
+        _starts, _ends, _stations = self.get_index()['Segments']
 
-            _dist -= _eq['Back'] - _start_sta
-            _start_sta = _eq['Ahead']
+        _i = max(0, bisect.bisect_right(_starts, internal_station) - 1)
 
         #start station represents beginning of enclosing equation
         #and raw station represents distance within equation to point
-        return _start_sta + (_dist / units.scale_factor())
+        return float(_stations[_i]
+            + (internal_station - _starts[_i]) / units.scale_factor())
 
     def get_station_offset(self, coordinate):
         """
         Locate the provided coordinate along the alignment, returning
-        the internal station or None if not within tolerance.
+        the internal station, the offset and the geometry index,
+        or None if not within the limits of the alignment.
         """
 
-        _matches = []
-        _classes = {'Line': line, 'Curve': arc, 'Spiral': spiral}
-
-        #iterate the geometry, creating a list of potential matches
-        for _i, _v in enumerate(self.data.get('geometry')):
-
-            _class = _classes[_v.get('Type')]
-
-            _pos, _dist, _b = _class.get_position_offset(_v, coordinate)
-
-            #if position is before geometry, quit
-            if _b < 0:
-                break
+        _, _offsets, _elements, _positions = \
+            self.get_station_offsets([coordinate], positions=True)
 
-            #if position is after geometry, skip to next
-            if _b > 0:
-                continue
-
-            #save result
-            _matches.append((_pos, _dist, _i))
-
-        if not _matches:
+        if _elements[0] < 0:
             return None, None
 
-        #get the distances
-        _dists = [_v[1] for _v in _matches]
-
-        #return the closest match
-        return _matches[_dists.index(min(_dists))]
+        return float(_positions[0]), _offsets[0], int(_elements[0])
 
     def locate_curve(self, station):
         """
@@ -661,16 +697,14 @@ class AlignmentModel:
         if int_station is None:
             return None
 
-        prev_geo = None
+        _index = self.get_index()
 
-        for _geo in self.data.get('geometry'):
+        _i = bisect.bisect_right(_index['Starts'], int_station) - 1
 
-            if _geo.get('InternalStation')[0] > int_station:
-                break
-
-            prev_geo = _geo
+        if _i < 0:
+            return None
 
-        return prev_geo
+        return _index['Geometry'][_i]
 
     def get_orthogonal(self, station, side,verbose=False):
         """
@@ -729,138 +763,372 @@ class AlignmentModel:
 
         return None
 
-    def discretize_geometry(self, interval=None, method='Segment', delta=10.0, types=False):
+    def get_tangents(self, stations):
         """
-        Discretizes the alignment geometry to a series of vector points
-        interval - the starting internal station and length of curve
-        method - method of discretization
-        delta - discretization interval parameter
+        Return the coordinates and tangent vectors for an array of stations
+        as (N,3) arrays.  Stations not on the alignment return nan.
         """
 
-        geometry = self.data.get('geometry')
+        _positions = stationing.to_internal(
+            self.get_index()['Segments'], stations)
 
-        points = []
-        curves = []
-        spirals = []
-        lines = []
-        last_curve = None
+        return self.get_tangents_at(_positions)
 
-        #undefined = entire length
-        if not interval:
-            interval = [0.0, self.data.get('meta').get('Length')]
+    def get_orthogonals(self, stations, side='Left'):
+        """
+        Return the coordinates and orthogonal vectors for an array of
+        stations as (N,3) arrays.  Stations not on the alignment return nan.
+        """
 
-        #only one element = starting position
-        if len(interval) == 1:
-            interval.append(self.data.get('meta').get('Length'))
+        _coords, _vecs = self.get_tangents(stations)
 
-        #discretize each arc in the geometry list,
-        #store each point set as a sublist in the main points list
-        for curve in geometry:
+        _dir = 1.0
 
-            if not curve:
-                continue
+        if side.lower() in ['r', 'rt', 'right']:
+            _dir = -1.0
+
+        _orthos = numpy.zeros(_vecs.shape)
+        _orthos[:, 0] = -_vecs[:, 1] * _dir
+        _orthos[:, 1] = _vecs[:, 0] * _dir
+
+        return _coords, _orthos
+
+    def get_tangents_at(self, positions):
+        """
+        Return the coordinates and tangent vectors for an array of internal
+        positions as (N,3) arrays.
+        """
+
+        return self.evaluate_at(positions)[:2]
+
+    def evaluate_at(self, positions):
+        """
+        Evaluate the alignment at an array of internal positions.
+
+        Returns the coordinates and tangent vectors as (N,3) arrays,
+        the curvatures (rate of change of bearing, clockwise positive)
+        and the index of the geometry element at each position.
+        Positions beyond the ends of the alignment extend it's tangents
+        and have an element index of -1.
+        """
+
+        _fn = {
+            'Line': line,
+            'Curve': arc,
+            'Spiral': spiral,
+        }
+
+        _pos = numpy.asarray(positions, dtype=float).ravel()
+
+        _coords = numpy.full((len(_pos), 3), numpy.nan)
+        _vecs = numpy.full((len(_pos), 3), numpy.nan)
+        _curves = numpy.zeros(len(_pos))
+        _elements = numpy.full(len(_pos), -1)
+
+        _index = self.get_index()
+        geometry = _index['Geometry']
 
-            _sta = curve.get('InternalStation')
+        _valid = numpy.flatnonzero(~numpy.isnan(_pos))
 
-            #skip if curve end precedes start of interval
-            if _sta[1] < interval[0]:
+        if not geometry or not len(_valid):
+            return _coords, _vecs, _curves, _elements
+
+        #sort once, so the positions of each element are contiguous
+        _order = _valid[numpy.argsort(_pos[_valid], kind='stable')]
+        _sorted = _pos[_order]
+
+        _starts = _index['Starts']
+
+        _idx = numpy.searchsorted(_starts, _sorted, side='right') - 1
+
+        #slice limits of the positions falling on each element,
+        #beginning with those preceding the first element
+        _limits = numpy.searchsorted(
+            _idx, numpy.arange(-1, len(geometry) + 1), side='left')
+
+        for _i in range(-1, len(geometry)):
+
+            _lo, _hi = _limits[_i + 1], _limits[_i + 2]
+
+            if _lo == _hi:
                 continue
 
-            #skip if curve start exceeds end of interval
-            if _sta[0] > interval[1]:
+            _slice = _order[_lo:_hi]
+
+            #positions before the alignment extend the first tangent
+            if _i < 0:
+
+                _geo = geometry[0]
+
+                _coords[_slice], _vecs[_slice] = line.get_tangent_vectors(
+                    {'Start': _geo.get('Start'),
+                     'BearingIn': _geo.get('BearingIn')},
+                    _sorted[_lo:_hi] - _starts[0]
+                )
+
                 continue
 
-            _start = _sta[0]
+            _geo = geometry[_i]
+            _dist = _sorted[_lo:_hi] - _starts[_i]
+            _on = _dist <= _geo.get('Length')
+
+            if _geo.get('Type') in _fn and numpy.any(_on):
+
+                _type = _fn[_geo.get('Type')]
+
+                _coords[_slice[_on]], _vecs[_slice[_on]] = \
+                    _type.get_tangent_vectors(_geo, _dist[_on])
+
+                _curves[_slice[_on]] = _type.get_curvatures(_geo, _dist[_on])
+
+            _elements[_slice] = _i
+
+            #positions past the element end follow the outgoing tangent
+            if not numpy.all(_on):
+
+                _coords[_slice[~_on]], _vecs[_slice[~_on]] = \
+                    line.get_tangent_vectors(
+                        {'Start': _geo.get('End'),
+                         'BearingIn': _geo.get('BearingOut')},
+                        _dist[~_on] - _geo.get('Length')
+                    )
+
+        _end = max(self.data.get('meta').get('Length') or 0.0,
+            geometry[-1].get('InternalStation')[1])
+
+        _elements[_pos > _end + support.C.TOLERANCE] = -1
+
+        return _coords, _vecs, _curves, _elements
+
+    def get_station_offsets(self, coordinates, positions=False):
+        """
+        Project an array of coordinates onto the alignment.
+
+        Returns arrays of the alignment stations, the offsets (positive
+        left of the alignment) and the index of the geometry element
+        each coordinate projects onto.  Coordinates which project beyond
+        the ends of the alignment have an element index of -1.
+
+        positions - if True, the internal positions of the projections
+                    are returned as a fourth array
+        """
+
+        _coords = numpy.array(
+            [tuple(_v) for _v in coordinates], dtype=float).reshape(-1, 3)
+
+        if not len(_coords) or not self.get_index()['Geometry']:
+            _empty = numpy.full(len(_coords), numpy.nan)
+            _result = (_empty, _empty.copy(), numpy.full(len(_coords), -1))
+
+            if positions:
+                return _result + (_empty.copy(),)
 
-            #if curve starts before interval, use start of interval
-            if _sta[0] < interval[0]:
-                _start = interval[0]
+            return _result
 
-            _end = _sta[1]
+        _index = self.get_index()
 
-            #if curve ends past the interval, stop at end of interval
-            if _sta[1] > interval[1]:
-                _end = interval[1]
+        if 'Samples' not in _index:
+            _index['Samples'] = stationing.get_segment_index(self)
 
-            #calculate start position on arc and length to discretize
-            _arc_int = [_start - _sta[0], _end - _start]
+        _tree, _positions, _points = _index['Samples']
 
-            #just in case, skip for zero or negative lengths
-            if _arc_int[1] <= 0.0:
+        #project onto the nearest discretized segment to seed the solution
+        _nearest = _tree.query(_coords[:, :2])[1]
+
+        _seeds = numpy.full(len(_coords), numpy.inf)
+        _best = numpy.full(len(_coords), numpy.inf)
+
+        for _j in (_nearest - 1, _nearest):
+
+            _valid = (_j >= 0) & (_j < len(_positions) - 1)
+            _k = _j[_valid]
+
+            _start = _points[_k]
+            _vec = _points[_k + 1] - _start
+            _len = numpy.linalg.norm(_vec, axis=1)
+
+            _t = numpy.clip(
+                numpy.einsum('ij,ij->i', _coords[_valid, :2] - _start, _vec)
+                / _len**2, 0.0, 1.0)
+
+            _dist = numpy.linalg.norm(
+                _coords[_valid, :2] - _start - _t[:, None] * _vec, axis=1)
+
+            _seed = _positions[_k] + _t * (_positions[_k + 1] - _positions[_k])
+
+            _update = numpy.zeros(len(_coords), dtype=bool)
+            _update[_valid] = _dist < _best[_valid]
+
+            _best[_update] = _dist[_update[_valid]]
+            _seeds[_update] = _seed[_update[_valid]]
+
+        def _evaluate(pos):
+            """
+            Coordinates, tangents and curvatures at the positions
+            """
+
+            return self.evaluate_at(pos)[:3]
+
+        _pos, _offsets = support.project_points(_evaluate, _coords, _seeds)
+
+        _stations = stationing.to_station(_index['Segments'], _pos)
+        _elements = self.evaluate_at(_pos)[3]
+
+        if positions:
+            return _stations, _offsets, _elements, _pos
+
+        return _stations, _offsets, _elements
+
+    def _sample_elements(self, interval, method, delta):
+        """
+        Yield the type, geometry, starting position and array of
+        distances at which each element within the interval is sampled.
+        The tangents between and after the geometry elements are yielded
+        as lines continuing the previous element.
+        """
+
+        _fn = {
+            'Line': line,
+            'Curve': arc,
+            'Spiral': spiral,
+        }
+
+        _length = self.data.get('meta').get('Length')
+
+        #undefined = entire length, one element = starting position
+        if not interval:
+            interval = [0.0, _length]
+
+        elif len(interval) == 1:
+            interval = [interval[0], _length]
+
+        _types, _bounds, _geometry = \
+            stationing.get_elements(self, geometry=True)
+
+        if not any(_geometry):
+            return
+
+        for _i, _geo in enumerate(_geometry):
+
+            _lo = max(_bounds[_i][0], interval[0])
+            _hi = min(_bounds[_i][1], interval[1])
+
+            #skip elements outside the interval
+            if _hi - _lo <= 0.0:
                 continue
 
-            if curve.get('Type') == 'Curve':
+            _start = _bounds[_i][0]
 
-                _pts = arc.get_points(
-                    curve, size=delta, method=method, interval=_arc_int)
+            #tangents between elements continue the previous element
+            if _geo is None:
 
-                if _pts:
-                    points.append(_pts)
-                    curves.append([(i.x, i.y, i.z) for i in _pts])
+                _prev = _geometry[_i - 1] if _i else None
+                _start = 0.0
 
-            elif curve.get('Type') == 'Spiral':
+                if _prev:
+                    _geo = {'Start': _prev.get('End'),
+                        'BearingIn': _prev.get('BearingOut')}
+                    _start = _bounds[_i - 1][1]
 
-                _pts = spiral.get_points(curve, size=delta, method=method)
+                else:
+                    _geo = {'Start': self.data.get('meta').get('Start'),
+                        'BearingIn': _geometry[_i + 1].get('BearingIn')}
 
-                if _pts:
-                    points.append(_pts)
-                    spirals.append([(i.x, i.y, i.z) for i in _pts])
+                _geo['Type'] = 'Line'
+                _geo['Length'] = _bounds[_i][1] - _start
 
-            else:
+            _type = _fn.get(_geo.get('Type'), line)
 
-                _start_coord = line.get_coordinate(
-                    curve.get('Start'), curve.get('BearingIn'), _arc_int[0])
+            _dist = _type.get_distances(_geo, delta, method) \
+                + _bounds[_i][0] - _start
 
-                _end_coord = line.get_coordinate(
-                    _start_coord, curve.get('BearingIn'), _arc_int[1])
+            #limit to the interval, keeping it's ends
+            _dist = _dist[(_dist > _lo - _start) & (_dist < _hi - _start)]
+            _dist = numpy.concatenate(([_lo - _start], _dist, [_hi - _start]))
 
-                points.append([_start_coord, _end_coord])
-                lines.append([_start_coord, _end_coord])
+            yield _types[_i], _type, _geo, _start, _dist
 
-            last_curve = curve
+    def discretize(self, interval=None, method='Segment', delta=10.0):
+        """
+        Discretize the alignment geometry, including the tangents between
+        and after the geometry elements
 
-        #store the last point of the first geometry for the next iteration
-        _prev = points[0][-1]
-        result = points[0]
+        interval - the starting and ending internal station
+        method - method of discretization ('Segment', 'Interval',
+                 'Tolerance', see arc.get_distances())
+        delta - discretization interval parameter
 
-        if not (_prev and result):
-            return None
+        Returns an (N,3) array of points, the array of offsets of each
+        element's points (element i spans points[offsets[i]:offsets[i+1]],
+        including both of it's endpoints) and the list of element types
+        """
 
-        #iterate the point sets, adding them to the result set
-        #and eliminating any duplicate points
-        for item in points[1:]:
+        _points = [numpy.empty((0, 3))]
+        _counts = [0]
+        _result_types = []
 
-            _v = item
+        for _geo_type, _type, _geo, _start, _dist in \
+            self._sample_elements(interval, method, delta):
 
-            #duplicate points are within a hundredth of a foot of each other
-            if TupleMath.length(
-                TupleMath.subtract(tuple(_prev), tuple(item[0]))) < 0.01:
+            _pts = _type.get_tangent_vectors(_geo, _dist)[0]
 
-                _v = item[1:]
+            _points.append(_pts)
+            _counts.append(len(_pts))
+            _result_types.append(_geo_type)
 
-            result.extend(_v)
-            _prev = item[-1]
+        return numpy.concatenate(_points), numpy.cumsum(_counts), \
+            _result_types
 
-        #add a line segment for the last tangent if it exists
-        last_tangent = abs(
-            self.data.get('meta').get('Length') \
-                - last_curve.get('InternalStation')[1]
-        )
+    def get_sample_positions(self, interval=None, method='Tolerance',
+        delta=10.0):
+        """
+        Return the sorted internal positions at which the alignment is
+        discretized, including the element ends.  See discretize().
+        """
+
+        _positions = [numpy.empty(0)] + [
+            _start + _dist for _geo_type, _type, _geo, _start, _dist
+            in self._sample_elements(interval, method, delta)
+        ]
+
+        return numpy.unique(numpy.concatenate(_positions))
+
+    def discretize_geometry(self, interval=None, method='Segment', delta=10.0, types=False):
+        """
+        Discretizes the alignment geometry to a series of vector points
+        interval - the starting internal station and length of curve
+        method - method of discretization
+        delta - discretization interval parameter
+        """
+
+        points, offsets, _types = self.discretize(interval, method, delta)
 
-        if not support.within_tolerance(last_tangent):
-            _vec = TupleMath.bearing_vector(
-                last_curve.get('BearingOut') * last_tangent)
+        if not len(points):
+            return None
 
-#            _vec = support.vector_from_angle(last_curve.get('BearingOut'))\
-#                .multiply(last_tangent)
+        elements = [
+            [tuple(_p) for _p in points[offsets[_i]:offsets[_i + 1]].tolist()]
+            for _i in range(len(_types))
+        ]
 
-            last_point = tuple(result[-1])
+        #shared element endpoints appear once in the result
+        result = elements[0][:]
 
-            result.append(TupleMath.add(last_point, _vec))
+        for _pts in elements[1:]:
+            result.extend(_pts[1:])
 
         #set the end point
         if not self.data.get('meta').get('End'):
             self.data.get('meta')['End'] = result[-1]
 
-        if types: return curves, spirals, lines, result
+        if types:
+
+            curves, spirals, lines = [], [], []
+            _lists = {'Curve': curves, 'Spiral': spirals}
+
+            for _i, _pts in enumerate(elements):
+                _lists.get(_types[_i], lines).append(_pts)
+
+            return curves, spirals, lines, result
+
         return result
@@ -30,20 +30,27 @@
 import os
 
 import numpy as np
-from scipy import interpolate
 
 import FreeCAD as App
 import FreeCADGui as Gui
 import Part
 
+from freecad.trails import geo_origin
+from ..project.support import units
+from .profile_model import ProfileModel
+
 __title__ = "generate_3d_alignment.py"
 __author__ = "Joel Graff"
 __url__ = "https://www.freecadweb.org"
 
+#maximum deviation of the composite polyline from the alignments, in mm
+_TOLERANCE = 5.0
+
 class Generate3dAlignment():
     """
     Horizontal alignment generation class.
-    Build a spline based on a selected group of horizontal curve objects
+    Build a 3D polyline based on a horizontal and vertical alignment,
+    sampled at the same stations.
     """
 
     dms_to_deg = lambda dms: dms[0] + dms[1]/60.0 + dms[2]/3600.0
@@ -52,7 +59,10 @@ class Generate3dAlignment():
         """
         Constructor
         """
-        pass
+
+        #composite object names and the states of the alignments they
+        #were built from, keyed by alignment group
+        self.composites = {}
 
     def GetResources(self):
         """
@@ -87,114 +97,151 @@ class Generate3dAlignment():
             obj_list = sel[0].OutList
 
         for obj in obj_list:
-            if obj.TypeId == 'Part::Part2DObjectPython':
+            if obj.TypeId == 'Part::Part2DObjectPython' \
+                or hasattr(obj, 'ModelKeeper'):
+
                 objs.append(obj)
 
         if len(objs) == 2:
-            if ('HA' in objs[0].Label) & ('VA' in objs[1].Label):
-                return objs
 
-            if ('HA' in objs[1].Label) & ('VA' in objs[0].Label):
-                return [objs[1], objs[0]]
+            #horizontal alignment objects hold their model data
+            horizontal = [_o for _o in objs
+                if hasattr(_o, 'ModelKeeper') or 'HA' in _o.Label]
+
+            vertical = [_o for _o in objs
+                if 'VA' in _o.Label and _o not in horizontal]
+
+            if len(horizontal) == 1 and len(vertical) == 1:
+                return [horizontal[0], vertical[0]]
 
         return None
 
-    def build_alignment(self, alignments):
+    @staticmethod
+    def get_state(obj):
         """
-        Build a 3D alignment from the supplied alignments
+        Return a value which changes whenever the alignment geometry does
         """
 
-        parent = alignments[0].InList[0]
+        keeper = getattr(obj, 'ModelKeeper', None)
 
-        #get list of geometry edges
-        edges = [alignments[0].Shape.Edges[0], alignments[1].Shape.Edges[0]]
+        if keeper:
+            return keeper
 
-        #get the horizontal curve's first and last parameters
-        params = [edges[0].FirstParameter, edges[0].LastParameter]
+        return obj.Shape.hashCode()
 
-        #get the length of the curve and set the step interval
-        hz_len = edges[0].Length
+    @staticmethod
+    def get_profile(vertical):
+        """
+        Return the profile model of a vertical alignment object.
+        Vertical alignment wires are drawn with the distance along the
+        horizontal alignment as x and the elevation as y.
+
+        Vertical alignments hold no vertical curve data, so the profile
+        interpolates the discretized wire linearly between it's points.
+        """
+
+        points = getattr(vertical, 'Points', None)
 
-        #default 1-foot resolution
-        step = 304.80
+        #wire points are local, the datum is in the placement
+        if points:
+            points = [vertical.Placement.multVec(_p) for _p in points]
 
-        points = []
+        else:
+            points = [_v.Point for _v in vertical.Shape.Vertexes]
 
-        #1. divide the length by the number of steps
-        #2. truncate the integer
-        #3. add one for the concluding point for the steps,
-        #4. add point for the end of the edge, if last step falls short
-        point_count = int(hz_len / float(step)) + 1
+        points = np.array([tuple(_p) for _p in points])
 
-        if ((point_count - 1) * step) < hz_len:
-            point_count += 1
+        #drop repeated stations
+        _, idx = np.unique(points[:, 0], return_index=True)
 
-        #vertical curve as equidistant points at the step interval...
-        vt_pts = edges[1].discretize(
-            Number=point_count, First=0.00, Last=hz_len
-        )
+        return ProfileModel(points[idx, 0], points[idx, 1])
 
-        end_point = vt_pts[point_count - 1]
+    @staticmethod
+    def compose(horizontal, profile):
+        """
+        Return the (N,3) points of the 3D alignment, sampling the
+        horizontal and vertical alignments at the same positions.
+
+        The positions are those of the horizontal discretization and the
+        profile's critical and sample stations, each within tolerance.
+        """
 
-        #this pairs coordinates of like-axes in three tuples:
-        #   (x_coords,y_coords,z)
-        vt_pt_axes = np.array(vt_pts).swapaxes(0, 1)
+        model = getattr(getattr(horizontal, 'Proxy', None), 'model', None)
 
-        #save x_coords/y_coords coordinate pairs in separate variables
-        x_coords = []
-        _i = 0.0
+        if hasattr(model, 'get_sample_positions'):
 
-        while _i <= hz_len:
-            x_coords.append(_i)
-            _i += step
+            positions = model.get_sample_positions(
+                None, 'Tolerance', _TOLERANCE / units.scale_factor())
 
-        #if we added two to the point count, the step interval won't
-        #make it to the end... add the length as the last point
-        if len(x_coords) < point_count:
-            x_coords.append(hz_len)
+            positions = np.union1d(positions, profile.get_sample_stations(
+                _TOLERANCE, positions[0], positions[-1]))
+
+            coords = model.evaluate_at(positions)[0] \
+                - np.array(tuple(geo_origin.get().Origin))
+
+        else:
+
+            edge = horizontal.Shape.Edges[0]
+
+            count = len(edge.discretize(QuasiDeflection=_TOLERANCE))
+
+            positions = np.union1d(
+                np.linspace(0.0, edge.Length, max(count, 2)),
+                profile.get_sample_stations(_TOLERANCE, 0.0, edge.Length)
+            )
+
+            coords = np.array([
+                tuple(edge.valueAt(edge.getParameterByLength(_d)))
+                for _d in positions
+            ])
+
+        coords[:, 2] = profile.get_elevations(positions)
+
+        return coords
+
+    def build_alignment(self, alignments):
+        """
+        Build a 3D alignment from the supplied alignments.  The composite
+        is rebuilt only if either alignment changed since it was built.
+        """
+
+        parent = alignments[0].InList[0]
 
-        y_coords = vt_pt_axes[1]
+        state = (self.get_state(alignments[0]),
+            self.get_state(alignments[1]))
 
-        #append the final elevation - see above
-        if len(y_coords) < point_count:
-            y_coords = np.append(y_coords, end_point.y)
+        cached = self.composites.get(parent.Name)
+        res = None
 
-        #interpolation...
-        _ff = interpolate.interp1d(
-            x_coords, y_coords, kind='cubic', bounds_error=False, fill_value=0
-        )
+        if cached:
 
-        _ll = int(edges[0].Length) + 1
+            res = App.ActiveDocument.getObject(cached['Object'])
 
-        #create a set of x_coords
-        #values spaced between 0 and ll at the specified step interval
-        xnew = np.arange(0, _ll, step)
+            if res and cached['State'] == state:
+                return res
 
-        if xnew[-1] != edges[0].Length:
-            xnew = np.append(xnew, edges[0].Length)
+        profile = self.get_profile(alignments[1])
 
-        #interpolates y_coords values for the specified x_coords values
-        ynew = _ff(xnew)
+        if profile.errors:
 
-        for i in range(xnew.shape[0]):
+            for _err in profile.errors:
+                print('Error in vertical alignment {0}: {1}'\
+                    .format(alignments[1].Label, _err))
 
-            position = params[0] + step * (params[1] - params[0]) / hz_len * i
+            return None
 
-            #x,y coordinate on horizontal
-            point = edges[0].Curve.value(position)
+        points = self.compose(alignments[0], profile)
 
-            #generate z-coordinate for 3D spline
-            points.append(App.Vector(point.x, point.y, ynew[i]))
+        if res is None:
 
-        res = App.activeDocument().addObject('Part::Feature', 'Composite_'
-                                             + parent.Label)
+            res = App.activeDocument().addObject(
+                'Part::Feature', 'Composite_' + parent.Label)
 
-        _s = Part.BSplineCurve()
-        _s.interpolate(points)
+            parent.addObject(res)
 
-        res.Shape = _s.toShape()
+        res.Shape = Part.makePolygon([App.Vector(*_p) for _p in points])
 
-        parent.addObject(res)
+        self.composites[parent.Name] = {'Object': res.Name, 'State': state}
 
         App.ActiveDocument.recompute()
 
@@ -36,8 +36,16 @@ from ...geomatics.region import regions
 from . import alignment_group
 
 from pivy import coin
-from copy import deepcopy
-from math import inf, pi
+import numpy
+from math import atan2, inf, pi
+
+#station tick half length and label size by station type, in mm
+_TICK_SIZE = {'Major': 3000.0, 'Minor': 1500.0}
+_LABEL_SIZE = {'Major': 3000.0, 'Minor': 1500.0}
+
+#smallest legible label size and tick spacing, in pixels
+_LABEL_PIXELS = 8.0
+_TICK_PIXELS = 5.0
 
 def create(geometry, label="Alignment", zero_reference=False):
     """
@@ -59,7 +67,6 @@ def create(geometry, label="Alignment", zero_reference=False):
     ViewProviderHorizontalAlignment(obj.ViewObject)
 
     # Set geometry.
-    obj.ModelKeeper = str(geometry)
     obj.Proxy.set_geometry(geometry, zero_reference)
     regs = regions.create()
     obj.addObject(regs)
@@ -178,8 +185,10 @@ class HorizontalAlignment(DataFunctions):
         self.errors = []
 
         self.curve_edges = None
+        self.discretization = None
 
         self.model = None
+        self.model_source = None
         self.meta = {}
         self.hashes = None
 
@@ -203,7 +212,9 @@ class HorizontalAlignment(DataFunctions):
         Restore Object references on reload.
         """
         self.init_class_members(obj)
-        self.set_geometry(eval(obj.ModelKeeper))
+
+        # Decode the model on first access.
+        self.model_source = obj.ModelKeeper
 
     def onChanged(self, obj, prop):
         '''
@@ -227,13 +238,18 @@ class HorizontalAlignment(DataFunctions):
         '''
         Update Object when doing a recomputation. 
         '''
-        if hasattr(self.model, 'discretize_geometry'):
-            curves, spirals, lines, points = obj.Proxy.model.discretize_geometry(
-                [0.0], obj.Method, obj.Seg_Value, types=True)
+        if hasattr(self.model, 'discretize'):
+            points, offsets, types = obj.Proxy.model.discretize(
+                [0.0], obj.Method, obj.Seg_Value)
+
+            if not len(points): return
+
+            origin = geo_origin.get(tuple(points[0]))
 
-            origin = geo_origin.get(points[0])
+            self.discretization = (points, offsets, types)
 
-            obj.Shape = self.get_shape(lines, curves, spirals, origin.Origin)
+            obj.Shape = self.get_shape(points, offsets, types, origin.Origin)
+            self.build_curve_edge_dict(obj)
 
 
 class ViewProviderHorizontalAlignment(ViewFunctions):
@@ -262,168 +278,331 @@ class ViewProviderHorizontalAlignment(ViewFunctions):
         line_style.style = coin.SoDrawStyle.LINES
         line_style.lineWidth = 2
 
-        # Line geometry keepers.
-        line_color = coin.SoBaseColor()
-        line_color.rgb = (1.0, 0.0, 0.0)
-        self.lines = coin.SoSeparator()
-        self.lines.addChild(line_style)
-        self.lines.addChild(line_color)
-
-        # Curve geometry keepers.
-        curve_color = coin.SoBaseColor()
-        curve_color.rgb = (0.0, 0.5, 0.0)
-        self.curves = coin.SoSeparator()
-        self.curves.addChild(line_style)
-        self.curves.addChild(curve_color)
-
-        # Spiral geometry keepers.
-        spiral_color = coin.SoBaseColor()
-        spiral_color.rgb = (0.0, 0.33, 1.0)
-        self.spirals = coin.SoSeparator()
-        self.spirals.addChild(line_style)
-        self.spirals.addChild(spiral_color)
-
-        # Labels root.
-        ticks = coin.SoSeparator()
-        self.tick_coords = coin.SoGeoCoordinate()
-        self.tick_lines = coin.SoLineSet()
-        ticks.addChild(self.tick_coords)
-        ticks.addChild(self.tick_lines)
-        self.labels = coin.SoSeparator()
+        # Geometry keepers, with a single line set for each element type.
+        self.coords = {}
+        self.line_sets = {}
+        self.elements = {}
+        self.edge_offsets = {}
+
+        colors = {
+            'Line': (1.0, 0.0, 0.0),
+            'Curve': (0.0, 0.5, 0.0),
+            'Spiral': (0.0, 0.33, 1.0)
+        }
+
+        keepers = {}
+
+        for key, rgb in colors.items():
+            color = coin.SoBaseColor()
+            color.rgb = rgb
+
+            selection = coin.SoType.fromName('SoFCSelection').createInstance()
+            selection.style = 'EMISSIVE_DIFFUSE'
+
+            self.coords[key] = coin.SoGeoCoordinate()
+            self.line_sets[key] = coin.SoLineSet()
+            self.elements[key] = []
+            self.edge_offsets[key] = 0
+
+            selection.addChild(self.coords[key])
+            selection.addChild(self.line_sets[key])
+
+            keepers[key] = coin.SoSeparator()
+            keepers[key].addChild(line_style)
+            keepers[key].addChild(color)
+            keepers[key].addChild(selection)
+
+        self.lines = keepers['Line']
+        self.curves = keepers['Curve']
+        self.spirals = keepers['Spiral']
+
+        # Station ticks and labels by type, with a font for each type.
+        self.tick_coords = {}
+        self.tick_lines = {}
+        self.ticks = {}
+        self.fonts = {}
+        self.labels = {}
+        self.label_builders = {}
+
+        # Label data of each type, built into nodes when first rendered.
+        self.pending_labels = {}
+        self.rendered_labels = set()
+        self.label_sensor = None
+
+        for key in ['Major', 'Minor']:
+            self.tick_coords[key] = coin.SoGeoCoordinate()
+            self.tick_lines[key] = coin.SoLineSet()
+
+            self.ticks[key] = coin.SoSeparator()
+            self.ticks[key].addChild(self.tick_coords[key])
+            self.ticks[key].addChild(self.tick_lines[key])
+
+            self.fonts[key] = coin.SoFont()
+            self.fonts[key].size = _LABEL_SIZE[key]
+
+            self.label_builders[key] = coin.SoCallback()
+            self.label_builders[key].setCallback(self.on_label_render, key)
+
+            self.labels[key] = coin.SoSeparator()
+
+        # Stations root, showing ticks and labels by zoom level.
+        self.stations = coin.SoLevelOfDetail()
 
         # Alignment root.
         lines_root = coin.SoSeparator()
         lines_root.addChild(self.lines)
         lines_root.addChild(self.curves)
         lines_root.addChild(self.spirals)
-        lines_root.addChild(ticks)
-        lines_root.addChild(self.labels)
+        lines_root.addChild(self.stations)
         vobj.addDisplayMode(lines_root,"Wireframe")
 
+        # Station properties, added to alignments from older versions.
+        # Both are added before setting them, as setting either one
+        # updates the stations.
+        intervals = [
+            ("MajorInterval", "Interval of labeled major stations", 100.0),
+            ("MinorInterval", "Interval of minor stations", 10.0)]
+
+        missing = [interval for interval in intervals
+            if interval[0] not in vobj.PropertiesList]
+
+        for name, desc, _ in missing:
+            vobj.addProperty("App::PropertyFloat", name, "Stations", desc)
+
+        for name, _, value in missing:
+            setattr(vobj, name, value)
+
     def onChanged(self, vobj, prop):
         '''
         Update Object visuals when a view property changed.
         '''
-        if prop == "Labels":
+        if prop in ["Labels", "MajorInterval", "MinorInterval"]:
+            self.update_stations(vobj)
+
+    def update_stations(self, vobj):
+        """
+        Rebuild the station ticks and labels.
+        Each level of detail adds the ticks and labels that are legible
+        at it's zoom level, measured in pixels per mm.
+        Label nodes are built only when their level is first rendered.
+        """
+        self.stations.removeAllChildren()
+        self.pending_labels = {}
 
-            self.labels.removeAllChildren()
-            labels = vobj.getPropertyByName(prop)
+        for key in ['Major', 'Minor']:
+            self.labels[key].removeAllChildren()
+            self.labels[key].addChild(self.label_builders[key])
+            self.labels[key].addChild(self.fonts[key])
 
-            # Set System.
-            origin = geo_origin.get()
-            geo_system = ["UTM", origin.UtmZone, "FLAT"]
-            self.tick_coords.geoSystem.setValues(geo_system)
+        obj = vobj.Object
+        if not vobj.Labels or not obj.Proxy.model: return
+
+        major = vobj.MajorInterval
+        minor = vobj.MinorInterval
+
+        # Intervals are zero until both station properties are set.
+        if major <= 0.0 or minor <= 0.0: return
+
+        # Set System.
+        origin = geo_origin.get()
+        geo_system = ["UTM", origin.UtmZone, "FLAT"]
+
+        stations, coords, orthos, is_major = \
+            self.get_station_ticks(obj, major, minor)
+
+        valid = ~numpy.isnan(coords).any(axis=1)
+        base = numpy.array(tuple(origin.Origin))
 
-            if labels:
-                points = []
-                line_vert = []
-                stations = self.get_stations(vobj.Object)
+        for key, mask, interval in [
+            ('Major', is_major & valid, major),
+            ('Minor', ~is_major & valid, minor)]:
 
-                for label, tick in stations.items():
-                    font = coin.SoFont()
-                    font.size = 3000
-                    sta_label = coin.SoSeparator()
-                    location = coin.SoTransform()
-                    text = coin.SoAsciiText()
+            left = coords[mask] + orthos[mask] * _TICK_SIZE[key]
+            right = coords[mask] - orthos[mask] * _TICK_SIZE[key]
 
-                    text.string.setValues([str(label)])
-                    start = deepcopy(tick[0]).sub(origin.Origin)
-                    end = deepcopy(tick[-1]).sub(origin.Origin)
+            points = numpy.stack([left, right], axis=1).reshape(-1, 3)
 
-                    if start.y>end.y:
-                        angle = start.sub(end).getAngle(Vector(1,0,0)) - pi
-                    else:
-                        angle = end.sub(start).getAngle(Vector(1,0,0))
+            tick_coords = self.tick_coords[key]
+            tick_coords.geoSystem.setValues(geo_system)
+            tick_coords.point.setNum(len(points))
+            tick_coords.point.setValues(0, len(points), points.tolist())
 
-                    location.translation = end
-                    location.rotation.setValue(coin.SbVec3f(0, 0, 1), angle)
+            tick_lines = self.tick_lines[key]
+            tick_lines.numVertices.setNum(len(left))
+            tick_lines.numVertices.setValues(0, len(left), [2] * len(left))
 
-                    sta_label.addChild(font)
-                    sta_label.addChild(location)
-                    sta_label.addChild(text)
-                    self.labels.addChild(sta_label)
+            decimals = 0 if float(interval).is_integer() else 2
 
-                    points.extend(tick)
-                    line_vert.append(len(tick))
+            self.pending_labels[key] = (
+                stations[mask], right - base, -orthos[mask], decimals)
 
-                self.tick_coords.point.values = points
-                self.tick_lines.numVertices.values = line_vert
+        # Zoom levels at which minor labels, major labels and minor ticks
+        # become legible, most detailed first.
+        features = sorted([
+            (_LABEL_PIXELS / _LABEL_SIZE['Minor'], self.labels['Minor']),
+            (_LABEL_PIXELS / _LABEL_SIZE['Major'], self.labels['Major']),
+            (_TICK_PIXELS / max(minor * units.scale_factor(), 1.0),
+                self.ticks['Minor'])
+        ], key=lambda feature: -feature[0])
+
+        # Screen area of the stations at each zoom level.
+        extents = numpy.ptp(coords[valid, :2], axis=0) if valid.any() \
+            else numpy.zeros(2)
+
+        area = max(float(numpy.prod(extents + 2.0 * _TICK_SIZE['Major'])), 1.0)
+
+        self.stations.screenArea.setValues(
+            0, len(features), [area * scale ** 2 for scale, _ in features])
+
+        for i in range(len(features) + 1):
+            level = coin.SoGroup()
+            level.addChild(self.ticks['Major'])
+
+            for _, node in features[i:]:
+                level.addChild(node)
+
+            self.stations.addChild(level)
+
+    def on_label_render(self, key, action):
+        """
+        Schedule the labels of the type to be built, when their level of
+        detail is rendered for the first time since the last update.
+        The scene graph can not be changed during the traversal.
+        """
+        if key not in self.pending_labels:
+            return
+
+        if not action.isOfType(coin.SoGLRenderAction.getClassTypeId()):
+            return
+
+        self.rendered_labels.add(key)
+
+        if self.label_sensor is None:
+            self.label_sensor = coin.SoOneShotSensor(self.build_labels, None)
+
+        if not self.label_sensor.isScheduled():
+            self.label_sensor.schedule()
+
+    def build_labels(self, data=None, sensor=None):
+        """
+        Build the label nodes of the rendered station types.
+        """
+        keys, self.rendered_labels = self.rendered_labels, set()
+
+        # Labels of levels not rendered yet stay pending.
+        for key in keys & self.pending_labels.keys():
+            stations, positions, directions, decimals = \
+                self.pending_labels.pop(key)
+
+            for sta, position, direction in zip(
+                stations, positions.tolist(), directions):
+
+                self.labels[key].addChild(self.get_station_label(
+                    '{:.{}f}'.format(sta, decimals), position, direction))
+
+    def get_station_label(self, text, position, direction):
+        """
+        Return a label node at the position, reading along the direction.
+        Labels that would be upside down are turned and right-justified.
+        """
+        location = coin.SoTransform()
+        location.translation.setValue(*position)
+
+        sta_text = coin.SoAsciiText()
+        sta_text.string.setValues([text])
+
+        angle = atan2(direction[1], direction[0])
+
+        if direction[0] < 0.0:
+            angle += pi
+            sta_text.justification = coin.SoAsciiText.RIGHT
+
+        location.rotation.setValue(coin.SbVec3f(0, 0, 1), angle)
+
+        sta_label = coin.SoSeparator()
+        sta_label.addChild(location)
+        sta_label.addChild(sta_text)
+
+        return sta_label
 
     def updateData(self, obj, prop):
         '''
         Update Object visuals when a data property changed.
         '''
         if prop == "Shape":
-            shape = obj.getPropertyByName(prop)
-            if not shape.SubShapes: return
+            data = obj.Proxy.get_discretization(obj)
+            if data is None: return
 
             # Set System.
             origin = geo_origin.get()
             geo_system = ["UTM", origin.UtmZone, "FLAT"]
 
-            copy_shape = shape.copy()
-            copy_shape.Placement.move(origin.Origin)
+            polylines = self.get_polylines(*data)
+            edge_offset = 0
 
-            lines = copy_shape.SubShapes[0]
-            for wire in lines.Wires:
-                points = []
-                for vertex in wire.OrderedVertexes:
-                    points.append(vertex.Point)
+            # Update the buffers of each line set in place.
+            for key, (points, counts, elements) in polylines.items():
+                coords = self.coords[key]
+                line_set = self.line_sets[key]
 
-                line = coin.SoType.fromName('SoFCSelection').createInstance()
-                line.style = 'EMISSIVE_DIFFUSE'
+                coords.geoSystem.setValues(geo_system)
+                coords.point.setNum(len(points))
+                coords.point.setValues(0, len(points), points.tolist())
 
-                line_coords = coin.SoGeoCoordinate()
-                line_coords.geoSystem.setValues(geo_system)
-                line_coords.point.values = points
-                line_set = coin.SoLineSet()
+                line_set.numVertices.setNum(len(counts))
+                line_set.numVertices.setValues(0, len(counts), counts.tolist())
 
-                line.addChild(line_coords)
-                line.addChild(line_set)
-                self.lines.addChild(line)
+                self.elements[key] = elements
+                self.edge_offsets[key] = edge_offset
+                edge_offset += int(numpy.sum(counts - 1))
 
-                del points
+            if obj.ViewObject.Labels:
+                self.update_stations(obj.ViewObject)
 
-            curves = copy_shape.SubShapes[1]
-            for wire in curves.Wires:
-                points = []
-                for vertex in wire.OrderedVertexes:
-                    points.append(vertex.Point)
+    def get_picked_line(self, pp):
+        """
+        Return the element type, line index and coordinate index of the
+        picked point from it's line detail, or None
+        """
+        detail = pp.getDetail()
 
-                curve = coin.SoType.fromName('SoFCSelection').createInstance()
-                curve.style = 'EMISSIVE_DIFFUSE'
+        if not detail or not detail.isOfType(
+                coin.SoLineDetail.getClassTypeId()):
+            return None
 
-                curve_coords = coin.SoGeoCoordinate()
-                curve_coords.geoSystem.setValues(geo_system)
-                curve_coords.point.values = points
-                curve_set = coin.SoLineSet()
+        detail = coin.cast(detail, 'SoLineDetail')
+        path = pp.getPath()
 
-                curve.addChild(curve_coords)
-                curve.addChild(curve_set)
-                self.curves.addChild(curve)
+        for key, line_set in self.line_sets.items():
+            if path.containsNode(line_set):
+                return key, detail.getLineIndex(), \
+                    detail.getPoint0().getCoordinateIndex()
 
-                del points
+        return None
 
-            spirals = copy_shape.SubShapes[2]
-            for wire in spirals.Wires:
-                points = []
-                for vertex in wire.OrderedVertexes:
-                    points.append(vertex.Point)
+    def get_picked_element(self, pp):
+        """
+        Return the index of the picked element in the discretized
+        geometry, or None
+        """
+        picked = self.get_picked_line(pp)
+        if not picked: return None
 
-                spiral = coin.SoType.fromName('SoFCSelection').createInstance()
-                spiral.style = 'EMISSIVE_DIFFUSE'
+        return self.elements[picked[0]][picked[1]]
 
-                spiral_coords = coin.SoGeoCoordinate()
-                spiral_coords.geoSystem.setValues(geo_system)
-                spiral_coords.point.values = points
-                spiral_set = coin.SoLineSet()
+    def getElementPicked(self, pp):
+        """
+        Return the name of the picked shape edge.
+        Each polyline of n vertices holds n - 1 edges, so the edge index
+        within the line set is the coordinate index less the line index.
+        """
+        picked = self.get_picked_line(pp)
+        if not picked: raise ValueError('No alignment element picked')
 
-                spiral.addChild(spiral_coords)
-                spiral.addChild(spiral_set)
-                self.spirals.addChild(spiral)
+        key, line_index, coord_index = picked
 
-                del points
-            del copy_shape
+        return 'Edge' + str(
+            self.edge_offsets[key] + coord_index - line_index + 1)
 
     def getDisplayMode(self, obj):
         '''
@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+#***********************************************************************
+#*                                                                     *
+#* Copyright (c) 2021, Joel Graff <monograff76@gmail.com               *
+#*                                                                     *
+#* This program is free software; you can redistribute it and/or modify*
+#* it under the terms of the GNU Lesser General Public License (LGPL)  *
+#* as published by the Free Software Foundation; either version 2 of   *
+#* the License, or (at your option) any later version.                 *
+#* for detail see the LICENCE text file.                               *
+#*                                                                     *
+#* This program is distributed in the hope that it will be useful,     *
+#* but WITHOUT ANY WARRANTY; without even the implied warranty of      *
+#* MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the       *
+#* GNU Library General Public License for more details.                *
+#*                                                                     *
+#* You should have received a copy of the GNU Library General Public   *
+#* License along with this program; if not, write to the Free Software *
+#* Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307*
+#* USA                                                                 *
+#*                                                                     *
+#***********************************************************************
+
+"""
+Serialization of alignment model data for document storage
+"""
+
+__title__ = 'model_codec.py'
+__author__ = 'Joel Graff'
+__url__ = "https://www.freecadweb.org"
+
+import ast
+import json
+import math
+
+from FreeCAD import Vector
+
+#encoded strings begin with the format tag and version
+_TAG = 'TrailsAlignment'
+VERSION = 1
+
+#keys marking encoded vectors and tuples
+_VECTOR = '__vector__'
+_TUPLE = '__tuple__'
+
+def _to_json(value):
+    """
+    Convert vectors and tuples, which json does not preserve
+    """
+
+    if isinstance(value, dict):
+        return {_k: _to_json(_v) for _k, _v in value.items()}
+
+    if isinstance(value, list):
+        return [_to_json(_v) for _v in value]
+
+    if isinstance(value, tuple):
+        return {_TUPLE: [_to_json(_v) for _v in value]}
+
+    if isinstance(value, Vector):
+        return {_VECTOR: [value.x, value.y, value.z]}
+
+    #numpy scalars and arrays
+    if hasattr(value, 'tolist'):
+        return _to_json(value.tolist())
+
+    return value
+
+def _from_json(value):
+    """
+    Restore encoded vectors and tuples
+    """
+
+    if len(value) == 1:
+
+        if _VECTOR in value:
+            return Vector(*value[_VECTOR])
+
+        if _TUPLE in value:
+            return tuple(value[_TUPLE])
+
+    return value
+
+def encode(data):
+    """
+    Encode the alignment data set as a versioned string
+    """
+
+    return _TAG + ':' + str(VERSION) + ':' + json.dumps(
+        _to_json(data), separators=(',', ':'))
+
+def is_encoded(text):
+    """
+    Return True if the string was created by encode()
+    """
+
+    return text.startswith(_TAG + ':')
+
+def decode(text):
+    """
+    Decode a string created by encode().  Strings written by earlier
+    versions (the repr of the data set) are parsed without evaluation.
+    """
+
+    if not text:
+        return None
+
+    if not is_encoded(text):
+        return _decode_repr(text)
+
+    _tag, _version, _body = text.split(':', 2)
+
+    if int(_version) > VERSION:
+        raise ValueError(
+            'Alignment data version {} is newer than supported ({})'
+            .format(_version, VERSION))
+
+    return json.loads(_body, object_hook=_from_json)
+
+#names permitted in data set representations
+_NAMES = {
+    'None': None, 'True': True, 'False': False,
+    'inf': math.inf, 'nan': math.nan
+}
+
+def _decode_repr(text):
+    """
+    Parse the repr() of a data set containing only literals, containers
+    and FreeCAD Vectors.  Any other expression is rejected.
+    """
+
+    return _parse_node(ast.parse(text.strip(), mode='eval').body)
+
+def _parse_node(node):
+    """
+    Recursively convert a node of a repr() expression to it's value
+    """
+
+    if isinstance(node, ast.Constant):
+        return node.value
+
+    if isinstance(node, ast.Dict):
+        return {
+            _parse_node(_k): _parse_node(_v)
+            for _k, _v in zip(node.keys, node.values)
+        }
+
+    if isinstance(node, ast.List):
+        return [_parse_node(_v) for _v in node.elts]
+
+    if isinstance(node, ast.Tuple):
+        return tuple(_parse_node(_v) for _v in node.elts)
+
+    if isinstance(node, ast.Name) and node.id in _NAMES:
+        return _NAMES[node.id]
+
+    if isinstance(node, ast.UnaryOp) \
+        and isinstance(node.op, (ast.USub, ast.UAdd)):
+
+        _value = _parse_node(node.operand)
+
+        if isinstance(_value, (int, float)):
+            return -_value if isinstance(node.op, ast.USub) else _value
+
+    #Vector (x, y, z), as written by repr()
+    if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) \
+        and node.func.id == 'Vector' and not node.keywords:
+
+        _args = [_parse_node(_v) for _v in node.args]
+
+        if all(isinstance(_v, (int, float)) for _v in _args):
+            return Vector(*_args)
+
+    raise ValueError(
+        'Unsupported expression in alignment data: ' + ast.dump(node))
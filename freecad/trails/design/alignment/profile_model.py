@@ -0,0 +1,333 @@
+# -*- coding: utf-8 -*-
+#***********************************************************************
+#*                                                                     *
+#* Copyright (c) 2021 Joel Graff <monograff76@gmail.com>               *
+#*                                                                     *
+#* This program is free software; you can redistribute it and/or modify*
+#* it under the terms of the GNU Lesser General Public License (LGPL)  *
+#* as published by the Free Software Foundation; either version 2 of   *
+#* the License, or (at your option) any later version.                 *
+#* for detail see the LICENCE text file.                               *
+#*                                                                     *
+#* This program is distributed in the hope that it will be useful,     *
+#* but WITHOUT ANY WARRANTY; without even the implied warranty of      *
+#* MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the       *
+#* GNU Library General Public License for more details.                *
+#*                                                                     *
+#* You should have received a copy of the GNU Library General Public   *
+#* License along with this program; if not, write to the Free Software *
+#* Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307*
+#* USA                                                                 *
+#*                                                                     *
+#***********************************************************************
+
+"""
+Class for managing vertical profile data
+"""
+
+import numpy
+
+__title__ = 'profile_model.py'
+__author__ = 'Joel Graff'
+__url__ = "https://www.freecadweb.org"
+
+class ProfileModel:
+    """
+    Vertical profile defined by it's PVI's and the lengths of the
+    symmetric parabolic vertical curves at each PVI.
+
+    Elevations, grades and curvatures are evaluated in closed form for
+    arrays of stations.  Stations, elevations and curve lengths are in
+    consistent units, grades are ratios (rise / run).  Beyond the first
+    and last PVI, the profile continues along the end tangents.
+    """
+
+    def __init__(self, stations, elevations, lengths=None):
+        """
+        Constructor
+
+        stations - PVI stations, increasing
+        elevations - PVI elevations
+        lengths - vertical curve length at each PVI, zero or None for
+                  none.  Lengths at the first and last PVI are ignored.
+        """
+
+        self.errors = []
+
+        self.stations = numpy.asarray(stations, dtype=float).ravel()
+        self.elevations = numpy.asarray(elevations, dtype=float).ravel()
+
+        if lengths is None:
+            lengths = numpy.zeros(len(self.stations))
+
+        self.lengths = numpy.asarray(lengths, dtype=float).ravel().copy()
+
+        self.grades = None
+        self.curves = None
+
+        if self.validate():
+            self.build()
+
+    def validate(self):
+        """
+        Check the PVI data for consistency, recording errors
+        """
+
+        _count = len(self.stations)
+
+        if _count < 2:
+            self.errors.append('Profile requires at least two PVIs')
+
+        if len(self.elevations) != _count or len(self.lengths) != _count:
+
+            self.errors.append(
+                'PVI stations, elevations and curve lengths differ in size')
+
+        if self.errors:
+            return False
+
+        if numpy.any(numpy.diff(self.stations) <= 0.0):
+            self.errors.append('PVI stations are not increasing')
+
+        if numpy.any(self.lengths < 0.0):
+            self.errors.append('Negative vertical curve length')
+
+        if self.errors:
+            return False
+
+        self.lengths[[0, -1]] = 0.0
+
+        _bvc = self.stations - self.lengths / 2.0
+        _evc = self.stations + self.lengths / 2.0
+
+        _overlaps = numpy.nonzero(_evc[:-1] > _bvc[1:] + 1e-9)[0]
+
+        for _i in _overlaps:
+
+            self.errors.append(
+                'Vertical curves at PVI {} and {} overlap'
+                .format(self.stations[_i], self.stations[_i + 1]))
+
+        return not self.errors
+
+    def build(self):
+        """
+        Calculate the tangent grades and vertical curve parameters
+        """
+
+        #grade of the tangent leaving each PVI
+        self.grades = \
+            numpy.diff(self.elevations) / numpy.diff(self.stations)
+
+        _idx = numpy.nonzero(self.lengths > 0.0)[0]
+        _lengths = self.lengths[_idx]
+
+        _g1 = self.grades[_idx - 1]
+        _g2 = self.grades[_idx]
+
+        _bvc = self.stations[_idx] - _lengths / 2.0
+
+        self.curves = {
+            'Index': _idx,
+            'BVC': _bvc,
+            'EVC': _bvc + _lengths,
+            'Elevation': self.elevations[_idx] - _g1 * _lengths / 2.0,
+            'Length': _lengths,
+            'GradeIn': _g1,
+            'GradeOut': _g2,
+
+            #rate of change of grade
+            'Rate': (_g2 - _g1) / _lengths,
+        }
+
+    def _check(self):
+        """
+        Raise a ValueError if the PVI data failed validation
+        """
+
+        if self.errors:
+            raise ValueError(
+                'Invalid profile: ' + '; '.join(self.errors))
+
+    def _locate(self, stations):
+        """
+        Return the index of the tangent leaving the PVI at or before each
+        station, and the index of the vertical curve containing it, -1
+        for stations on tangents
+        """
+
+        _tangents = numpy.clip(
+            numpy.searchsorted(self.stations, stations, side='right') - 1,
+            0, len(self.grades) - 1
+        )
+
+        _curves = numpy.full(stations.shape, -1)
+
+        if not len(self.curves['BVC']):
+            return _tangents, _curves
+
+        _idx = numpy.searchsorted(self.curves['BVC'], stations, side='right')
+        _idx -= 1
+
+        _valid = _idx >= 0
+        _valid[_valid] = \
+            stations[_valid] <= self.curves['EVC'][_idx[_valid]]
+
+        _curves[_valid] = _idx[_valid]
+
+        return _tangents, _curves
+
+    def evaluate(self, stations):
+        """
+        Return the elevations, grades and curvatures (rate of change of
+        grade) at each station as arrays, or as floats for a single
+        station
+        """
+
+        self._check()
+
+        _stations = numpy.atleast_1d(numpy.asarray(stations, dtype=float))
+        _tangents, _curves = self._locate(_stations)
+
+        _elevations = self.elevations[_tangents] \
+            + self.grades[_tangents] * (_stations - self.stations[_tangents])
+
+        _grades = self.grades[_tangents].copy()
+        _rates = numpy.zeros(_stations.shape)
+
+        _on_curve = _curves >= 0
+        _idx = _curves[_on_curve]
+
+        _x = _stations[_on_curve] - self.curves['BVC'][_idx]
+        _g1 = self.curves['GradeIn'][_idx]
+        _r = self.curves['Rate'][_idx]
+
+        _elevations[_on_curve] = \
+            self.curves['Elevation'][_idx] + _g1 * _x + _r * _x * _x / 2.0
+
+        _grades[_on_curve] = _g1 + _r * _x
+        _rates[_on_curve] = _r
+
+        if numpy.ndim(stations) == 0:
+            return float(_elevations[0]), float(_grades[0]), float(_rates[0])
+
+        return _elevations, _grades, _rates
+
+    def get_elevations(self, stations):
+        """
+        Return the profile elevations at the stations
+        """
+
+        return self.evaluate(stations)[0]
+
+    def get_grades(self, stations):
+        """
+        Return the profile grades at the stations
+        """
+
+        return self.evaluate(stations)[1]
+
+    def get_curvatures(self, stations):
+        """
+        Return the curvature of the profile at the stations,
+        d(grade) / d(station) / (1 + grade^2)^(3/2)
+        """
+
+        _, _grades, _rates = self.evaluate(stations)
+
+        return _rates / (1.0 + _grades * _grades) ** 1.5
+
+    def get_k_values(self):
+        """
+        Return the K-value of each vertical curve, the horizontal
+        distance to change the grade by one percent.  Zero for PVI's
+        without curves, infinite where the grade does not change.
+        """
+
+        self._check()
+
+        _result = numpy.zeros(len(self.stations))
+
+        _diff = numpy.abs(
+            self.curves['GradeOut'] - self.curves['GradeIn']) * 100.0
+
+        with numpy.errstate(divide='ignore'):
+            _result[self.curves['Index']] = self.curves['Length'] / _diff
+
+        return _result
+
+    def get_high_low_points(self):
+        """
+        Return the stations and elevations of the high and low points of
+        the profile, where the grade changes sign, and a bool array which
+        is True for high points
+        """
+
+        self._check()
+
+        _g1 = self.grades[:-1]
+        _g2 = self.grades[1:]
+
+        #PVI's where the grade changes sign, excluding the end PVI's
+        _pvis = numpy.nonzero(_g1 * _g2 <= 0.0)[0] + 1
+        _pvis = _pvis[(_g1[_pvis - 1] != _g2[_pvis - 1])]
+
+        _stations = self.stations[_pvis].copy()
+
+        #on curves, the turning point is where the grade is zero
+        _on_curve = self.lengths[_pvis] > 0.0
+        _idx = numpy.searchsorted(self.curves['Index'], _pvis[_on_curve])
+
+        _stations[_on_curve] = self.curves['BVC'][_idx] \
+            - self.curves['GradeIn'][_idx] / self.curves['Rate'][_idx]
+
+        _is_high = self.grades[_pvis] < self.grades[_pvis - 1]
+
+        return _stations, self.get_elevations(_stations), _is_high
+
+    def get_critical_stations(self):
+        """
+        Return the sorted stations of the PVI's, vertical curve ends and
+        high / low points
+        """
+
+        self._check()
+
+        return numpy.unique(numpy.concatenate([
+            self.stations, self.curves['BVC'], self.curves['EVC'],
+            self.get_high_low_points()[0]
+        ]))
+
+    def get_sample_stations(self, tolerance, start=None, end=None):
+        """
+        Return the stations at which the profile is sampled so that a
+        polyline through them deviates from the vertical curves by no
+        more than the tolerance.  Critical stations are always included.
+        """
+
+        self._check()
+
+        if start is None:
+            start = self.stations[0]
+
+        if end is None:
+            end = self.stations[-1]
+
+        _result = [self.get_critical_stations()]
+
+        #the chord of a parabola spanning h deviates by rate * h^2 / 8
+        for _bvc, _evc, _r in zip(
+            self.curves['BVC'], self.curves['EVC'], self.curves['Rate']):
+
+            if not _r:
+                continue
+
+            _step = numpy.sqrt(8.0 * tolerance / abs(_r))
+            _count = int(numpy.ceil((_evc - _bvc) / _step))
+
+            _result.append(numpy.linspace(_bvc, _evc, _count + 1))
+
+        _result = numpy.unique(numpy.concatenate(_result))
+        _result = _result[(_result > start) & (_result < end)]
+
+        return numpy.concatenate([[start], _result, [end]])
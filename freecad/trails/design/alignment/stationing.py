@@ -0,0 +1,331 @@
+# -*- coding: utf-8 -*-
+#***********************************************************************
+#*                                                                     *
+#* Copyright (c) 2021, Joel Graff <monograff76@gmail.com               *
+#*                                                                     *
+#* This program is free software; you can redistribute it and/or modify*
+#* it under the terms of the GNU Lesser General Public License (LGPL)  *
+#* as published by the Free Software Foundation; either version 2 of   *
+#* the License, or (at your option) any later version.                 *
+#* for detail see the LICENCE text file.                               *
+#*                                                                     *
+#* This program is distributed in the hope that it will be useful,     *
+#* but WITHOUT ANY WARRANTY; without even the implied warranty of      *
+#* MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the       *
+#* GNU Library General Public License for more details.                *
+#*                                                                     *
+#* You should have received a copy of the GNU Library General Public   *
+#* License along with this program; if not, write to the Free Software *
+#* Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307*
+#* USA                                                                 *
+#*                                                                     *
+#***********************************************************************
+
+"""
+Station sampling tools for horizontal alignments
+"""
+
+__title__ = 'stationing.py'
+__author__ = 'Joel Graff'
+__url__ = "https://www.freecadweb.org"
+
+import numpy
+
+from scipy import spatial
+
+from ..project.support import units
+
+#stations closer than this (in station units) are considered equal
+_TOLERANCE = 1e-6
+
+#maximum spacing (in station units) and angle (radians) between the
+#samples of the alignment segment index
+_SAMPLE_SPACING = 10.0
+_SAMPLE_ANGLE = 0.1
+
+def get_equation_segments(model):
+    """
+    Return the station equation segments of the alignment model as arrays
+    of internal start position (document units scaled to mm), internal end
+    position and the station at the start of each segment
+    """
+
+    _meta = model.data.get('meta')
+    _sf = units.scale_factor()
+
+    _sta = _meta.get('StartStation')
+
+    if not _sta:
+        _sta = 0.0
+
+    _starts = [0.0]
+    _stations = [_sta]
+
+    #mirrors AlignmentModel.get_internal_station(), where the first
+    #equation describes the start of the alignment
+    for _eq in (model.data.get('station') or [])[1:]:
+
+        _starts.append(_starts[-1] + (_eq['Back'] - _stations[-1]) * _sf)
+        _stations.append(_eq['Ahead'])
+
+    _starts = numpy.array(_starts, dtype=float)
+    _ends = numpy.append(
+        _starts[1:], max(_meta.get('Length') or 0.0, _starts[-1]))
+
+    return _starts, _ends, numpy.array(_stations, dtype=float)
+
+def get_station_index(model):
+    """
+    Build the station equation lookup arrays of the alignment model,
+    which do not depend on the positions of the geometry elements:
+
+    Segments - station equation segments (see get_equation_segments())
+    StationEnds - station at the end of each equation segment
+    Monotonic - True if the segment stations never decrease, so that
+                stations may be located by binary search
+    """
+
+    _segments = get_equation_segments(model)
+
+    _seg_starts, _seg_ends, _stations = _segments
+
+    _sta_ends = _stations + (_seg_ends - _seg_starts) / units.scale_factor()
+
+    return {
+        'Segments': _segments,
+        'StationEnds': _sta_ends,
+        'Monotonic': bool(
+            numpy.all(_stations[1:] >= _sta_ends[:-1] - _TOLERANCE))
+    }
+
+def get_index(model):
+    """
+    Build the lookup arrays of the alignment model.  In addition to the
+    station index (see get_station_index()):
+
+    Geometry - list of the non-empty geometry elements
+    Starts - sorted internal start positions of the elements
+    """
+
+    _geometry = [_v for _v in model.data.get('geometry') if _v]
+
+    _starts = numpy.array(
+        [_v.get('InternalStation')[0] for _v in _geometry], dtype=float)
+
+    _result = get_station_index(model)
+
+    _result['Geometry'] = _geometry
+    _result['Starts'] = _starts
+
+    return _result
+
+def get_segment_index(model):
+    """
+    Discretize the alignment model to a polyline and return a
+    nearest-neighbour tree of it's vertices, the internal position of
+    each vertex and the (N,2) array of vertex coordinates.
+    Consecutive vertices form the segments used to seed projections.
+    """
+
+    _sf = units.scale_factor()
+
+    _types, _bounds, _geometry = get_elements(model, geometry=True)
+
+    _positions = [numpy.empty(0)]
+
+    for _i, _bound in enumerate(_bounds):
+
+        _spacing = _SAMPLE_SPACING * _sf
+
+        #curves and spirals are sampled by angle as well as distance
+        if _types[_i] != 'Line' and _geometry[_i].get('Radius'):
+            _spacing = min(_spacing, _geometry[_i]['Radius'] * _SAMPLE_ANGLE)
+
+        _count = max(1, int(numpy.ceil((_bound[1] - _bound[0]) / _spacing)))
+
+        _positions.append(
+            numpy.linspace(_bound[0], _bound[1], _count + 1)[:-1])
+
+    _positions.append(_bounds[-1:, 1])
+    _positions = numpy.concatenate(_positions)
+
+    _points = model.get_tangents_at(_positions)[0][:, :2]
+
+    return spatial.cKDTree(_points), _positions, _points
+
+def to_station(segments, positions):
+    """
+    Convert an array of internal positions to alignment stations
+    """
+
+    _starts, _ends, _stations = segments
+    _pos = numpy.asarray(positions, dtype=float)
+
+    _idx = numpy.searchsorted(_starts, _pos, side='right') - 1
+    _idx = numpy.clip(_idx, 0, len(_starts) - 1)
+
+    return _stations[_idx] + (_pos - _starts[_idx]) / units.scale_factor()
+
+def to_internal(segments, stations):
+    """
+    Convert an array of alignment stations to internal positions.
+    Stations which fall in more than one segment resolve to the first.
+    Stations outside of any segment are returned as nan.
+    """
+
+    _starts, _ends, _stations = segments
+    _sf = units.scale_factor()
+    _sta = numpy.asarray(stations, dtype=float)
+
+    _result = numpy.full(_sta.shape, numpy.nan)
+
+    #iterate in reverse so the first matching segment wins
+    for _i in range(len(_starts) - 1, -1, -1):
+
+        _end = _stations[_i] + (_ends[_i] - _starts[_i]) / _sf
+
+        _mask = (_sta >= _stations[_i] - _TOLERANCE) \
+            & (_sta <= _end + _TOLERANCE)
+
+        _result[_mask] = _starts[_i] + (_sta[_mask] - _stations[_i]) * _sf
+
+    return _result
+
+def get_elements(model, geometry=False):
+    """
+    Return the element types and internal start / end positions of the
+    alignment geometry, with uncovered ranges filled as tangents.
+    If geometry is True, the list of geometry dictionaries is also
+    returned, with None for the filled tangents.
+    """
+
+    _length = model.data.get('meta').get('Length')
+
+    _types = []
+    _bounds = []
+    _geometry = []
+    _prev = 0.0
+
+    for _geo in model.data.get('geometry'):
+
+        if not _geo:
+            continue
+
+        _int = _geo.get('InternalStation')
+
+        if _int[0] > _prev:
+            _types.append('Line')
+            _bounds.append((_prev, _int[0]))
+            _geometry.append(None)
+
+        _types.append(_geo.get('Type'))
+        _bounds.append(tuple(_int))
+        _geometry.append(_geo)
+        _prev = max(_prev, _int[1])
+
+    if _length and _length > _prev:
+        _types.append('Line')
+        _bounds.append((_prev, _length))
+        _geometry.append(None)
+
+    _bounds = numpy.array(_bounds, dtype=float).reshape(-1, 2)
+
+    if geometry:
+        return _types, _bounds, _geometry
+
+    return _types, _bounds
+
+def sample_range(segments, start, end, increment):
+    """
+    Return the internal positions between start and end at which the
+    alignment station is an exact multiple of the increment
+    """
+
+    if not increment or increment <= 0.0:
+        return numpy.empty(0)
+
+    _starts, _ends, _stations = segments
+    _sf = units.scale_factor()
+
+    _result = [numpy.empty(0)]
+
+    for _i in range(len(_starts)):
+
+        _lo = max(start, _starts[_i])
+        _hi = min(end, _ends[_i])
+
+        if _hi < _lo:
+            continue
+
+        _sta_lo = _stations[_i] + (_lo - _starts[_i]) / _sf
+        _sta_hi = _stations[_i] + (_hi - _starts[_i]) / _sf
+
+        #integer multiples of the increment within the station range
+        _k = numpy.arange(
+            numpy.ceil(_sta_lo / increment - _TOLERANCE),
+            numpy.floor(_sta_hi / increment + _TOLERANCE) + 1.0
+        )
+
+        _result.append(
+            _lo + (_k * increment - _sta_lo) * _sf)
+
+    return numpy.concatenate(_result)
+
+def generate(model, increments, interval=None, critical=True, stations=None):
+    """
+    Generate stations along the alignment model
+
+    model - the AlignmentModel
+    increments - dictionary of station increments keyed by element type
+                ('Line', 'Curve', 'Spiral'), in station units
+    interval - optional start / end station limits
+    critical - include element start / end points (TS / SC / PC / PT...)
+    stations - additional user-defined stations
+
+    Returns arrays of stations and internal positions, in order along
+    the alignment
+    """
+
+    _segments = model.get_index()['Segments']
+    _types, _bounds = get_elements(model)
+
+    _positions = [numpy.empty(0)]
+
+    for _i, _type in enumerate(_types):
+
+        _positions.append(
+            sample_range(
+                _segments, _bounds[_i][0], _bounds[_i][1],
+                increments.get(_type))
+        )
+
+    if critical and len(_bounds):
+        _positions.append(_bounds.ravel())
+
+    #always close the sampling at the alignment end
+    _positions.append(_segments[1][-1:])
+
+    if stations is not None and len(stations):
+        _user = to_internal(_segments, stations)
+        _positions.append(_user[~numpy.isnan(_user)])
+
+    _pos = numpy.concatenate(_positions)
+    _pos = numpy.clip(_pos, _segments[0][0], _segments[1][-1])
+
+    #eliminate duplicates from shared element boundaries
+    _pos = numpy.unique(
+        numpy.round(_pos / units.scale_factor() / _TOLERANCE))
+
+    _pos *= _TOLERANCE * units.scale_factor()
+
+    _sta = to_station(_segments, _pos)
+
+    if interval:
+
+        _mask = (_sta >= interval[0] - _TOLERANCE) \
+            & (_sta <= interval[1] + _TOLERANCE)
+
+        _pos = _pos[_mask]
+        _sta = _sta[_mask]
+
+    return _sta, _pos
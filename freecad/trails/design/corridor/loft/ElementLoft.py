@@ -24,15 +24,30 @@
 """
 DESCRIPTION
 """
+import numpy
+
 import FreeCAD as App
 import FreeCADGui as Gui
 import Part
 
-from Project.Support import Properties
+from ...project.support import properties
+
+from .... import geo_origin
+from ....geomatics.surface import surface, daylight
+from . import corridor_builder
 
 _CLASS_NAME = 'ElementLoft'
 _TYPE = 'Part::FeaturePython'
 
+#section intervals are in feet
+_FOOT = 304.8
+
+#maximum deviation of the discretized path from the alignment (mm)
+_DEFLECTION = 1.0
+
+#tolerance for sewing the corridor mesh into a solid (mm)
+_SEWING = 0.1
+
 __title__ = _CLASS_NAME + '.py'
 __author__ = "Joel Graff"
 __url__ = "https://www.freecadweb.org"
@@ -72,19 +87,40 @@ class _ElementLoft(object):
         self.Object = None
 
         #add class properties
-        Properties.add(obj, 'StringList', 'Control_Schedule', 'Schedule for loft controls', [], is_read_only=True, is_hidden=False)
-        Properties.add(obj, 'Link', 'Alignment', 'Linked alignment', spline)
-        Properties.add(obj, 'Link', 'Template', 'Linked template', sketch)
-        Properties.add(obj, 'Float', 'Interval', 'Section spacing interval', 100.0)
-        Properties.add(obj, 'FloatList', 'Interval_Schedule', 'Schedule for loft section intervals', [], is_read_only=True, is_hidden=False)
+        properties.add(obj, 'StringList', 'Control_Schedule', 'Schedule for loft controls', [], is_read_only=True, is_hidden=False)
+        properties.add(obj, 'Link', 'Alignment', 'Linked alignment', spline)
+        properties.add(obj, 'Link', 'Template', 'Linked template', sketch)
+        properties.add(obj, 'Float', 'Interval', 'Section spacing interval', 100.0)
+        properties.add(obj, 'FloatList', 'Interval_Schedule', 'Schedule for loft section intervals', [], is_read_only=True, is_hidden=False)
+
+        self.add_corridor_properties(obj)
 
         self.Object = obj
 
+    @staticmethod
+    def add_corridor_properties(obj):
+        """
+        Add the properties of the mesh-based corridor, which lofts saved
+        before it lack
+        """
+
+        if not hasattr(obj, 'Make_Solid'):
+            properties.add(obj, 'Bool', 'Make_Solid', 'Build a solid of the corridor', False)
+
+        if not hasattr(obj, 'Surfaces'):
+            properties.add(obj, 'LinkList', 'Surfaces', 'Corridor surfaces', [], is_read_only=True)
+
+        if not hasattr(obj, 'Daylight_Surface'):
+            properties.add(obj, 'Link', 'Daylight.Daylight_Surface', 'Surface the side slopes are graded to', None)
+            properties.add(obj, 'Float', 'Daylight.Cut_Slope', 'Cut slope, rise over run', 1.0)
+            properties.add(obj, 'Float', 'Daylight.Fill_Slope', 'Fill slope, rise over run', 1.0)
+
     def onDocumentRestored(self, fp):
         """
         Restore object references on reload
         """
 
+        self.add_corridor_properties(fp)
         self.Object = fp
 
     def __getstate__(self):
@@ -102,91 +138,155 @@ class _ElementLoft(object):
 
     def regenerate(self):
         """
-        Regenerate the loft
+        Regenerate the corridor surfaces, and the solid if requested
         """
 
-        spline = self.Object.Alignment
-        sketch = self.Object.Template
-        interval = self.Object.Interval
+        obj = self.Object
+        sketch = obj.Template
 
-        #create loft sections
-        section_list = self.build_sections(spline, sketch) #, interval)
+        _wires = sketch.Shape.Wires
 
-        #Part.show(Part.Compound(section_list))
-        #create a compound of the components (polygons)
-        #section_object.Shape = Part.Compound(section_list)
+        builder = corridor_builder.CorridorBuilder(
+            [tuple(_v.Point) for _v in sketch.Shape.Vertexes],
+            bool(_wires) and _wires[0].isClosed()
+        )
 
-        #loft the polygons to generate the solid
-        #loft_object.Sections = section_object.Shape
+        #only the sections and catch points of station ranges whose
+        #inputs changed are rebuilt
+        chunks = corridor_builder.get_section_chunks(
+            builder, self.get_path_points(obj.Alignment),
+            obj.Interval * _FOOT
+        )
 
-        self.Object.Shape = Part.makeLoft(section_list, False, True, False)
+        sections = corridor_builder.join_chunks(chunks)
 
-    def execute(self, obj):
-        """
-        Class execute for recompute calls
-        """
+        surfaces = builder.get_surfaces(sections)
 
-        #early execution protection
-        if not self.Object:
-            return
+        if obj.Daylight_Surface:
 
-        self.regenerate()
+            engine = daylight.Daylight(
+                obj.Daylight_Surface.Mesh.Topology,
+                obj.Cut_Slope, obj.Fill_Slope
+            )
 
-    def show_interval_schedule(self):
+            surfaces.update(builder.get_daylight(
+                sections, engine, [len(_c) for _c in chunks]))
+
+        self.update_surfaces(surfaces)
+
+        shape = Part.Shape()
+
+        if obj.Make_Solid:
+            shape = self.get_solid(*builder.get_mesh(sections))
+
+        obj.Shape = shape
+
+    @staticmethod
+    def get_path_points(spline):
         """
-        Create a temporary spreadsheet for viewing and
-        editing the schedule data
+        Return the (N,3) points of the discretized alignment wire
         """
-        pass
 
-    @staticmethod
-    def build_sections(fpo, sketch, average=True):
+        _shape = spline.Shape
+
+        if _shape.Wires:
+            _points = _shape.Wires[0].discretize(QuasiDeflection=_DEFLECTION)
+
+        else:
+            _points = [_v.Point for _v in _shape.Vertexes]
+
+        return numpy.array([tuple(_p) for _p in _points])
+
+    def update_surfaces(self, surfaces):
         """
-        Generate / regenerate the loft along a wire path
+        Create or update the surface objects of the corridor.
+        Surfaces are labelled after the loft and the surface name.
+        Surfaces whose points and faces did not change are left as they
+        are, as reassigning them rebuilds the whole surface.
         """
-        comps = []
-        z_up = App.Vector(0, 0, 1)
 
-        prev_tangent = None
+        obj = self.Object
 
-        for edge in fpo.Shape.Edges:
+        existing = {
+            _s.Label.rsplit('_', 1)[-1]: _s for _s in obj.Surfaces if _s}
 
-            tangent = edge.Curve.Direction
+        if getattr(self, 'surface_keys', None) is None:
+            self.surface_keys = {}
 
-            #average the tangent if desired
-            if average and prev_tangent:
-                tangent = ((tangent + prev_tangent) / 2.0).normalize()
+        origin = numpy.array(tuple(geo_origin.get().Origin))
+        result = []
 
-            x_normal = tangent.cross(z_up).normalize()
-            z_normal = tangent.cross(x_normal).normalize()
+        for name, (points, faces) in surfaces.items():
 
-            if z_normal.z < 0.0:
-                z_normal = z_normal.negative()
+            points = points + origin
+            key = corridor_builder.get_surface_key(points, faces)
 
-            for _i in range(0, 1):
+            surf = existing.pop(name, None)
 
-                origin = edge.Vertexes[_i].Point
-                poly_points = []
+            if surf is not None and self.surface_keys.get(surf.Name) == key:
+                result.append(surf)
+                continue
 
-                #iterate sketch vertices, scaling them along the normal and adding the origin to locate them
-                for sk_vtx in sketch.Shape.Vertexes:
-                    point = sk_vtx.Point
-                    poly_points.append(origin + (point.x * x_normal) + (point.y * z_normal))
+            vectors = [App.Vector(*_p) for _p in points.tolist()]
+            delaunay = faces.ravel().tolist()
 
-                poly_points.append(origin)
+            if surf is None:
+                surf = surface.create(
+                    vectors, obj.Label + '_' + name, delaunay)
 
-                #generate a polygon of the points and save it
-                comps += [Part.makePolygon(poly_points)]
+            else:
 
-                #averaging tangents on the first tangent
-                #requires skipping the end vertex
-                if average and not prev_tangent:
-                    continue
+                #assign the faces in place of a triangulation
+                surf.Proxy.triangulate_vectors = False
+                surf.Vectors = vectors
+                surf.Proxy.triangulate_vectors = True
+                surf.Delaunay = delaunay
 
-            if average:
-                prev_tangent = tangent
+            self.surface_keys[surf.Name] = key
+            result.append(surf)
 
-        return comps
+        #surfaces the template no longer produces
+        for surf in existing.values():
+            App.ActiveDocument.removeObject(surf.Name)
+
+        obj.Surfaces = result
+
+    @staticmethod
+    def get_solid(points, faces):
+        """
+        Return the OCC solid of a closed corridor mesh, or the shell of
+        an open one
+        """
+
+        shape = Part.Shape()
+
+        shape.makeShapeFromMesh((
+            [App.Vector(*_p) for _p in points.tolist()],
+            [tuple(_f) for _f in faces.tolist()]
+        ), _SEWING)
+
+        if shape.isClosed():
+            return Part.makeSolid(shape)
+
+        return shape
+
+    def execute(self, obj):
+        """
+        Class execute for recompute calls
+        """
+
+        #early execution protection
+        if not self.Object:
+            return
+
+        self.regenerate()
+
+    def show_interval_schedule(self):
+        """
+        Create a temporary spreadsheet for viewing and
+        editing the schedule data
+        """
+        pass
 
     @staticmethod
     def _build_spline_sections(spline, sketch, interval):
@@ -25,7 +25,7 @@ import os
 import FreeCAD as App
 import FreeCADGui as Gui
 from PySide import QtGui
-from Corridor.loft import ElementLoft, NewElementLoftDialog
+from . import ElementLoft, NewElementLoftDialog
 
 class GenerateElementLoft():
     """
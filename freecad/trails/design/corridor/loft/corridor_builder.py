@@ -0,0 +1,600 @@
+# -*- coding: utf-8 -*-
+#***********************************************************************
+#*                                                                     *
+#* Copyright (c) 2021 Joel Graff <monograff76@gmail.com>               *
+#*                                                                     *
+#* This program is free software; you can redistribute it and/or modify*
+#* it under the terms of the GNU Lesser General Public License (LGPL)  *
+#* as published by the Free Software Foundation; either version 2 of   *
+#* the License, or (at your option) any later version.                 *
+#* for detail see the LICENCE text file.                               *
+#*                                                                     *
+#* This program is distributed in the hope that it will be useful,     *
+#* but WITHOUT ANY WARRANTY; without even the implied warranty of      *
+#* MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the       *
+#* GNU Library General Public License for more details.                *
+#*                                                                     *
+#* You should have received a copy of the GNU Library General Public   *
+#* License along with this program; if not, write to the Free Software *
+#* Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307*
+#* USA                                                                 *
+#*                                                                     *
+#***********************************************************************
+
+"""
+Triangle mesh construction of corridors from a section template placed
+along a 3D path
+"""
+
+import hashlib
+
+import numpy
+
+from ....geomatics.region.station_cache import StationCache
+
+__title__ = 'corridor_builder.py'
+__author__ = 'Joel Graff'
+__url__ = "https://www.freecadweb.org"
+
+#tolerance for coincident points (mm)
+_TOLERANCE = 0.0001
+
+#names of the corridor surfaces, by template edge class
+SURFACES = ['Top', 'Datum', 'Left', 'Right']
+
+#average length of the station ranges regenerated independently (mm)
+CHUNK_LENGTH = 500000.0
+
+#grid to which vertex coordinates are rounded to pick chunk boundaries (mm)
+_BOUNDARY_GRID = 0.001
+
+#content addressed cache of chunk sections, shared by all corridors
+_CACHE = StationCache(size=500)
+
+def get_vertices(points):
+    """
+    Return the vertices of a 3D polyline without coincident points, and
+    the unit tangents at each, averaged between the adjoining segments
+    """
+
+    _points = numpy.asarray(points, dtype=float).reshape(-1, 3)
+
+    #drop coincident vertices
+    _keep = numpy.concatenate(([True], numpy.linalg.norm(
+        numpy.diff(_points, axis=0), axis=1) > _TOLERANCE))
+
+    _points = _points[_keep]
+    _segments = _normalize(numpy.diff(_points, axis=0))
+
+    return _points, _normalize(numpy.concatenate(
+        (_segments[:1], _segments[:-1] + _segments[1:], _segments[-1:])))
+
+def get_path(points, interval=None, tangents=None):
+    """
+    Return the positions, coordinates and unit tangents of the stations
+    along a 3D polyline as arrays.
+
+    Stations are placed at the polyline vertices and, if an interval is
+    given, at multiples of it from the start.  Vertex tangents are
+    calculated by get_vertices(), unless they are given.
+    """
+
+    if tangents is None:
+        points, tangents = get_vertices(points)
+
+    _points = numpy.asarray(points, dtype=float).reshape(-1, 3)
+    _tangents = numpy.asarray(tangents, dtype=float).reshape(-1, 3)
+
+    _segments = numpy.diff(_points, axis=0)
+    _lengths = numpy.linalg.norm(_segments, axis=1)
+    _segments /= _lengths[:, None]
+
+    _vertices = numpy.concatenate(([0.0], numpy.cumsum(_lengths)))
+
+    if not interval:
+        return _vertices, _points, _tangents
+
+    _positions = numpy.union1d(
+        _vertices, numpy.arange(0.0, _vertices[-1], interval))
+
+    _idx = numpy.searchsorted(_vertices, _positions, side='right') - 1
+    _idx = numpy.clip(_idx, 0, len(_segments) - 1)
+
+    _coords = _points[_idx] \
+        + (_positions - _vertices[_idx])[:, None] * _segments[_idx]
+
+    #tangents rotate linearly between vertices, so closely spaced
+    #sections do not fold over each other
+    _ratio = ((_positions - _vertices[_idx]) / _lengths[_idx])[:, None]
+
+    _result = _tangents[_idx] * (1.0 - _ratio) + _tangents[_idx + 1] * _ratio
+
+    return _positions, _coords, _normalize(_result)
+
+def get_frames(tangents):
+    """
+    Return the unit tangent, right normal and up vectors of the section
+    frames for an (N,3) array of path tangents.  The normal is level and
+    the up vector is orthogonal to the tangent, toward positive z.
+    """
+
+    _tangents = _normalize(numpy.asarray(tangents, dtype=float))
+
+    _normals = numpy.zeros(_tangents.shape)
+    _normals[:, 0] = _tangents[:, 1]
+    _normals[:, 1] = -_tangents[:, 0]
+
+    _normals = _normalize(_normals)
+
+    return _tangents, _normals, numpy.cross(_normals, _tangents)
+
+def triangulate_polygon(points):
+    """
+    Triangulate a simple, counter-clockwise 2D polygon by ear clipping.
+    Returns an (M-2,3) array of point indices.
+    """
+
+    _points = numpy.asarray(points, dtype=float)
+    _idx = list(range(len(_points)))
+
+    _result = []
+
+    def _is_ear(prev, cur, nxt, strict):
+        """
+        Test the vertex for a convex corner containing no other vertex
+        """
+
+        _a, _b, _c = _points[prev], _points[cur], _points[nxt]
+        _area = numpy.cross(_b - _a, _c - _b)
+
+        if _area < 0.0 or (strict and _area == 0.0):
+            return False
+
+        for _i in _idx:
+
+            if _i in (prev, cur, nxt):
+                continue
+
+            _p = _points[_i]
+
+            if numpy.cross(_b - _a, _p - _a) >= 0.0 \
+                and numpy.cross(_c - _b, _p - _b) >= 0.0 \
+                and numpy.cross(_a - _c, _p - _c) >= 0.0:
+
+                return False
+
+        return True
+
+    while len(_idx) > 3:
+
+        #collinear corners are clipped only if there is no other ear
+        for _strict in (True, False):
+
+            _ear = None
+
+            for _k in range(len(_idx)):
+
+                _prev, _cur = _idx[_k - 1], _idx[_k]
+                _nxt = _idx[(_k + 1) % len(_idx)]
+
+                if _is_ear(_prev, _cur, _nxt, _strict):
+                    _ear = _k
+                    break
+
+            if _ear is not None:
+                break
+
+        if _ear is None:
+            break
+
+        _result.append((_idx[_ear - 1], _idx[_ear],
+            _idx[(_ear + 1) % len(_idx)]))
+
+        del _idx[_ear]
+
+    if len(_idx) == 3:
+        _result.append(tuple(_idx))
+
+    return numpy.array(_result, dtype=int).reshape(-1, 3)
+
+def _normalize(vectors):
+    """
+    Return the (N,3) array of vectors scaled to unit length
+    """
+
+    return vectors / numpy.linalg.norm(vectors, axis=1)[:, None]
+
+class CorridorBuilder():
+    """
+    Build corridor meshes by placing the points of a section template at
+    each station along a path and stitching consecutive sections into
+    triangles.
+
+    Template points are (x, y) pairs, x to the right of the path and y
+    up.  The edges of a closed template are classified by their outward
+    normal into the top, datum (bottom) and left / right side surfaces.
+    Open templates form only a top surface.
+    """
+
+    def __init__(self, template, closed=True):
+        """
+        Constructor
+
+        template - list of (x, y) template coordinates, in order
+        closed - True if the last point connects back to the first
+        """
+
+        _template = numpy.asarray(template, dtype=float)[:, :2]
+
+        self.closed = closed and len(_template) > 2
+
+        #orient closed templates counter-clockwise
+        if self.closed:
+
+            _x, _y = _template[:, 0], _template[:, 1]
+            _area = numpy.dot(_x, numpy.roll(_y, -1)) \
+                - numpy.dot(numpy.roll(_x, -1), _y)
+
+            if _area < 0.0:
+                _template = _template[::-1]
+
+        self.template = _template
+        self.edges = self.classify()
+
+    def classify(self):
+        """
+        Return the template edges as (K,2) arrays of point indices,
+        keyed by surface name
+        """
+
+        _count = len(self.template)
+        _start = numpy.arange(_count if self.closed else _count - 1)
+        _edges = numpy.column_stack([_start, (_start + 1) % _count])
+
+        _result = {_k: numpy.empty((0, 2), dtype=int) for _k in SURFACES}
+
+        if not self.closed:
+            _result['Top'] = _edges
+            return _result
+
+        _delta = self.template[_edges[:, 1]] - self.template[_edges[:, 0]]
+
+        #outward normals of the counter-clockwise template
+        _nx, _ny = _delta[:, 1], -_delta[:, 0]
+
+        _is_side = numpy.abs(_nx) > numpy.abs(_ny)
+
+        _result['Top'] = _edges[~_is_side & (_ny > 0.0)]
+        _result['Datum'] = _edges[~_is_side & (_ny <= 0.0)]
+        _result['Left'] = _edges[_is_side & (_nx < 0.0)]
+        _result['Right'] = _edges[_is_side & (_nx > 0.0)]
+
+        return _result
+
+    def get_sections(self, points, tangents):
+        """
+        Return the (N,M,3) coordinates of the template placed at each of
+        the N path points, oriented by the path tangents
+        """
+
+        _, _normals, _ups = get_frames(tangents)
+
+        _points = numpy.asarray(points, dtype=float).reshape(-1, 3)
+
+        return _points[:, None, :] \
+            + self.template[None, :, 0, None] * _normals[:, None, :] \
+            + self.template[None, :, 1, None] * _ups[:, None, :]
+
+    @staticmethod
+    def stitch(count, width, edges):
+        """
+        Return the (K,3) triangles joining consecutive sections along the
+        template edges, as indices into the flattened (count * width)
+        section points.  Triangles face outward of a closed template.
+        """
+
+        _edges = numpy.asarray(edges, dtype=int).reshape(-1, 2)
+
+        if count < 2 or not len(_edges):
+            return numpy.empty((0, 3), dtype=int)
+
+        _base = (numpy.arange(count - 1) * width)[:, None]
+
+        _a0 = (_base + _edges[None, :, 0]).ravel()
+        _b0 = (_base + _edges[None, :, 1]).ravel()
+        _a1, _b1 = _a0 + width, _b0 + width
+
+        return numpy.concatenate([
+            numpy.column_stack([_a0, _b1, _b0]),
+            numpy.column_stack([_a0, _a1, _b1])
+        ])
+
+    def get_surfaces(self, sections):
+        """
+        Return the meshes of the corridor surfaces as (points, faces)
+        tuples keyed by surface name, omitting surfaces without edges.
+        Each surface holds only the template points it uses.
+        """
+
+        _sections = numpy.asarray(sections, dtype=float)
+
+        _result = {}
+
+        for _name in SURFACES:
+
+            _edges = self.edges[_name]
+
+            if not len(_edges):
+                continue
+
+            _used, _local = numpy.unique(_edges, return_inverse=True)
+
+            _points = _sections[:, _used, :].reshape(-1, 3)
+            _faces = self.stitch(
+                len(_sections), len(_used), _local.reshape(-1, 2))
+
+            _result[_name] = (_points, _faces)
+
+        return _result
+
+    def get_edges(self):
+        """
+        Return the indices of the template's left and right edge points,
+        the highest of the outermost points on either side
+        """
+
+        _x, _y = self.template[:, 0], self.template[:, 1]
+
+        return numpy.lexsort((-_y, _x))[0], numpy.lexsort((-_y, -_x))[0]
+
+    def get_daylight(self, sections, engine, counts=None):
+        """
+        Return the graded surfaces from the template edges to their catch
+        points on the daylight engine's surface, as (points, faces)
+        tuples keyed by surface name.  Sides without catch points are
+        omitted.
+
+        engine - daylight.Daylight, casting the cut / fill slope rays
+        counts - section counts of the chunks the sections were built
+                 in, see get_section_chunks().  Catch points are cast and
+                 cached by chunk, so only changed chunks are cast again.
+        """
+
+        _sections = numpy.asarray(sections, dtype=float)
+        _left, _right = self.get_edges()
+
+        if counts is None:
+            counts = [len(_sections)]
+
+        _starts = numpy.cumsum([0] + [_c - 1 for _c in counts[:-1]])
+        _key = get_daylight_key(engine)
+
+        #level direction from the left edge toward the right
+        _across = _sections[:, _right] - _sections[:, _left]
+        _across[:, 2] = 0.0
+        _across = _normalize(_across)
+
+        _result = {}
+
+        #the left edge is reversed, so both sides are graded
+        #counter-clockwise
+        for _name, _edge, _dir, _order in [
+            ('DaylightLeft', _left, -1.0, slice(None, None, -1)),
+            ('DaylightRight', _right, 1.0, slice(None))]:
+
+            _points = _sections[:, _edge]
+            _rays = _dir * _across
+
+            _catch = join_chunks([
+                cast_catch_points(engine, _key,
+                    _points[_s:_s + _c], _rays[_s:_s + _c])
+                for _s, _c in zip(_starts, counts)
+            ])
+
+            _graded, _faces = engine.get_graded_surface(
+                _points[_order], _catch[_order], closed=False)
+
+            if len(_faces):
+                _result[_name] = (_graded, _faces)
+
+        return _result
+
+    def get_mesh(self, sections):
+        """
+        Return the points and faces of the complete corridor mesh.
+        Closed templates are capped at both ends, so the mesh encloses
+        the corridor volume.
+        """
+
+        _sections = numpy.asarray(sections, dtype=float)
+        _count, _width = _sections.shape[:2]
+
+        _faces = [self.stitch(
+            _count, _width, numpy.concatenate(list(self.edges.values())))]
+
+        if self.closed:
+
+            _caps = triangulate_polygon(self.template)
+
+            _faces.append(_caps)
+            _faces.append(_caps[:, ::-1] + (_count - 1) * _width)
+
+        return _sections.reshape(-1, 3), numpy.concatenate(_faces)
+
+def get_boundary_ranks(points):
+    """
+    Return a pseudo random number in [0, 1) for each vertex, derived from
+    it's coordinates only
+    """
+
+    _grid = numpy.round(numpy.asarray(points, dtype=float) / _BOUNDARY_GRID)
+    _grid = _grid.astype(numpy.int64).view(numpy.uint64)
+
+    _hash = _grid[:, 0] * numpy.uint64(0x9E3779B97F4A7C15) \
+        ^ _grid[:, 1] * numpy.uint64(0xC2B2AE3D27D4EB4F) \
+        ^ _grid[:, 2] * numpy.uint64(0x165667B19E3779F9)
+
+    #mix the bits, so nearby vertices rank independently
+    _hash ^= _hash >> numpy.uint64(31)
+    _hash *= numpy.uint64(0xBF58476D1CE4E5B9)
+    _hash ^= _hash >> numpy.uint64(29)
+
+    return (_hash >> numpy.uint64(11)).astype(float) / 2.0**53
+
+def get_chunks(points, length=CHUNK_LENGTH):
+    """
+    Split the polyline vertices into chunks of about the given length.
+    Returns a list of (first, last) vertex indices, consecutive chunks
+    sharing their boundary vertex.
+
+    Chunks end at vertices picked by a hash of their coordinates, so a
+    boundary depends only on the geometry at it.  An edit, even one which
+    changes the length of the path, leaves the chunks past the next
+    picked boundary, and their cache keys, unchanged.  Chunks are kept
+    between a quarter and four times the length.
+    """
+
+    _points = numpy.asarray(points, dtype=float).reshape(-1, 3)
+    _last = len(_points) - 1
+
+    _lengths = numpy.linalg.norm(numpy.diff(_points, axis=0), axis=1)
+    _vertices = numpy.concatenate(([0.0], numpy.cumsum(_lengths)))
+
+    #chance of a vertex being picked, so that chunks average the length
+    #past the minimum
+    _chance = numpy.mean(_lengths) / (0.75 * length) if _last else 1.0
+
+    _picked = numpy.nonzero(get_boundary_ranks(_points) < _chance)[0]
+
+    _bounds = [0]
+
+    for _i in _picked.tolist() + [_last]:
+
+        #split long ranges without picked vertices at the length
+        while _vertices[_i] - _vertices[_bounds[-1]] > 4.0 * length:
+
+            _bounds.append(max(int(numpy.searchsorted(
+                _vertices, _vertices[_bounds[-1]] + length)),
+                _bounds[-1] + 1))
+
+        if _vertices[_i] - _vertices[_bounds[-1]] >= length / 4.0:
+            _bounds.append(_i)
+
+    #a short last range joins the previous chunk
+    if _bounds[-1] != _last:
+
+        if len(_bounds) > 1:
+            _bounds[-1] = _last
+
+        else:
+            _bounds.append(_last)
+
+    return list(zip(_bounds[:-1], _bounds[1:]))
+
+def get_chunk_key(template, closed, points, tangents, interval):
+    """
+    Hash of the inputs of a chunk
+    """
+
+    _digest = hashlib.sha1(repr((bool(closed), interval)).encode())
+
+    for _v in [template, points, tangents]:
+        _digest.update(numpy.round(_v, 6).tobytes())
+
+    return _digest.hexdigest()
+
+def get_surface_key(points, faces):
+    """
+    Hash of the points and faces of a surface
+    """
+
+    _digest = hashlib.sha1(numpy.round(points, 6).tobytes())
+    _digest.update(numpy.asarray(faces, dtype=numpy.int64).tobytes())
+
+    return _digest.hexdigest()
+
+def get_daylight_key(engine):
+    """
+    Hash of the surface and slopes of a daylight engine
+    """
+
+    _digest = hashlib.sha1(repr((engine.cut, engine.fill)).encode())
+    _digest.update(get_surface_key(
+        engine.index.points, engine.index.facets).encode())
+
+    return _digest.hexdigest()
+
+def cast_catch_points(engine, key, points, rays):
+    """
+    Return the catch points of the slope rays from the edge points,
+    cached by the daylight key and a hash of the points and rays
+    """
+
+    _digest = hashlib.sha1(key.encode())
+
+    for _v in [points, rays]:
+        _digest.update(numpy.round(_v, 6).tobytes())
+
+    _key = _digest.hexdigest()
+
+    if _key not in _CACHE:
+        _CACHE.set(_key, engine.get_catch_points(points, rays)[0])
+
+    return _CACHE.get(_key)
+
+def build_sections(template, closed, points, tangents, interval):
+    """
+    Return the sections of a chunk, see CorridorBuilder.get_sections()
+    """
+
+    _, _coords, _tangents = get_path(points, interval, tangents)
+
+    return CorridorBuilder(template, closed).get_sections(_coords, _tangents)
+
+def build_corridor(builder, points, interval=None, length=CHUNK_LENGTH):
+    """
+    Return the sections of the corridor along the 3D polyline, built in
+    chunks of about the given length
+    """
+
+    return join_chunks(get_section_chunks(builder, points, interval, length))
+
+def join_chunks(chunks):
+    """
+    Return the arrays of consecutive chunks joined, dropping the first
+    row of each chunk after the first, which repeats the boundary
+    """
+
+    return numpy.concatenate([chunks[0]] + [_c[1:] for _c in chunks[1:]])
+
+def get_section_chunks(builder, points, interval=None, length=CHUNK_LENGTH):
+    """
+    Return the list of section arrays of the corridor chunks along the 3D
+    polyline.  Consecutive chunks share their boundary section.
+
+    Chunks are cached by a hash of the template, their part of the path
+    and the interval, so only chunks whose inputs changed are rebuilt.
+    """
+
+    _points, _tangents = get_vertices(points)
+    _template = builder.template
+
+    _chunks = []
+
+    for _first, _last in get_chunks(_points, length):
+
+        _args = (_template, builder.closed, _points[_first:_last + 1],
+            _tangents[_first:_last + 1], interval)
+
+        _chunks.append((get_chunk_key(*_args), _args))
+
+    _result = []
+
+    for _key, _args in _chunks:
+
+        if _key not in _CACHE:
+            _CACHE.set(_key, build_sections(*_args))
+
+        _result.append(_CACHE.get(_key))
+
+    return _result
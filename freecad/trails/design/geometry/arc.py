@@ -31,7 +31,7 @@ from FreeCAD import Vector, Console
 from freecad_python_support.const import Const
 
 from ..project.support import units, utils
-from . import support
+from . import support, kernel
 from ..project.support.utils import Constants as C
 
 
@@ -167,6 +167,144 @@ class Arc():
         for _k, _v in values.items():
             self.set(_k, _v)
 
+    def _get_frame(self):
+        """
+        Return the unit tangent vectors in / out and the half-delta of the
+        arc for closed-form updates, or None if they are undefined
+        """
+
+        if not self.pi or not self.delta:
+            return None
+
+        if math.isnan(self.bearing_in) or math.isnan(self.bearing_out):
+            return None
+
+        #the curve must deflect, but not reverse
+        if not C.TOLERANCE < self.delta < math.pi - C.TOLERANCE:
+            return None
+
+        _in = (math.sin(self.bearing_in), math.cos(self.bearing_in))
+        _out = (math.sin(self.bearing_out), math.cos(self.bearing_out))
+
+        return _in, _out, self.delta / 2.0
+
+    def _set_radius(self, radius, frame):
+        """
+        Set the radius, calculating the dependent lengths and the
+        coordinates from the PI and bearings
+        """
+
+        _in, _out, _half = frame
+
+        _cos = math.cos(_half)
+        _tangent = radius * math.tan(_half)
+
+        self.radius = radius
+        self.tangent = _tangent
+        self.length = radius * self.delta
+        self.chord = 2.0 * radius * math.sin(_half)
+        self.middle = radius / _cos
+        self.middle_ordinate = radius * (1.0 - _cos)
+        self.external = radius * (1.0 / _cos - 1.0)
+
+        _pi = tuple(self.pi)
+
+        #the center lies on the bisector of the tangents
+        _bisector = (_out[0] - _in[0], _out[1] - _in[1])
+        _scale = self.middle / math.hypot(*_bisector)
+
+        self.start = (_pi[0] - _in[0] * _tangent,
+            _pi[1] - _in[1] * _tangent, _pi[2])
+
+        self.end = (_pi[0] + _out[0] * _tangent,
+            _pi[1] + _out[1] * _tangent, _pi[2])
+
+        self.center = (_pi[0] + _bisector[0] * _scale,
+            _pi[1] + _bisector[1] * _scale, _pi[2])
+
+    def update_parameter(self, key, value):
+        """
+        Update one parameter of a fully-described arc, recalculating the
+        dependent parameters in closed form with the bearings held fixed.
+
+        key - 'Radius', 'Tangent', 'PI', 'Start', 'End' or 'Center'
+              (or the attribute name)
+
+        Start / end points change the tangent length, the center changes
+        the radius.  Falls back to get_parameters() if the arc is not
+        fully described or the value is inconsistent with the bearings.
+        """
+
+        key = self._key_pairs.get(key, key)
+        frame = self._get_frame()
+
+        _radius = None
+
+        if frame and value is not None:
+
+            _in, _out, _half = frame
+            _pi = tuple(self.pi)
+
+            if key == 'radius':
+                _radius = value
+
+            elif key == 'tangent':
+                _radius = value / math.tan(_half)
+
+            elif key == 'pi':
+
+                _delta = [_v - _w for _v, _w in zip(tuple(value), _pi)]
+                self.pi = tuple(value)
+
+                for _k in ('start', 'end', 'center'):
+                    setattr(self, _k, tuple(
+                        _v + _d for _v, _d in zip(getattr(self, _k), _delta)))
+
+                return self
+
+            elif key in ('start', 'end', 'center'):
+
+                _axis = {
+                    'start': (-_in[0], -_in[1]),
+                    'end': _out,
+                    'center': (_out[0] - _in[0], _out[1] - _in[1])
+                }[key]
+
+                _scale = math.hypot(*_axis)
+                _axis = (_axis[0] / _scale, _axis[1] / _scale)
+
+                _vec = (value[0] - _pi[0], value[1] - _pi[1])
+                _dist = _vec[0] * _axis[0] + _vec[1] * _axis[1]
+
+                #the point must lie on it's axis through the PI
+                _offset = _vec[0] * _axis[1] - _vec[1] * _axis[0]
+
+                if abs(_offset) <= C.TOLERANCE:
+
+                    if key == 'center':
+                        _radius = _dist * math.cos(_half)
+
+                    else:
+                        _radius = _dist / math.tan(_half)
+
+        if _radius is not None and _radius > 0.0:
+
+            self._set_radius(_radius, frame)
+            return self
+
+        #solve the arc from the new value, the PI and the bearings
+        _arc = Arc(self)
+        _arc.set(key, value)
+
+        #a moved PI keeps the radius
+        for _k in ('radius', 'tangent', 'start', 'end', 'center'):
+            if _k != key and not (key == 'pi' and _k == 'radius'):
+                setattr(_arc, _k, None)
+
+        self.update(get_parameters(_arc))
+
+        return self
+
 def _create_geo_func():
 
     _fn = []
@@ -566,8 +704,7 @@ def get_missing_parameters(arc, new_arc, points):
         return None
 
     if not new_arc.middle:
-        new_arc.middle = \
-            new_arc.radius * (_cos_half_delta + (1/_cos_half_delta))
+        new_arc.middle = new_arc.radius / _cos_half_delta
 
     #pre-calculate values and fill in remaining parameters
     #radius = new_arc.get('Radius')
@@ -577,7 +714,7 @@ def get_missing_parameters(arc, new_arc, points):
         new_arc.length = new_arc.radius * new_arc.delta
 
     if not new_arc.external:
-        new_arc.external = new_arc.radius * (1.0 / (_cos_half_delta - 1.0))
+        new_arc.external = new_arc.radius * (1.0 / _cos_half_delta - 1.0)
 
     if not new_arc.middle_ordinate:
         new_arc.middle_ordinate = new_arc.radius * (1.0 - _cos_half_delta)
@@ -839,6 +976,64 @@ def get_tangent_vector(arc_dict, distance):
 
     return coord, ortho
 
+def get_element(arc_dict):
+    """
+    Return the kernel element of an arc dictionary
+    """
+
+    _curvature = arc_dict.get('Direction') / arc_dict.get('Radius')
+
+    return kernel.Arc(
+        arc_dict.get('Start'), arc_dict.get('BearingIn'),
+        arc_dict.get('Length') or 0.0, _curvature
+    )
+
+def get_tangent_vectors(arc_dict, distances):
+    """
+    Given an arc and an array of distances from it's start, return the
+    coordinates and directed tangent vectors along the curve as (N,3) arrays
+    """
+
+    return get_element(arc_dict).get_tangent_vectors(distances)
+
+def get_curvatures(arc_dict, distances):
+    """
+    Return the rate of change of bearing at an array of distances along
+    the arc, positive for clockwise curves
+    """
+
+    return get_element(arc_dict).get_curvatures(distances)
+
+def get_distances(arc_dict, size=10.0, method='Segment'):
+    """
+    Return the array of distances along the arc at which it is discretized,
+    including the start and end
+
+    method     (Method of discretization)
+        'Segment'   - subdivide into size equal segments (default)
+        'Interval'  - subdivide into segments of size length
+        'Tolerance' - limit the chord error (sagitta) to size
+    """
+
+    _length = arc_dict.get('Length')
+    _radius = arc_dict.get('Radius')
+
+    _count = size
+
+    if method == 'Interval':
+        _count = _length / (size * units.scale_factor())
+
+    elif method == 'Tolerance':
+
+        _ratio = min((size * units.scale_factor()) / _radius, 1.0)
+
+        #central angle of the chord with the given sagitta
+        _count = _length / (_radius * 2.0 * math.acos(1.0 - _ratio))
+
+    _count = max(1, int(math.ceil(_count - 1e-9)))
+
+    return numpy.linspace(0.0, _length, _count + 1)
+
 def get_segments(bearing, deltas, direction, start, radius, _dtype=Vector):
     """
     Calculate the coordinates of the curve segments
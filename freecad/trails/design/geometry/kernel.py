@@ -0,0 +1,465 @@
+# -*- coding: utf-8 -*-
+#***********************************************************************
+#*                                                                     *
+#* Copyright (c) 2021 Joel Graff <monograff76@gmail.com>               *
+#*                                                                     *
+#* This program is free software; you can redistribute it and/or modify*
+#* it under the terms of the GNU Lesser General Public License (LGPL)  *
+#* as published by the Free Software Foundation; either version 2 of   *
+#* the License, or (at your option) any later version.                 *
+#* for detail see the LICENCE text file.                               *
+#*                                                                     *
+#* This program is distributed in the hope that it will be useful,     *
+#* but WITHOUT ANY WARRANTY; without even the implied warranty of      *
+#* MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the       *
+#* GNU Library General Public License for more details.                *
+#*                                                                     *
+#* You should have received a copy of the GNU Library General Public   *
+#* License along with this program; if not, write to the Free Software *
+#* Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307*
+#* USA                                                                 *
+#*                                                                     *
+#***********************************************************************
+"""
+Array-based geometry kernel for lines, arcs and spirals.
+
+Depends only on NumPy / SciPy.  Elements are planar, with bearings
+measured clockwise from north (the tangent at bearing b is
+(sin b, cos b)) and curvatures positive for clockwise curves.
+Coordinates are (N,3) arrays, the z coordinate is carried from the
+element start.
+"""
+
+import math
+
+import numpy
+
+from scipy import special
+
+__title__ = 'kernel.py'
+__author__ = 'Joel Graff'
+__url__ = "https://www.freecadweb.org"
+
+#tolerance for differences in measurements (mm)
+_TOLERANCE = 0.0001
+
+def get_clothoid(start_curvature, end_curvature, length, distances):
+    """
+    Evaluate a clothoid whose curvature increases linearly from the start
+    to the end curvature over the length, using Fresnel integrals.
+
+    Returns arrays of the distance along the starting tangent, the offset
+    from it toward the side of the curve and the change in direction at
+    each distance from the start
+    """
+
+    _dist = numpy.asarray(distances, dtype=float)
+    _rate = (end_curvature - start_curvature) / length
+
+    #constant curvature
+    if abs(_rate) * length**2 < 1e-12:
+
+        if not start_curvature:
+            return _dist, numpy.zeros(len(_dist)), numpy.zeros(len(_dist))
+
+        _theta = start_curvature * _dist
+
+        return numpy.sin(_theta) / start_curvature, \
+            (1.0 - numpy.cos(_theta)) / start_curvature, _theta
+
+    #distances along the full clothoid from it's point of zero curvature,
+    #scaled to the Fresnel integral parameter
+    _scale = math.sqrt(math.pi / _rate)
+    _t0 = start_curvature / _rate
+
+    _s, _c = special.fresnel(
+        numpy.concatenate(([_t0], _t0 + _dist)) / _scale)
+
+    _dx = (_c[1:] - _c[0]) * _scale
+    _dy = (_s[1:] - _s[0]) * _scale
+
+    #rotate into the frame of the starting tangent
+    _theta0 = _rate * _t0**2 / 2.0
+    _cos, _sin = math.cos(_theta0), math.sin(_theta0)
+
+    _theta = _rate * (_t0 + _dist)**2 / 2.0 - _theta0
+
+    return _dx * _cos + _dy * _sin, _dy * _cos - _dx * _sin, _theta
+
+def project_points(evaluate, coords, positions, iterations=10, step=None):
+    """
+    Refine the projection of an array of points onto a curve by Newton
+    iteration on the curve parameter.
+
+    evaluate - function returning the coordinates, tangent vectors and
+               curvatures (rate of change of bearing, clockwise positive)
+               for an array of positions along the curve
+    coords - (N,3) array of points to project
+    positions - initial position estimates
+    step - optional limit to the length of a single iteration step
+
+    Returns the refined positions and the offsets of the points,
+    positive to the left of the curve
+    """
+
+    _coords = numpy.asarray(coords, dtype=float).reshape(-1, 3)
+    _pos = numpy.array(positions, dtype=float)
+
+    for _i in range(iterations):
+
+        _pts, _tans, _curves = evaluate(_pos)
+        _delta = _coords - _pts
+
+        #distance along the tangent and toward the right orthogonal
+        _along = _delta[:, 0]*_tans[:, 0] + _delta[:, 1]*_tans[:, 1]
+        _right = _delta[:, 0]*_tans[:, 1] - _delta[:, 1]*_tans[:, 0]
+
+        _denom = 1.0 - _curves * _right
+
+        #near the center of curvature, fall back to a tangent step
+        _denom[numpy.abs(_denom) < 0.1] = 1.0
+
+        _step = _along / _denom
+
+        if step:
+            _step = numpy.clip(_step, -step, step)
+
+        _pos += _step
+
+        if numpy.all(numpy.abs(_step) < _TOLERANCE):
+            break
+
+    _pts, _tans, _curves = evaluate(_pos)
+    _delta = _coords - _pts
+
+    return _pos, _delta[:, 1]*_tans[:, 0] - _delta[:, 0]*_tans[:, 1]
+
+class Element:
+    """
+    Planar element of linearly varying curvature
+    """
+
+    __slots__ = ('start', 'bearing', 'length', 'curvatures')
+
+    def __init__(self, start, bearing, length, curvatures=(0.0, 0.0)):
+        """
+        Constructor
+
+        start - starting coordinate
+        bearing - starting bearing, in radians
+        length - element length
+        curvatures - curvatures at the start and end, clockwise positive
+        """
+
+        self.start = numpy.array(tuple(start), dtype=float)
+        self.bearing = float(bearing)
+        self.length = float(length)
+        self.curvatures = (float(curvatures[0]), float(curvatures[1]))
+
+    def get_curvatures(self, distances):
+        """
+        Return the curvatures at an array of distances from the start
+        """
+
+        _dist = numpy.asarray(distances, dtype=float)
+        _k0, _k1 = self.curvatures
+
+        if not self.length:
+            return numpy.full(_dist.shape, _k0)
+
+        return _k0 + (_k1 - _k0) * _dist / self.length
+
+    def get_bearings(self, distances):
+        """
+        Return the bearings at an array of distances from the start
+        """
+
+        _dist = numpy.asarray(distances, dtype=float)
+        _k0, _k1 = self.curvatures
+
+        _rate = (_k1 - _k0) / self.length if self.length else 0.0
+
+        return self.bearing + _k0 * _dist + _rate * _dist**2 / 2.0
+
+    def get_local(self, distances):
+        """
+        Return the distances along the starting tangent and the offsets to
+        it's right for an array of distances from the start
+        """
+
+        _dist = numpy.asarray(distances, dtype=float)
+
+        return _dist, numpy.zeros(_dist.shape)
+
+    def get_points(self, distances):
+        """
+        Return the (N,3) coordinates at an array of distances from the
+        start
+        """
+
+        _along, _right = self.get_local(distances)
+
+        _sin, _cos = math.sin(self.bearing), math.cos(self.bearing)
+
+        _result = numpy.empty((len(_along), 3))
+
+        _result[:, 0] = self.start[0] + _along * _sin + _right * _cos
+        _result[:, 1] = self.start[1] + _along * _cos - _right * _sin
+        _result[:, 2] = self.start[2]
+
+        return _result
+
+    def get_tangents(self, distances):
+        """
+        Return the (N,3) unit tangent vectors at an array of distances
+        from the start
+        """
+
+        _bearings = self.get_bearings(distances)
+
+        _result = numpy.zeros((len(_bearings), 3))
+        _result[:, 0] = numpy.sin(_bearings)
+        _result[:, 1] = numpy.cos(_bearings)
+
+        return _result
+
+    def get_normals(self, distances, side='Left'):
+        """
+        Return the (N,3) unit vectors orthogonal to the element at an
+        array of distances from the start, toward the specified side
+        """
+
+        _tangents = self.get_tangents(distances)
+        _dir = -1.0 if side.lower() in ['r', 'rt', 'right'] else 1.0
+
+        _result = numpy.zeros(_tangents.shape)
+        _result[:, 0] = -_tangents[:, 1] * _dir
+        _result[:, 1] = _tangents[:, 0] * _dir
+
+        return _result
+
+    def get_tangent_vectors(self, distances):
+        """
+        Return the coordinates and unit tangent vectors at an array of
+        distances from the start as (N,3) arrays
+        """
+
+        return self.get_points(distances), self.get_tangents(distances)
+
+    def get_end(self):
+        """
+        Return the coordinate and bearing at the end of the element
+        """
+
+        return self.get_points([self.length])[0], \
+            float(self.get_bearings([self.length])[0])
+
+    def evaluate(self, distances):
+        """
+        Return the coordinates, tangents and curvatures at an array of
+        distances from the start
+        """
+
+        _points, _tangents = self.get_tangent_vectors(distances)
+
+        return _points, _tangents, self.get_curvatures(distances)
+
+    def project(self, coords, seeds=5):
+        """
+        Project an array of coordinates onto the element.
+
+        Returns the distances from the start, the offsets (positive
+        left) and a bounding array of -1 / 0 / 1 for coordinates which
+        project before, onto or after the element
+        """
+
+        _coords = numpy.asarray(coords, dtype=float).reshape(-1, 3)
+
+        #start from the nearest of the evenly-spaced seed points
+        _seeds = numpy.linspace(0.0, self.length, seeds)
+        _points = self.get_points(_seeds)
+
+        _nearest = numpy.argmin(numpy.linalg.norm(
+            _coords[:, None, :2] - _points[None, :, :2], axis=2), axis=1)
+
+        _step = self.length / max(seeds - 1, 1) or None
+
+        _pos, _offsets = project_points(
+            self.evaluate, _coords, _seeds[_nearest], step=_step)
+
+        _bounds = numpy.zeros(len(_pos), dtype=int)
+        _bounds[_pos < -_TOLERANCE] = -1
+        _bounds[_pos > self.length + _TOLERANCE] = 1
+
+        return _pos, _offsets, _bounds
+
+class Line(Element):
+    """
+    Straight element
+    """
+
+    __slots__ = ()
+
+    def __init__(self, start, bearing, length):
+        """
+        Constructor
+        """
+
+        super().__init__(start, bearing, length)
+
+    def project(self, coords, seeds=2):
+        """
+        Project an array of coordinates onto the line, see
+        Element.project()
+        """
+
+        _coords = numpy.asarray(coords, dtype=float).reshape(-1, 3)
+        _delta = _coords[:, :2] - self.start[:2]
+
+        _sin, _cos = math.sin(self.bearing), math.cos(self.bearing)
+
+        _pos = _delta[:, 0] * _sin + _delta[:, 1] * _cos
+        _offsets = _delta[:, 1] * _sin - _delta[:, 0] * _cos
+
+        _bounds = numpy.zeros(len(_pos), dtype=int)
+        _bounds[_pos < -_TOLERANCE] = -1
+        _bounds[_pos > self.length + _TOLERANCE] = 1
+
+        return _pos, _offsets, _bounds
+
+class Arc(Element):
+    """
+    Circular element
+    """
+
+    __slots__ = ()
+
+    def __init__(self, start, bearing, length, curvature):
+        """
+        Constructor
+
+        curvature - 1 / radius, positive for clockwise arcs
+        """
+
+        super().__init__(start, bearing, length, (curvature, curvature))
+
+    def get_local(self, distances):
+        """
+        Return the local coordinates of the arc, see Element.get_local()
+        """
+
+        _dist = numpy.asarray(distances, dtype=float)
+        _k = self.curvatures[0]
+
+        _theta = _k * _dist
+
+        return numpy.sin(_theta) / _k, (1.0 - numpy.cos(_theta)) / _k
+
+    def get_center(self):
+        """
+        Return the center coordinate of the arc
+        """
+
+        _radius = 1.0 / self.curvatures[0]
+
+        return self.start + _radius * numpy.array(
+            [math.cos(self.bearing), -math.sin(self.bearing), 0.0])
+
+    def project(self, coords, seeds=2):
+        """
+        Project an array of coordinates onto the arc, see
+        Element.project()
+        """
+
+        _coords = numpy.asarray(coords, dtype=float).reshape(-1, 3)
+
+        _k = self.curvatures[0]
+        _dir = math.copysign(1.0, _k)
+        _radius = abs(1.0 / _k)
+
+        _center = self.get_center()
+        _delta = _coords[:, :2] - _center[:2]
+        _start = self.start[:2] - _center[:2]
+
+        #swept angle from the start radius in the direction of the arc
+        _angles = numpy.arctan2(_delta[:, 0], _delta[:, 1]) \
+            - math.atan2(_start[0], _start[1])
+
+        _angles = numpy.mod(_angles * _dir, 2.0 * math.pi)
+
+        #angles past the end are measured back from the start, if closer
+        _sweep = self.length / _radius
+        _back = _angles - 2.0 * math.pi
+
+        _angles = numpy.where(
+            (_angles > _sweep) & (_angles - _sweep > -_back), _back, _angles)
+
+        _pos = _angles * _radius
+
+        _offsets = (numpy.linalg.norm(_delta, axis=1) - _radius) * _dir
+
+        _bounds = numpy.zeros(len(_pos), dtype=int)
+        _bounds[_pos < -_TOLERANCE] = -1
+        _bounds[_pos > self.length + _TOLERANCE] = 1
+
+        return _pos, _offsets, _bounds
+
+class Spiral(Element):
+    """
+    Clothoid element, with linearly varying curvature of one sign
+    """
+
+    __slots__ = ()
+
+    def get_local(self, distances):
+        """
+        Return the local coordinates of the spiral, see
+        Element.get_local()
+        """
+
+        _dist = numpy.asarray(distances, dtype=float)
+        _k0, _k1 = self.curvatures
+
+        _dir = math.copysign(1.0, _k0 + _k1)
+        _k0, _k1 = abs(_k0), abs(_k1)
+
+        if _k0 <= _k1:
+
+            _along, _right, _theta = \
+                get_clothoid(_k0, _k1, self.length, _dist)
+
+            return _along, _dir * _right
+
+        #decreasing curvature is evaluated as the reverse of the
+        #increasing spiral, mapped back onto the start
+        _along, _right, _theta = get_clothoid(
+            _k1, _k0, self.length,
+            numpy.concatenate(([self.length], self.length - _dist)))
+
+        _along = _along[1:] - _along[0]
+        _right = _right[1:] - _right[0]
+
+        #the reverse runs opposite to the starting tangent at the start
+        _cos, _sin = math.cos(_theta[0]), math.sin(_theta[0])
+
+        return -(_along * _cos + _right * _sin), \
+            _dir * (_right * _cos - _along * _sin)
+
+    @classmethod
+    def from_end(cls, end, bearing, length, curvatures):
+        """
+        Create the spiral which ends at the coordinate and bearing
+        """
+
+        _spiral = cls((0.0, 0.0, 0.0), 0.0, length, curvatures)
+
+        _bearing = _spiral.get_end()[1]
+
+        _spiral.bearing = bearing - _bearing
+
+        _spiral.start = numpy.array(tuple(end), dtype=float) \
+            - _spiral.get_points([length])[0]
+
+        _spiral.start[2] = end[2]
+
+        return _spiral
@@ -26,9 +26,10 @@ Line generation tools
 """
 
 import math
+import numpy
 
 from FreeCAD import Vector, Console
-from . import support
+from . import support, kernel
 
 from freecad_python_support.tuple_math import TupleMath
 
@@ -223,6 +224,42 @@ def get_tangent_vector(line, distance):
 
     return _coord, _slope
 
+def get_element(line):
+    """
+    Return the kernel element of a line dictionary
+    """
+
+    _bearing = line.get('BearingIn')
+
+    if _bearing is None:
+        _bearing = line.get('BearingOut')
+
+    return kernel.Line(line.get('Start'), _bearing, line.get('Length') or 0.0)
+
+def get_tangent_vectors(line, distances):
+    """
+    Return the coordinates and directed tangent vectors at an array of
+    distances along the line as (N,3) arrays
+    """
+
+    return get_element(line).get_tangent_vectors(distances)
+
+def get_distances(line, size=10.0, method='Segment'):
+    """
+    Return the distances along the line at which it is discretized,
+    which are it's endpoints
+    """
+
+    return numpy.array([0.0, line.get('Length')])
+
+def get_curvatures(line, distances):
+    """
+    Return the rate of change of bearing at an array of distances along
+    the line, which is always zero
+    """
+
+    return get_element(line).get_curvatures(distances)
+
 def get_ortho_vector(line, distance, side=''):
     """
     Return the orthogonal vector pointing toward the indicated side at the
@@ -32,7 +32,7 @@ from FreeCAD import Vector
 from ..project.support import units
 from ..project.support.utils import Constants as C
 from ..project.support.const import Const
-from . import support
+from . import support, kernel
 
 class SpiralConst(Const):
     """
@@ -376,71 +376,34 @@ def get_parameters(spiral_dict):
 def get_segments(spiral, deltas, _dtype=Vector):
     """
     Calculate the coordinates of the curve segments
-    bearing - beginning bearing
-    deltas - list of angles to calculate
-    direction - curve direction: -1.0 = ccw, 1.0 = cw
-    start - starting coordinate
-    radius - arc radius
+    spiral - the spiral dictionary
+    deltas - list of angles from the point of infinite radius to calculate
+
+    Coordinates are returned in order of increasing distance along the
+    spiral
     """
 
-    _vec = None
-    _draw_start = spiral['Start']
-    _draw_end = spiral['End']
     _length = spiral['Length']
     _radius = spiral['Radius']
-    _direction = spiral['Direction']
-
-    #reverse only if end radius is infinite / undefined
-    _reverse = spiral.get('EndRadius') is None
-
-    if not _reverse:
-        _reverse = spiral['EndRadius'] == math.inf
-
-    #if short tangent leads, we need to calculate from the other end
-    #toward the start of the spiral
-    if _reverse:
-        _draw_start, _draw_end = _draw_end, _draw_start
-        _direction *= -1
-
-    _vec = spiral['PI'].sub(_draw_start).normalize()
-
-    _points = []
-
-    _six_rad_len = 6.0 * _radius * _length
-    _two_rad_len_root = math.sqrt(2.0 * _radius * _length)
-    _forty_rad2_len2 = 40.0 * _radius**2 * _length**2
-    _root_deltas = [math.sqrt(_v) for _v in deltas]
-
-    for _i, _delta in enumerate(deltas):
 
-        #calculate length of curve at the current delta
-        _seg_len = _two_rad_len_root * _root_deltas[_i]
+    #distance from the point of infinite radius at each angle
+    _distances = numpy.sqrt(
+        2.0 * _radius * _length * numpy.asarray(deltas, dtype=float))
 
-        #calculate positions along curve at delta offset
-        _x = _seg_len**3 / _six_rad_len
+    _k_start, _k_end = get_curvature_limits(spiral)
 
-        _y = _seg_len - ((_seg_len**5) / _forty_rad2_len2)
+    if _k_end < _k_start:
+        _distances = (_length - _distances)[::-1]
 
-        #calculate vector coordinates
-        _dy = Vector(_vec).multiply(_y)
-        _dx = Vector(_vec.y, -_vec.x, 0.0).multiply(_direction).multiply(_x)
+    _coords = get_tangent_vectors(spiral, _distances)[0]
 
-        _points.append(_dtype(_dy.add(_dx)))
-
-    _delta = _draw_end.sub(_points[-1])
-
-    if _reverse:
-        _points = _points[::-1]
-
-    _points = [_v.add(_draw_start) for _v in _points]
-
-    return _points
+    return [_dtype(tuple(_v)) for _v in _coords.tolist()]
 
 def get_points(
         spiral, size=10.0, method='Segment', interval=None, _dtype=Vector):
     """
     Discretize a spiral into the specified segments. Resulting list of
-    coordinates omits provided starting point and concludes with end point
+    coordinates begins with the starting point and concludes with end point
 
     spiral    - A dictionary containing key elements:
         Direction   - non-zero.  <0 = ccw, >0 = cw
@@ -456,58 +419,96 @@ def get_points(
         'Interval'  - subdivide into fixed length segments
         'Tolerance' - limit error between segment and curve
 
-    interval    - Start and distance along arc to discretize
-    layer       - the z coordinate to apply to all points
-
-    Points are returned references to start_coord
+    interval    - Start and distance along spiral to discretize
     """
 
-    angle = spiral['Theta']
-    radius = spiral['Radius']
+    _distances = get_distances(spiral, size, method)
 
-    if not interval:
-        interval = [0.0, 0.0]
+    if interval:
 
-    _delta_angle = interval[0] / radius
+        _start = interval[0]
+        _end = spiral['Length']
 
-    #get the start coordinate at the actual starting point on the curve
-    ### CURRENTLY DISABLED ###
-    #if interval[0] > 0.0:
+        if interval[1] > 0.0:
+            _end = min(_end, _start + interval[1])
 
-        #start = get_segments(spiral, [_delta_angle])[1]
+        _distances = numpy.concatenate((
+            [_start],
+            _distances[(_distances > _start) & (_distances < _end)],
+            [_end]
+        ))
 
-    #if the distance is specified, calculate the central angle from that
-    #otherwise, the new central angle is the old central angle less the delta
-    if interval[1] > 0.0:
-        angle = interval[1] / radius
+    _coords = get_tangent_vectors(spiral, _distances)[0]
 
-    else:
-        angle -= _delta_angle
+    return [_dtype(tuple(_v)) for _v in _coords.tolist()]
+
+def get_distances(spiral, size=10.0, method='Segment'):
+    """
+    Return the array of distances along the spiral at which it is
+    discretized, including the start and end
+
+    method     (Method of discretization)
+        'Segment'   - subdivide into size segments of equal angle (default)
+        'Interval'  - subdivide into segments of size length
+        'Tolerance' - limit the chord error to size, spacing the points
+                      by the curvature
+    """
 
-    #define the incremental angle for segment calculations,
-    #defaulting to 'Segment'
-    _delta = angle / size
-    _ratio = (size * units.scale_factor()) / radius
+    _length = spiral['Length']
+    _k_start, _k_end = get_curvature_limits(spiral)
+
+    #distances are calculated from the end of lesser curvature
+    _k0, _k1 = sorted((_k_start, _k_end))
+    _rate = max((_k1 - _k0) / _length, 1e-15)
 
     if method == 'Interval':
-        _delta = _ratio
+
+        _count = _length / (size * units.scale_factor())
+        _count = max(1, int(math.ceil(_count - 1e-9)))
+
+        _distances = numpy.linspace(0.0, _length, _count + 1)
 
     elif method == 'Tolerance':
-        _delta = 2.0 * math.acos(1 - _ratio)
 
-    #pre-calculate the segment deltas,
-    #increasing from zero to the central angle
-    if _delta == 0.0:
-        return None, None
+        #chord error ~ curvature * spacing^2 / 8, so with the curvature
+        #increasing linearly, equal error is reached at equal increments
+        #of the curvature to the 3/2 power
+        _tolerance = size * units.scale_factor()
+        _powers = (_k0**1.5, _k1**1.5)
 
-    segment_deltas = [float(_i) * _delta\
-        for _i in range(0, int(angle / _delta) + 1)
-    ]
+        _count = (2.0 / (3.0 * _rate)) * (_powers[1] - _powers[0]) \
+            / math.sqrt(8.0 * _tolerance)
+
+        for _i in range(2):
+
+            _count = max(1, int(math.ceil(_count - 1e-9)))
+
+            _distances = (numpy.linspace(_powers[0], _powers[1], _count + 1)
+                **(2.0 / 3.0) - _k0) / _rate
+
+            #error of each chord at it's sharper end
+            _error = (_k0 + _rate * _distances[1:]) \
+                * numpy.diff(_distances)**2 / 8.0
+
+            if _error.max() <= _tolerance:
+                break
+
+            _count *= math.sqrt(_error.max() / _tolerance)
 
-    if segment_deltas[-1] < angle:
-        segment_deltas.append(angle)
+    else:
+
+        #equal increments of the deflection angle
+        _theta = numpy.linspace(
+            0.0, (_k0 + _k1) * _length / 2.0, max(1, int(size)) + 1)
+
+        _distances = (numpy.sqrt(_k0**2 + 2.0 * _rate * _theta) - _k0) / _rate
+
+    _distances[-1] = _length
 
-    return get_segments(spiral, segment_deltas, _dtype)
+    if _k_end < _k_start:
+        _distances = (_length - _distances)[::-1]
+
+    return _distances
 
 def get_ordered_tangents(curve):
     """
@@ -542,40 +543,90 @@ def get_tangent_vector(spiral, distance):
     Calculate the vector tangent to the spiral for the given distance
     """
 
-    #tangent starting angle
-    _tan_start = spiral['BearingIn']
-    _dist_squared = distance**2
+    _coords, _tangents = get_tangent_vectors(spiral, [distance])
 
-    #spiral direction
-    _dir = spiral['Direction']
+    return Vector(tuple(_coords[0])), Vector(tuple(_tangents[0]))
+
+def get_curvature_limits(spiral):
+    """
+    Return the curvatures at the start and end of the spiral.
+    Infinite or undefined radii have zero curvature.
+    """
+
+    _curvatures = []
+
+    for _key in ['StartRadius', 'EndRadius']:
+
+        _radius = spiral.get(_key)
+
+        if not _radius or _radius == math.inf:
+            _curvatures.append(0.0)
+
+        else:
+            _curvatures.append(1.0 / _radius)
+
+    #without radii, the spiral leads from the long tangent unless
+    #the end radius is undefined
+    if not any(_curvatures):
 
-    if spiral['EndRadius'] > spiral['StartRadius']:
-        _dist_squared = (spiral['Length'] -  distance)**2
-        _tan_start = spiral['BearingOut']
-        _dir *= -1.0
+        if spiral.get('EndRadius') is None:
+            _curvatures[0] = 1.0 / spiral['Radius']
 
+        else:
+            _curvatures[1] = 1.0 / spiral['Radius']
 
-    _delta = \
-        _dist_squared / (2.0*spiral['Radius']*spiral['Length'])
+    return _curvatures[0], _curvatures[1]
 
-    _delta_bearing = _tan_start + (_delta*_dir)
+def get_element(spiral):
+    """
+    Return the kernel element of a spiral dictionary.  Spirals of
+    decreasing curvature are anchored at their end.
+    """
+
+    _k_start, _k_end = get_curvature_limits(spiral)
+    _dir = spiral['Direction']
 
-    _coords = get_segments(spiral, [_delta])
+    _curvatures = (_dir * _k_start, _dir * _k_end)
 
-    if not _coords:
-        return None, None
+    if _k_end < _k_start:
 
-    _tangent = support.vector_from_angle(_delta_bearing)
+        return kernel.Spiral.from_end(
+            spiral['End'], spiral['BearingOut'], spiral['Length'],
+            _curvatures
+        )
 
-    #returns zero if false, 1 if true, corresponding to the index
-    #of the coordinate returned from get_segments()
-    _is_forward = int(spiral['StartRadius'] == math.inf)
+    return kernel.Spiral(
+        spiral['Start'], spiral['BearingIn'], spiral['Length'], _curvatures)
 
-    return _coords[_is_forward-1], _tangent
+def get_tangent_vectors(spiral, distances):
+    """
+    Calculate the coordinates and directed tangent vectors of the spiral
+    for an array of distances from it's start as (N,3) arrays
+    """
 
-def get_position_offset(line_dict, coord):
+    return get_element(spiral).get_tangent_vectors(distances)
+
+def get_curvatures(spiral, distances):
     """
-    Return the position and offset of the coordinate along the spiral
+    Return the rate of change of bearing at an array of distances along
+    the spiral, positive for clockwise curves
     """
 
-    return None, None, 1
+    return get_element(spiral).get_curvatures(distances)
+
+def get_position_offset(spiral, coord):
+    """
+    Return the position and offset of the coordinate along the spiral,
+    and a bounding value [-1, 0, 1] that indicates if the coordinate
+    falls within the spiral (0), before the start (-1)
+    or after the end (1)
+    """
+
+    _length = spiral['Length']
+
+    _pos, _offset, _bound = get_element(spiral).project([tuple(coord)])
+
+    if _bound[0]:
+        return None, None, int(_bound[0])
+
+    return float(min(max(_pos[0], 0.0), _length)), float(_offset[0]), 0
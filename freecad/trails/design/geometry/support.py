@@ -25,12 +25,16 @@
 Useful math functions and constants
 """
 import math
+import numpy
 import FreeCAD as App
 from collections.abc import Iterable
 
 from ..project.support import utils
 from ..project.support.utils import Constants as C
 
+#Newton projection onto curves, shared with the geometry kernel
+from .kernel import project_points
+
 def safe_sub(lhs, rhs, return_none=False):
     """
     Safely subtract two vectors.
@@ -29,6 +29,8 @@ from collections.abc import Iterable
 
 from inspect import getmro
 
+from pivy import coin
+
 from ..support.const import Const
 
 class _EVT(Const):
@@ -172,6 +174,13 @@ EvtBase.vals(PublisherEvents.WIRE.enum, PublisherEvents.WIRE)
 EvtBase.vals(PublisherEvents.CURVE.enum, PublisherEvents.CURVE)
 EvtBase.vals(PublisherEvents.ALIGNMENT.enum, PublisherEvents.ALIGNMENT)
 
+#UPDATED events, which may be coalesced
+_UPDATED = frozenset([
+    PublisherEvents.ALL.UPDATED, PublisherEvents.TASK.UPDATED,
+    PublisherEvents.NODE.UPDATED, PublisherEvents.CURVE.UPDATED,
+    PublisherEvents.ALIGNMENT.UPDATED
+])
+
 class Publisher:
     """
     Base class for publisher classes
@@ -188,32 +197,52 @@ class Publisher:
 
         self.events = {}
 
-    def get_subscribers(self, events=0):
+        #callbacks for each dispatched event, rebuilt on registration
+        self.routes = {}
+
+        #if True, UPDATED events are dispatched once per redraw with the
+        #latest message
+        self.coalesce_updates = False
+        self.pending_updates = {}
+        self.update_sensor = None
+
+    def get_route(self, event):
         """
-        Return subscribers registered for selected event
+        Return the tuple of callbacks for an event: the subscribers to all
+        events, to every event group sharing a bit with the event and to
+        the event itself
         """
 
-        _result = []
+        _route = self.routes.get(event)
 
-        if not isinstance(events, list):
-            events = [events]
+        if _route is not None:
+            return _route
 
-        #add subscribers to all events
-        if 0 in self.events:
-            _result = self.events[0].values()
+        _keys = [0]
 
-        for _e in events:
+        for _evt in PublisherEvents.enum._VALUES:
+            if event & _evt and _evt not in _keys:
+                _keys.append(_evt)
 
-            #add subscribers to all events for this event's group
-            for _evt in PublisherEvents.enum._VALUES:
-                if _e & _evt and self.events.get(_evt):
-                    _result += self.events[_evt].values()
+        if event not in _keys:
+            _keys.append(event)
 
-            #append subscribes to the specific event
-            if self.events.get(_e):
-                _result += self.events[_e].values()
+        _route = tuple(
+            _cb for _k in _keys for _cb in self.events.get(_k, {}).values())
+
+        self.routes[event] = _route
+
+        return _route
+
+    def get_subscribers(self, events=0):
+        """
+        Return subscribers registered for selected event
+        """
+
+        if not isinstance(events, list):
+            return self.get_route(events)
 
-        return _result
+        return tuple(_cb for _e in events for _cb in self.get_route(_e))
 
     def register(self, who, events, callback=None):
         """
@@ -241,11 +270,16 @@ class Publisher:
             if who not in self.events[_e]:
                 self.events[_e][who] = callback
 
+        self.routes.clear()
+
     def unregister(self, who, events):
         """
         Callback unregistration for subscribers
         """
 
+        if not isinstance(events, list):
+            events = [events]
+
         for _e in events:
 
             #no event, no subscriber
@@ -262,6 +296,8 @@ class Publisher:
             if not self.events[_e]:
                 del self.events[_e]
 
+        self.routes.clear()
+
     def dispatch(self, event, message, verbose=False):
         """
         Message dispatch
@@ -281,6 +317,10 @@ class Publisher:
         if not message:
             return
 
+        if self.coalesce_updates and event in _UPDATED:
+            self.queue_update(event, message)
+            return
+
         _cb_list = self.get_subscribers(event)
 
         for _cb in _cb_list:
@@ -290,3 +330,29 @@ class Publisher:
                     .format(self.pub_id, message, event))
 
             _cb(event, message)
+
+    def queue_update(self, event, message):
+        """
+        Queue an UPDATED event for dispatch before the next redraw,
+        replacing the message of the event if it is already queued
+        """
+
+        self.pending_updates[event] = message
+
+        if self.update_sensor is None:
+            self.update_sensor = coin.SoOneShotSensor(self.flush_updates, None)
+
+        if not self.update_sensor.isScheduled():
+            self.update_sensor.schedule()
+
+    def flush_updates(self, data=None, sensor=None):
+        """
+        Dispatch the queued UPDATED events
+        """
+
+        _pending = self.pending_updates
+        self.pending_updates = {}
+
+        for _e, _message in _pending.items():
+            for _cb in self.get_subscribers(_e):
+                _cb(_e, _message)
@@ -72,18 +72,14 @@ class ImportAlignmentTask:
         filename = 'import_alignment_task_xml_subpanel.ui'
         filepath = self.form.le_filename.text()
         subpanel = Gui.PySideUic.loadUi(resources.__path__[0] + '/ui/' + filename, None)
-        self.subtask = ImportXmlSubtask(subpanel, filepath)
 
         try:
-            self.data = self.subtask.parser.import_file(filepath)
-            if self.subtask.parser.errors:
-                for error in self.subtask.parser.errors:
-                    print(error)
+            self.subtask = ImportXmlSubtask(subpanel, filepath)
 
             model = QtGui.QStandardItemModel()
             self.form.tv_items.setModel(model)
 
-            for name, group in self.data.items():
+            for name, group in self.subtask.parser.contents.items():
                 group_widget = QtGui.QStandardItem(name)
                 group_widget.setCheckable(True)
                 group_widget.setCheckState(QtCore.Qt.Checked)
@@ -103,16 +99,51 @@ class ImportAlignmentTask:
             dialog.exec_()
             return
 
+    def get_selection(self):
+        """
+        Return the names of the checked items, keyed by group
+        """
+        model = self.form.tv_items.model()
+        selection = {}
+
+        for row in range(model.rowCount()):
+            group = model.item(row)
+
+            selection[group.text()] = [
+                group.child(i).text() for i in range(group.rowCount())
+                if group.child(i).checkState() == QtCore.Qt.Checked]
+
+        return selection
+
     def accept(self):
         """
         Accept the task parameters
         """
-        data = self.subtask.import_model()
+        selection = self.get_selection()
+
+        progress_bar = App.Base.ProgressIndicator()
+        progress_bar.start('Importing LandXML file...', 100)
+        steps = [0]
 
-        if self.subtask.errors:
+        def progress(percent):
+            while steps[0] < percent:
+                steps[0] += 1
+                progress_bar.next()
+
+        try:
+            data = self.subtask.import_model(
+                selection.get('Surfaces'), selection.get('Alignments'),
+                progress)
+
+        finally:
+            progress_bar.stop()
+
+        import_errors = self.subtask.errors + self.subtask.parser.errors
+
+        if import_errors:
 
             print('Errors encountered during import:\n')
-            for err in self.subtask.errors:
+            for err in import_errors:
                 print(err)
 
         if not data:
@@ -126,28 +157,15 @@ class ImportAlignmentTask:
             Gui.activeDocument().activeView().viewDefaultOrientation()
 
         for name, s in data['PointClusters'].items():
-            points = list(s[0].values())
-
-            if not points:
-                source = list(data['PointClusters'].values())[0]
-                for i in  s[1]:
-                    points.append(source[0][i])
+            if name not in selection.get('PointClusters', []):
+                continue
 
-            point_group.create(points, name)
+            pg = point_group.create(s['Points'].tolist(), name)
+            pg.PointNames = s['Names']
 
         for name, s in data['Surfaces'].items():
-            points = list(s['Points'].values())
-            surf = surface.create(points, name)
-
-            indexes = []
-            for i in s['Faces']:
-                key_list = list(s['Points'].keys())
-                c1 = key_list.index(i[0])
-                c2 = key_list.index(i[1])
-                c3 = key_list.index(i[2])
-                indexes.extend([c1, c2, c3])
-
-            surf.Delaunay = indexes
+            surface.create(
+                s['Points'].tolist(), name, s['Faces'].ravel().tolist())
 
         for align in data['Alignments'].values():
 
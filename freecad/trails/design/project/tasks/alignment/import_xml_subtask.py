@@ -40,7 +40,9 @@ class ImportXmlSubtask:
         self.panel = panel
         self.filepath = filepath
         self.parser = AlignmentImporter()
-        self.data = self.parser.import_file(filepath)
+
+        #surfaces are listed, but not read, for the preview
+        self.data = self.parser.import_file(filepath, surfaces=())
         self.errors = []
 
         if self.parser.errors:
@@ -148,11 +150,13 @@ class ImportXmlSubtask:
 
         self.parser.bearing_reference = _bearing_ref[0]
 
-    def import_model(self):
+    def import_model(self, surfaces=None, alignments=None, progress=None):
         """
-        Return the model data
+        Return the model data, limited to the surfaces and alignments
+        listed, if any
         """
-        return self.parser.import_file(self.filepath)
+        return self.parser.import_file(
+            self.filepath, surfaces, alignments, progress)
 
     def test_bearing(self, bearing, start_pt, end_pt, pi, truth):
         """
@@ -32,14 +32,23 @@ import FreeCADGui as Gui
 
 from types import SimpleNamespace
 
+import numpy
+
+from pivy import coin
+
 from freecad.trails.design import ContextTracker, PolyLineTracker, Drag
 from pivy_trackers.coin.coin_utils import *
+from pivy_trackers.coin.todo import todo
 from .curve_tracker import CurveTracker
 
 from freecad_python_support.tuple_math import TupleMath
 
+from ...geometry import arc
 from ...geometry.arc import Arc
 
+#maximum number of curves with interactive trackers
+_MAX_CURVE_TRACKERS = 24
+
 class AlignmentTracker(ContextTracker):
     """
     Tracker class for alignment design
@@ -64,7 +73,9 @@ class AlignmentTracker(ContextTracker):
                 indices = None), #list of PI indices
 
             points = None, #list of PI points
-            last_update = None  #last translation update
+            lengths = None, #list of tangent lengths between PI points
+            last_update = None,  #last translation update
+            pending = None  #latest drag motion awaiting update
         )
 
         self.curve_trackers = []
@@ -106,49 +117,43 @@ class AlignmentTracker(ContextTracker):
 
         self.pi_nodes.append(self.alignment_tracker.lines[-1].markers[-1])
 
-        _curves = [Arc(_v) for _v in self.alignment.get_curves()]
-
-        for _i, _curve in enumerate(_curves):
-
-            _ct = CurveTracker(
-                f'CurveTracker_{str(_i)}', _curve, self.curve_group)
-
-            _ct.type_name += f'.{str(_i).zfill(3)}'
+        #curves are drawn as one polyline set, with interactive trackers
+        #created only for the curves in view or being dragged
+        self.curves = [Arc(_v) for _v in self.alignment.get_curves()]
+        self.curve_trackers = [None] * len(self.curves)
+        self.curve_callbacks = {}
+        self.curve_points = [None] * len(self.curves)
+        self.curve_bounds = numpy.zeros((len(self.curves), 4))
+
+        for _i, _curve in enumerate(self.curves):
+            self.set_curve_points(_i, _curve)
+
+        self.curve_preview = SimpleNamespace(
+            root = coin.SoSeparator(),
+            coordinate = coin.SoCoordinate3(),
+            lines = coin.SoLineSet()
+        )
 
-            self.curve_trackers.append(_ct)
+        self.curve_preview.root.addChild(self.curve_preview.coordinate)
+        self.curve_preview.root.addChild(self.curve_preview.lines)
+        self.curve_group.addChild(self.curve_preview.root)
 
         _lines = self.alignment_tracker.lines
 
-        #Add dragging callbacks to the markers and lines
-        for _i, _c in enumerate(self.curve_trackers):
-
-            _c.after_drag_callbacks.append(self.after_drag_tracker)
-
-            #before/after drag for markers
-            for _n in self.pi_nodes[_i:_i+3]:
-
-                _n.before_drag_callbacks.append(_c.before_drag)
-                _n.after_drag_callbacks.append(_c.after_drag)
-
-            for _l in _lines[max(_i-2,0):min(_i+3, len(_lines)+1)]:
-
-                _l.before_drag_callbacks.append(_c.before_drag)
-                _l.after_drag_callbacks.append(_c.after_drag)
-
-            _c.before_drag_callbacks.append(self.before_drag_tracker)
-            _c.on_drag_callbacks.append(self.on_drag_tracker)
-
         #line and node on_drag/after_drag callbacks
+        #queued drag motion is applied before the curves conclude the drag
         for _l in _lines:
 
             _l.before_drag_callbacks.append(self.before_drag_tracker)
             _l.on_drag_callbacks.append(self.on_drag_tracker)
+            _l.after_drag_callbacks.insert(0, self.update_drag)
             _l.after_drag_callbacks.append(self.after_drag_tracker)
 
         for _m in self.pi_nodes:
 
             _m.before_drag_callbacks.append(self.before_drag_tracker)
             _m.on_drag_callbacks.append(self.on_drag_tracker)
+            _m.after_drag_callbacks.insert(0, self.update_drag)
             _m.after_drag_callbacks.append(self.after_drag_tracker)
 
         self.set_visibility()
@@ -156,6 +161,151 @@ class AlignmentTracker(ContextTracker):
         Drag.drag_tracker.drag.full.set_translation((0.0, 0.0, 0.0))
         Drag.drag_tracker.drag.full.set_rotation(0.0, (0.0, 0.0, 0.0))
 
+        #create / destroy curve trackers as the camera moves
+        self.camera_sensor = coin.SoNodeSensor(
+            self.update_curve_trackers, None)
+
+        self.camera_sensor.attach(self.view_state.view.getCameraNode())
+
+        self.update_curve_trackers()
+
+    def set_curve_points(self, index, curve):
+        """
+        Store the curve and the points and bounds of it's polyline
+        """
+
+        _points = arc.get_points(curve, _dtype=tuple)
+
+        self.curves[index] = curve
+        self.curve_points[index] = _points
+
+        _xy = numpy.array(_points)[:, :2]
+
+        self.curve_bounds[index] = \
+            numpy.concatenate([_xy.min(axis=0), _xy.max(axis=0)])
+
+    def update_curve_preview(self):
+        """
+        Update the polylines of the curves without interactive trackers
+        """
+
+        _points = [_p for _p, _t in zip(self.curve_points, self.curve_trackers)
+            if _t is None]
+
+        _coords = list(chain.from_iterable(_points))
+
+        _coordinate = self.curve_preview.coordinate.point
+        _lines = self.curve_preview.lines.numVertices
+
+        _coordinate.setNum(len(_coords))
+        _lines.setNum(len(_points))
+
+        if _coords:
+            _coordinate.setValues(0, len(_coords), _coords)
+            _lines.setValues(0, len(_points), [len(_p) for _p in _points])
+
+    def build_curve_tracker(self, index):
+        """
+        Create the interactive tracker of a curve, adding it's dragging
+        callbacks to the adjacent markers and lines
+        """
+
+        _c = CurveTracker(
+            f'CurveTracker_{str(index)}', self.curves[index], self.curve_group)
+
+        _c.type_name += f'.{str(index).zfill(3)}'
+
+        _c.after_drag_callbacks.append(self.after_drag_tracker)
+        _c.before_drag_callbacks.append(self.before_drag_tracker)
+        _c.on_drag_callbacks.append(self.on_drag_tracker)
+
+        _lines = self.alignment_tracker.lines
+        _callbacks = []
+
+        #before/after drag for markers and lines
+        for _n in self.pi_nodes[index:index+3] \
+            + _lines[max(index-2,0):min(index+3, len(_lines)+1)]:
+
+            _n.before_drag_callbacks.append(_c.before_drag)
+
+            #curves conclude the drag before the alignment
+            _n.after_drag_callbacks.insert(
+                _n.after_drag_callbacks.index(self.after_drag_tracker),
+                _c.after_drag)
+
+            _callbacks += [(_n.before_drag_callbacks, _c.before_drag),
+                (_n.after_drag_callbacks, _c.after_drag)]
+
+        self.curve_trackers[index] = _c
+        self.curve_callbacks[index] = _callbacks
+
+        return _c
+
+    def remove_curve_tracker(self, index):
+        """
+        Destroy the interactive tracker of a curve, keeping it's geometry
+        """
+
+        _c = self.curve_trackers[index]
+
+        for _list, _cb in self.curve_callbacks.pop(index):
+            _list.remove(_cb)
+
+        self.set_curve_points(index, _c.arc)
+
+        _c.finish()
+
+        self.curve_trackers[index] = None
+
+    def update_curve_trackers(self, data=None, sensor=None):
+        """
+        Create interactive trackers for the curves in view, nearest the
+        center of the view first, and destroy the trackers of the others
+        """
+
+        #trackers are kept for the duration of a drag
+        if self.drag_refs.points or not self.curves:
+            return
+
+        _view = self.view_state.view
+
+        _corners = numpy.array([
+            tuple(_view.getPoint(0, 0)),
+            tuple(_view.getPoint(*_view.getSize()))])[:, :2]
+
+        _lo = _corners.min(axis=0)
+        _hi = _corners.max(axis=0)
+
+        _b = self.curve_bounds
+
+        _visible = numpy.flatnonzero(
+            (_b[:, 0] <= _hi[0]) & (_b[:, 2] >= _lo[0])
+            & (_b[:, 1] <= _hi[1]) & (_b[:, 3] >= _lo[1]))
+
+        _dist = numpy.linalg.norm(
+            (_b[_visible, :2] + _b[_visible, 2:]) / 2.0 - (_lo + _hi) / 2.0,
+            axis=1)
+
+        _visible = set(
+            _visible[numpy.argsort(_dist)][:_MAX_CURVE_TRACKERS].tolist())
+
+        _changed = False
+
+        for _i, _t in enumerate(self.curve_trackers):
+
+            if (_t is None) == (_i in _visible):
+
+                _changed = True
+
+                if _t is None:
+                    self.build_curve_tracker(_i)
+
+                else:
+                    self.remove_curve_tracker(_i)
+
+        if _changed:
+            self.update_curve_preview()
+
     def validate_curve_drag(self, user_data):
         """
         Validates the changes to the curves, noting errors when
@@ -168,17 +318,12 @@ class AlignmentTracker(ContextTracker):
 
         #lengths =  distances between n curves
 
-        #get distances between PI's except first and last
+        #distances between PI's, updated as the PI's move
 
-        _pp = self.drag_refs.points[0]
-        _lines = []
+        _lines = self.drag_refs.lengths
         _curves = self.curve_trackers[
             self.drag_refs.curve_list[0]:self.drag_refs.curve_list[-1] +1]
 
-        for _p in self.drag_refs.points[1:]:
-            _lines.append(TupleMath.length(_p, _pp))
-            _pp = _p
-
         _prev = _curves[0]
         _prev.is_invalid = False
         _any_viz_invalid = False
@@ -193,7 +338,7 @@ class AlignmentTracker(ContextTracker):
             ]
 
             if not _any_viz_invalid:
-                _any_vizinvalid = any(_invalid)
+                _any_viz_invalid = any(_invalid)
 
             _prev.is_invalid = any(_invalid)
             _c.is_invalid = _invalid[1]
@@ -263,16 +408,61 @@ class AlignmentTracker(ContextTracker):
         self.drag_refs.selected.indices =\
             [_v - _pi[0] for _v in self.drag_refs.selected.indices]
 
+        _points = self.drag_refs.points
+
+        self.drag_refs.lengths = [TupleMath.length(_v, _points[_i])\
+            for _i, _v in enumerate(_points[1:])]
+
+        #curves affected by the drag need their interactive trackers
+        if self.drag_refs.curve_list:
+
+            _built = False
+
+            for _i in range(self.drag_refs.curve_list[0],
+                self.drag_refs.curve_list[-1] + 1):
+
+                if self.curve_trackers[_i] is None:
+
+                    self.build_curve_tracker(_i).before_drag(user_data)
+                    _built = True
+
+            if _built:
+                self.update_curve_preview()
+
     def on_drag_tracker(self, user_data):
         """
-        Update the CurveTracker geometry when tangents are adjusted
+        Update the CurveTracker geometry when tangents are adjusted.
+        PI motion is queued, so the curves are solved once per redraw
+        for all of the motion events received in between.
         """
 
-        #if curves are being directly adjusted, don't recalculate bearings
-        if not  'Curve' in user_data.obj.type_name:
+        #if curves are being directly adjusted, they are already solved
+        if 'Curve' in user_data.obj.type_name:
 
-            #pi change requires bearing update
-            self.rebuild_bearings(user_data.matrix, user_data.obj.name)
+            self.validate_curve_drag(None)
+            return
+
+        _pending = self.drag_refs.pending
+        self.drag_refs.pending = user_data
+
+        if _pending is None:
+            todo.delay(self.update_drag, None)
+
+    def update_drag(self, dummy=None):
+        """
+        Apply the latest queued PI motion
+        """
+
+        user_data = self.drag_refs.pending
+
+        #nothing queued or already applied
+        if user_data is None:
+            return
+
+        self.drag_refs.pending = None
+
+        #pi change requires bearing update
+        self.rebuild_bearings(user_data.matrix, user_data.obj.name)
 
         self.validate_curve_drag(None)
 
@@ -305,7 +495,9 @@ class AlignmentTracker(ContextTracker):
                 pi = None,
                 indices = None),
             points = None,
-            last_update = None
+            lengths = None,
+            last_update = None,
+            pending = None
         )
 
     def rebuild_bearings(self, matrix, obj_name):
@@ -326,28 +518,38 @@ class AlignmentTracker(ContextTracker):
             self.drag_refs.selected.pi, matrix)
 
         _points = self.drag_refs.points
-        _j = 0
+        _lengths = self.drag_refs.lengths
+        _moved = self.drag_refs.selected.indices
 
         #update translated points
-        for _i in self.drag_refs.selected.indices:
-
+        for _j, _i in enumerate(_moved):
             _points[_i] = _p[_j]
-            _j += 1
 
-        #precalcualte bearings
-        _bearings = [TupleMath.bearing(
-            TupleMath.subtract(_points[_i+1], _v))\
-                for _i, _v in enumerate(_points[:-1])]
+        #only the tangents adjacent to the moved points change
+        _segments = set(_s for _i in _moved for _s in (_i - 1, _i)\
+            if 0 <= _s < len(_points) - 1)
 
-        #iterate curves setting the bearing inbound / outbound pairs
-        #drop the outermost curves as they are not being changed
-        _curves = [self.curve_trackers[_c] for _c in self.drag_refs.curve_list]
+        _bearings = {}
 
-        for _i, _c in enumerate(_curves):
+        for _s in _segments:
 
-            _c.set_pi(_points[_i + 1])
-            _c.set_bearings(_bearings[_i], _bearings[_i + 1])
-            _c.update()
+            _bearings[_s] = TupleMath.bearing(
+                TupleMath.subtract(_points[_s + 1], _points[_s]))
+
+            _lengths[_s] = TupleMath.length(_points[_s + 1], _points[_s])
+
+        #iterate curves setting the bearing inbound / outbound pairs,
+        #skipping curves with unchanged tangents
+        for _i, _c in enumerate(self.drag_refs.curve_list):
+
+            if _i not in _segments and _i + 1 not in _segments:
+                continue
+
+            _curve = self.curve_trackers[_c]
+
+            _curve.set_pi(_points[_i + 1])
+            _curve.set_bearings(_bearings.get(_i), _bearings.get(_i + 1))
+            _curve.update()
 
         self.drag_refs.points = _points
 
@@ -356,8 +558,11 @@ class AlignmentTracker(ContextTracker):
         Cleanup the tracker
         """
 
+        self.camera_sensor.detach()
+
         for _t in self.curve_trackers:
-            _t.finish()
+            if _t:
+                _t.finish()
 
         remove_child(self.curve_group, self.base.root)
         remove_child(self.alignment_group, self.base.root)
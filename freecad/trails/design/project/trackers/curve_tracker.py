@@ -68,7 +68,8 @@ class CurveTracker(ContextTracker, Drag):
             start_point = None,
             axis = None,
             direction = None,
-            nodes = None
+            nodes = None,
+            pending = None
         )
 
         self.is_invalid = False
@@ -144,13 +145,17 @@ class CurveTracker(ContextTracker, Drag):
         End-of-drag operations
         """
 
+        #apply motion still queued for update
+        self.update_drag()
+
         self.text_copies = []
 
         self.drag_refs = SimpleNamespace(
             start_point = None,
             axis = None,
             direction = None,
-            nodes = None
+            nodes = None,
+            pending = None
         )
 
         self.drag_copy = None
@@ -222,12 +227,28 @@ class CurveTracker(ContextTracker, Drag):
         #if the new vector component is pointing in the same direction, the
         #update is valid
         if self.drag_refs.direction == _dir:
-            self.arc.set(_mod_point[0], _mod_point[-1])
+            self.arc.update_parameter(_mod_point[0], _mod_point[-1])
+
+        #queue the update, solving once per redraw for all of the motion
+        #events received in between
+        _pending = self.drag_refs.pending
+        self.drag_refs.pending = user_data
+
+        if _pending is None:
+            todo.delay(self.update_drag, None)
+
+    def update_drag(self, dummy=None):
+        """
+        Apply the latest queued drag motion
+        """
+
+        user_data = self.drag_refs.pending
+
+        #nothing queued or already applied
+        if user_data is None:
+            return
 
-        self.arc.radius = None
-        self.arc.tangent = None
-        self.arc.start = None
-        self.arc.end = None
+        self.drag_refs.pending = None
 
         self.update()
 
@@ -41,6 +41,10 @@ class AlignmentExporter(object):
     LandXML exporting class for alignments
     """
 
+    #revision of the alignment serialization, changed whenever the
+    #written fragments change for the same data
+    VERSION = 1
+
     def __init__(self):
 
         self.errors = []
@@ -178,17 +182,40 @@ class AlignmentExporter(object):
             if _node is not None:
                 self._write_coordinates(_geo, _node)
 
-    def write(self, data, source_path, target_path):
+    def get_fragment(self, data):
         """
-        Write the alignment data to a land xml file in the target location
+        Return the serialized Alignment node of an alignment data set
         """
 
-        root = etree.parse(source_path).getroot()
+        _parent = etree.Element('Alignments')
+
+        self._write_alignment_data(data, _parent)
+
+        _node = _parent[0]
 
-        _parent = landxml.add_child(root, 'Alignments')
+        if hasattr(etree, 'indent'):
+            etree.indent(_node, '  ', level=2)
 
-        for _align in data:
-            print('\n\tWriting', _align)
-            self._write_alignment_data(_align, _parent)
+        _node.tail = '\n'
+
+        return '    ' + etree.tostring(_node, encoding='unicode')
+
+    def write_fragments(self, fragments, source_path, target_path):
+        """
+        Stream serialized Alignment nodes into a land xml file
+        in the target location
+        """
 
-        landxml.write_to_file(root, target_path)
+        _head, _tail = landxml.split_template(source_path, 'Alignments')
+
+        landxml.write_fragments(target_path, _head, fragments, _tail)
+
+    def write(self, data, source_path, target_path):
+        """
+        Write the alignment data to a land xml file in the target location
+        """
+
+        self.write_fragments(
+            [self.get_fragment(_align) for _align in data],
+            source_path, target_path
+        )
@@ -23,8 +23,10 @@
 """
 Importer for Alignments in landxml files
 """
-import FreeCAD
 import math
+import os
+
+import numpy
 
 from xml.etree import ElementTree as etree
 
@@ -288,115 +290,326 @@ class AlignmentImporter(object):
 
         return result
 
-    def parse_pc(self, point_cluster):
-        points = {}
-        refs = []
-        for p in point_cluster:
-            if p.text:
-                name = int(p.get("name"))
-                pt = p.text.strip().split(' ')
-                pt = [float(v) for v in pt]
-                vec = FreeCAD.Vector(pt[1], pt[0], pt[2])
-                points[name] = vec.multiply(1000)
-
-            else:
-                ref = int(p.get("pntRef"))
-                refs.append(ref)
-
-        return [points, refs]
-
-    def parse_surface(self, surface):
-        definition = landxml.get_child(surface, 'Definition')
-        pts = landxml.get_child(definition, 'Pnts')
-        fcs = landxml.get_child(definition, 'Faces')
-
-        points = {}
-        for p in pts:
-            id = int(p.get("id"))
-            pt = p.text.strip().split(' ')
-            pt = [float(v) for v in pt]
-            vec = FreeCAD.Vector(pt[1], pt[0], pt[2])
-            points[id] = vec.multiply(1000)
-
-        faces = []
-        for f in fcs:
-            fc = f.text.strip().split(' ')
-            fc = [int(v) for v in fc]
-            faces.append(fc)
-
-        return points, faces
-
-    def import_file(self, filepath):
+    def _read_surface(self, surf_name, reader):
         """
-        Import a landxml and build the Python dictionary fronm the
-        appropriate elements
+        Convert the buffered surface points and faces to arrays.
+        Face point id's are replaced by indices into the point array.
         """
 
-        #get element tree and key nodes for parsing
-        doc = etree.parse(filepath)
-        root = doc.getroot()
+        points = reader[0].array()
+        faces = reader[1].array().astype(int)
 
-        project = landxml.get_child(root, 'Project')
-        units = landxml.get_child(root, 'Units')
-        cg_points = landxml.get_children(root, 'CgPoints')
-        surfaces = landxml.get_child(root, 'Surfaces')
-        alignments = landxml.get_child(root, 'Alignments')
+        ids = points[:, 0].astype(int)
 
-        #aport if key nodes are missing
-        if not units:
-            self.errors.append('Missing project units')
-            return None
+        #swap northing / easting and convert to mm
+        coords = points[:, [2, 1, 3]] * 1000.0
 
-        unit_name = self.validate_units(units)
+        if not ids.size:
+            return {'Points': coords, 'Ids': ids,
+                    'Faces': numpy.empty((0, 3), dtype=int)}
 
-        if not unit_name:
-            self.errors.append('Invalid project units')
-            return None
+        order = numpy.argsort(ids, kind='stable')
+        sorted_ids = ids[order]
+
+        pos = numpy.minimum(
+            numpy.searchsorted(sorted_ids, faces), len(ids) - 1)
+
+        valid = numpy.all(sorted_ids[pos] == faces, axis=1)
+
+        if not valid.all():
+            self.errors.append(
+                '%d faces with missing points skipped in surface %s'
+                % (numpy.count_nonzero(~valid), surf_name)
+            )
+
+        return {'Points': coords, 'Ids': ids, 'Faces': order[pos[valid]]}
+
+    def _read_point_clusters(self, clusters):
+        """
+        Convert the buffered point clusters to arrays, resolving point
+        references against the named points of all clusters
+        """
+
+        result = {}
+        lookup = {}
+
+        for pc_name, (names, buffer, refs) in clusters.items():
+
+            points = buffer.array()[:, [1, 0, 2]] * 1000.0
+            result[pc_name] = {'Points': points, 'Names': names}
+
+            for _i, _name in enumerate(names):
+                lookup.setdefault(_name, (points, _i))
+
+        for pc_name, (names, buffer, refs) in clusters.items():
+
+            if not refs:
+                continue
+
+            found = [_r for _r in refs if _r in lookup]
+
+            if len(found) < len(refs):
+                self.errors.append(
+                    '%d unresolved point references in point cluster %s'
+                    % (len(refs) - len(found), pc_name)
+                )
+
+            if not found:
+                continue
+
+            cluster = result[pc_name]
+
+            cluster['Points'] = numpy.concatenate([
+                cluster['Points'],
+                numpy.array([lookup[_r][0][lookup[_r][1]] for _r in found])
+            ])
+
+            cluster['Names'] = names + found
+
+        return result
+
+    def import_file(self, filepath, surfaces=None, alignments=None,
+                    progress=None):
+        """
+        Import a landxml and build the Python dictionary fronm the
+        appropriate elements.
+
+        The file is streamed and read elements are released, so surface
+        and point cluster data is held only in it's array form:
+
+        PointClusters - {'Points': (N,3) array, 'Names': list of names}
+        Surfaces - {'Points': (N,3) array, 'Ids': (N,) array of point id's,
+                    'Faces': (M,3) array of point indices}
+
+        surfaces, alignments - names of the objects to import, or None to
+                               import all of them
+        progress - optional callback, called with the percentage of the
+                   file read each time it increases
+
+        The names of all objects found in the file, imported or not,
+        are kept in self.contents
+        """
+
+        self.contents = {'PointClusters': [], 'Surfaces': [], 'Alignments': []}
+
+        #errors are reported per file read
+        self.errors = []
 
-        #default project name if missing
         project_name = 'Unknown Project'
+        unit_name = None
 
-        if not project is None:
-            project_name = project.attrib['name']
+        clusters = {}
+        cluster = None
+
+        surface_dict = {}
+        surface = None
 
-        #build final dictionary and return
         result = {}
-        result['Project'] = {}
-        result['Project'][maps.XML_MAP['name']] = project_name
-        result['PointClusters'] = {}
-        result['Surfaces'] = {}
         result['Alignments'] = {}
 
-        if cg_points:
-            for pc in cg_points:
-                pc_name = self.get_name(
-                    pc, result.keys(), "PointCluster")
+        stack = []
+        percent = 0
 
-                result['PointClusters'][pc_name] =  self.parse_pc(pc)
+        with open(filepath, 'rb') as _file:
 
-        if surfaces:
-            for surface in surfaces:
-                surf_name = self.get_name(
-                    surface, result.keys(), "Surface")
+            size = max(os.fstat(_file.fileno()).st_size, 1)
 
-                surf_dict = {}
-                result['Surfaces'][surf_name] = surf_dict
-                surf_dict['Points'], surf_dict['Faces'] = self.parse_surface(surface)
+            for _i, (event, elem) in enumerate(
+                etree.iterparse(_file, events=('start', 'end'))):
 
-        if alignments:
-            for alignment in alignments:
-                align_name = self.get_name(
-                    alignment, result.keys(), "Alignment")
+                tag = elem.tag.split('}')[-1]
 
-                align_dict = {}
-                result['Alignments'][align_name] = align_dict
-                align_dict['meta'] = self._parse_meta_data(align_name, alignment)
+                if event == 'start':
 
-                align_dict['station'] \
-                    = self._parse_station_data(align_name, alignment)
+                    parent = stack[-1].tag.split('}')[-1] if stack else ''
+                    stack.append(elem)
 
-                align_dict['geometry'] = self._parse_coord_geo_data(
-                    align_name, alignment
-                    )
+                    if tag in ['CgPoints', 'Surface', 'Alignment']:
+
+                        #aport if the data precedes the units
+                        if unit_name is None:
+                            self.errors.append('Missing project units')
+                            return None
+
+                    if tag == 'CgPoints':
+
+                        pc_name = self.get_name(
+                            elem, self.contents['PointClusters'],
+                            'PointCluster')
+
+                        self.contents['PointClusters'].append(pc_name)
+
+                        cluster = ([], _ArrayBuffer(3), [])
+                        clusters[pc_name] = cluster
+
+                    elif tag == 'Surface' and parent == 'Surfaces':
+
+                        surf_name = self.get_name(
+                            elem, self.contents['Surfaces'], 'Surface')
+
+                        self.contents['Surfaces'].append(surf_name)
+
+                        surface = None
+
+                        if surfaces is None or surf_name in surfaces:
+                            surface = (_ArrayBuffer(4), _ArrayBuffer(3))
+
+                    continue
+
+                stack.pop()
+                parent = stack[-1].tag.split('}')[-1] if stack else ''
+
+                if tag == 'Units':
+
+                    unit_name = self.validate_units(elem)
+
+                    if not unit_name:
+                        self.errors.append('Invalid project units')
+                        return None
+
+                elif tag == 'Project':
+                    project_name = elem.attrib['name']
+
+                elif tag == 'P' and parent == 'Pnts':
+
+                    if surface:
+                        surface[0].append(elem.get('id') + ' ' + (elem.text or ''))
+
+                elif tag == 'F' and parent == 'Faces':
+
+                    if surface:
+                        surface[1].append(elem.text or '')
+
+                elif tag == 'CgPoint' and cluster:
+
+                    if elem.text and elem.text.strip():
+                        cluster[0].append(elem.get('name'))
+                        cluster[1].append(elem.text)
+
+                    elif elem.get('pntRef'):
+                        cluster[2].append(elem.get('pntRef'))
+
+                elif tag == 'CgPoints':
+                    cluster = None
+
+                elif tag == 'Surface' and parent == 'Surfaces':
+
+                    if surface:
+                        surface_dict[surf_name] = \
+                            self._read_surface(surf_name, surface)
+
+                    surface = None
+
+                elif tag == 'Alignment' and parent == 'Alignments':
+
+                    align_name = self.get_name(
+                        elem, self.contents['Alignments'], 'Alignment')
+
+                    self.contents['Alignments'].append(align_name)
+
+                    if alignments is None or align_name in alignments:
+
+                        align_dict = {}
+                        result['Alignments'][align_name] = align_dict
+                        align_dict['meta'] = \
+                            self._parse_meta_data(align_name, elem)
+
+                        align_dict['station'] \
+                            = self._parse_station_data(align_name, elem)
+
+                        align_dict['geometry'] = self._parse_coord_geo_data(
+                            align_name, elem
+                            )
+
+                #release streamed elements once they are read
+                if parent in ['Pnts', 'Faces', 'CgPoints', 'Surfaces',
+                              'Alignments']:
+                    stack[-1].remove(elem)
+
+                if progress and not _i % 4096:
+
+                    _pct = int(100.0 * _file.tell() / size)
+
+                    if _pct > percent:
+                        percent = _pct
+                        progress(percent)
+
+        #aport if key nodes are missing
+        if unit_name is None:
+            self.errors.append('Missing project units')
+            return None
+
+        if progress and percent < 100:
+            progress(100)
+
+        #build final dictionary and return
+        result['Project'] = {maps.XML_MAP['name']: project_name}
+        result['PointClusters'] = self._read_point_clusters(clusters)
+        result['Surfaces'] = surface_dict
 
         return result
+
+
+class _ArrayBuffer:
+    """
+    Growing array, filled with rows of whitespace-delimited text.
+    Rows are converted in chunks to avoid per-row array overhead.
+    """
+
+    def __init__(self, columns, chunk=65536):
+
+        self.columns = columns
+        self.chunk = chunk
+        self.rows = []
+        self.data = numpy.empty((0, columns))
+        self.size = 0
+
+    def append(self, text):
+        """
+        Add a row of text
+        """
+
+        self.rows.append(text)
+
+        if len(self.rows) >= self.chunk:
+            self.flush()
+
+    def flush(self):
+        """
+        Convert the pending rows and append them to the array
+        """
+
+        if not self.rows:
+            return
+
+        values = numpy.array(' '.join(self.rows).split(), dtype=float)
+
+        #rows with missing or extra values are converted individually
+        if values.size != len(self.rows) * self.columns:
+
+            values = numpy.array([
+                (_r.split() + ['0.0'] * self.columns)[:self.columns]
+                for _r in self.rows], dtype=float)
+
+        values = values.reshape(-1, self.columns)
+
+        end = self.size + len(values)
+
+        if end > len(self.data):
+
+            data = numpy.empty((max(end, 2 * len(self.data)), self.columns))
+            data[:self.size] = self.data[:self.size]
+            self.data = data
+
+        self.data[self.size:end] = values
+        self.size = end
+        self.rows = []
+
+    def array(self):
+        """
+        Return the filled array
+        """
+
+        self.flush()
+
+        return self.data[:self.size].copy()
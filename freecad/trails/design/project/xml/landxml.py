@@ -49,6 +49,9 @@ class _C(const.Const):
 
     PRECISION = '{:.9f}'    #Attribute precision for floats
 
+#serialized templates, split at the end of the root node
+_TEMPLATES = {}
+
 def convert_token(tag, value):
     """
     Given a LandXML tag and it's value, return it
@@ -115,6 +118,61 @@ def write_to_file(node, target, pretty_print=True):
     with open(target, 'w', encoding='UTF-8') as _file:
         _file.write(_xml)
 
+def split_root(source):
+    """
+    Return the text of the template file before and after the end of
+    the root node, so child nodes can be streamed between them
+    """
+
+    if source not in _TEMPLATES:
+
+        _root = etree.parse(source).getroot()
+        add_child(_root, 'Split')
+
+        etree.register_namespace(_C.VERSION, _C.NAMESPACE[_C.VERSION])
+
+        _xml = etree.tostring(_root, encoding='unicode')
+        _xml = re.sub(_C.VERSION + ':', '', _xml)
+        _xml = re.sub('xmlns:' + _C.VERSION, 'xmlns', _xml)
+
+        _head, _tail = _xml.split('<Split />')
+
+        _TEMPLATES[source] = (
+            '<?xml version="1.0" encoding="utf-8"?>\n' + _head + '\n',
+            _tail + '\n'
+        )
+
+    return _TEMPLATES[source]
+
+def split_template(source, node_name):
+    """
+    Return the text of the template file before and after an empty
+    child node of the root, so the node's children can be streamed
+    between them
+    """
+
+    _head, _tail = split_root(source)
+
+    return (
+        _head + '  <' + node_name + '>\n',
+        '  </' + node_name + '>\n' + _tail
+    )
+
+def write_fragments(target, head, fragments, tail):
+    """
+    Stream serialized nodes to the target file between the head and tail
+    of a split template
+    """
+
+    with open(target, 'w', encoding='UTF-8') as _file:
+
+        _file.write(head)
+
+        for _fragment in fragments:
+            _file.write(_fragment)
+
+        _file.write(tail)
+
 def dump_node(node):
     """
     Dump the tree to a prettified string
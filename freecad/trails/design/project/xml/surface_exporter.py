@@ -0,0 +1,240 @@
+# -*- coding: utf-8 -*-
+#***********************************************************************
+#*                                                                     *
+#* Copyright (c) 2021 Joel Graff <monograff76@gmail.com>               *
+#*                                                                     *
+#* This program is free software; you can redistribute it and/or modify*
+#* it under the terms of the GNU Lesser General Public License (LGPL)  *
+#* as published by the Free Software Foundation; either version 2 of   *
+#* the License, or (at your option) any later version.                 *
+#* for detail see the LICENCE text file.                               *
+#*                                                                     *
+#* This program is distributed in the hope that it will be useful,     *
+#* but WITHOUT ANY WARRANTY; without even the implied warranty of      *
+#* MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the       *
+#* GNU Library General Public License for more details.                *
+#*                                                                     *
+#* You should have received a copy of the GNU Library General Public   *
+#* License along with this program; if not, write to the Free Software *
+#* Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307*
+#* USA                                                                 *
+#*                                                                     *
+#***********************************************************************
+
+"""
+Exporter for Surfaces and Point Groups in LandXML files
+"""
+
+from xml.sax.saxutils import quoteattr
+
+import numpy
+
+from ..support import units
+from . import landxml
+
+#number of points / faces formatted at once
+_CHUNK = 10000
+
+#coordinate precision, in file units
+_COORDINATE = '%.4f %.4f %.4f'
+
+class SurfaceExporter(object):
+    """
+    LandXML exporting class for surfaces and point groups.
+
+    Surfaces are written as TIN definitions and point groups as CgPoints.
+    Nodes are formatted in chunks directly from the arrays and streamed
+    to the file, so memory use does not grow with the data.
+    """
+
+    def __init__(self):
+
+        self.errors = []
+
+    @staticmethod
+    def get_surface_data(obj):
+        """
+        Return the points (N,3), in mm, and faces (M,3) of a surface
+        object's mesh.
+
+        The mesh holds the triangulation after the edge filters and the
+        surface edits, relative to the geo origin of the document.
+        """
+
+        _points, _faces = obj.Mesh.Topology
+
+        _points = numpy.array(
+            [tuple(_p) for _p in _points], dtype=float).reshape(-1, 3)
+
+        _faces = numpy.array(_faces, dtype=int).reshape(-1, 3)
+
+        _origin = obj.Document.getObject('GeoOrigin')
+
+        if _origin:
+            _points += tuple(_origin.Origin)
+
+        return _points, _faces
+
+    @staticmethod
+    def get_point_group_data(obj):
+        """
+        Return the points (N,3), in mm, and point names of a point group
+        """
+
+        _points = numpy.array(obj.Vectors, dtype=float).reshape(-1, 3)
+        _names = list(obj.PointNames)
+
+        if len(_names) != len(_points):
+            _names = None
+
+        return _points, _names
+
+    @staticmethod
+    def _format_points(start, end, points, names=None):
+        """
+        Yield points as nodes between the start and end text, in chunks.
+        Coordinates are converted to northing, easting, elevation in file
+        units and preceded by the point name, or by the one-based point
+        index.
+        """
+
+        _sf = units.scale_factor()
+
+        if names is None:
+            _template = start + '"%d">' + _COORDINATE + end
+
+        else:
+            _template = start + '%s>' + _COORDINATE + end
+
+        for _i in range(0, len(points), _CHUNK):
+
+            _chunk = points[_i:_i + _CHUNK, [1, 0, 2]] / _sf
+
+            if names is None:
+
+                _ids = numpy.arange(_i + 1, _i + len(_chunk) + 1)
+                _rows = numpy.column_stack([_ids, _chunk])
+
+                yield _template * len(_chunk) \
+                    % tuple(_rows.ravel().tolist())
+
+                continue
+
+            yield ''.join(
+                _template % (quoteattr(str(_n)), *_p)
+                for _n, _p in zip(names[_i:_i + _CHUNK], _chunk.tolist())
+            )
+
+    @staticmethod
+    def _format_faces(faces):
+        """
+        Yield faces as one-based point indices, in chunks
+        """
+
+        for _i in range(0, len(faces), _CHUNK):
+
+            _chunk = faces[_i:_i + _CHUNK] + 1
+
+            yield '          <F>%d %d %d</F>\n' * len(_chunk) \
+                % tuple(_chunk.ravel().tolist())
+
+    def get_surface_fragments(self, name, points, faces):
+        """
+        Yield the serialized Surface node of a triangulation.
+        Point id's are one-based indices into the point array.
+        """
+
+        _points = numpy.asarray(points, dtype=float).reshape(-1, 3)
+        _faces = numpy.asarray(faces, dtype=int).reshape(-1, 3)
+
+        if _faces.size and (_faces.min() < 0 or _faces.max() >= len(_points)):
+
+            self.errors.append(
+                'Invalid point indices in faces of surface ' + name)
+
+            return
+
+        yield '    <Surface name=' + quoteattr(name) + '>\n' \
+            + '      <Definition surfType="TIN">\n' \
+            + '        <Pnts>\n'
+
+        yield from self._format_points(
+            '          <P id=', '</P>\n', _points)
+
+        yield '        </Pnts>\n' \
+            + '        <Faces>\n'
+
+        yield from self._format_faces(_faces)
+
+        yield '        </Faces>\n' \
+            + '      </Definition>\n' \
+            + '    </Surface>\n'
+
+    def get_point_group_fragments(self, name, points, names=None):
+        """
+        Yield the serialized CgPoints node of a point group.
+        Points are named by their one-based index if no names are given.
+        """
+
+        _points = numpy.asarray(points, dtype=float).reshape(-1, 3)
+
+        yield '  <CgPoints name=' + quoteattr(name) + '>\n'
+
+        yield from self._format_points(
+            '    <CgPoint name=', '</CgPoint>\n', _points, names)
+
+        yield '  </CgPoints>\n'
+
+    def get_fragments(self, surfaces, point_groups):
+        """
+        Yield the serialized nodes of the surfaces and point groups
+
+        surfaces - dictionary of (points, faces) keyed by name
+        point_groups - dictionary of (points, names) keyed by name
+        """
+
+        for _name, (_points, _names) in point_groups.items():
+            yield from self.get_point_group_fragments(_name, _points, _names)
+
+        if not surfaces:
+            return
+
+        yield '  <Surfaces>\n'
+
+        for _name, (_points, _faces) in surfaces.items():
+            yield from self.get_surface_fragments(_name, _points, _faces)
+
+        yield '  </Surfaces>\n'
+
+    def write(self, surfaces, point_groups, source_path, target_path):
+        """
+        Write the surfaces and point groups to a land xml file in the
+        target location, using the source file as template
+        """
+
+        _head, _tail = landxml.split_root(source_path)
+
+        landxml.write_fragments(
+            target_path, _head,
+            self.get_fragments(surfaces, point_groups), _tail
+        )
+
+    def write_objects(self, objects, source_path, target_path):
+        """
+        Write surface and point group objects to a land xml file
+        """
+
+        _surfaces = {}
+        _point_groups = {}
+
+        for _obj in objects:
+
+            _type = getattr(_obj.Proxy, 'Type', None)
+
+            if _type == 'Trails::Surface':
+                _surfaces[_obj.Label] = self.get_surface_data(_obj)
+
+            elif _type == 'Trails::PointGroup':
+                _point_groups[_obj.Label] = self.get_point_group_data(_obj)
+
+        self.write(_surfaces, _point_groups, source_path, target_path)
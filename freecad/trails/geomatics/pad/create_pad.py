@@ -21,9 +21,9 @@
 # ***********************************************************************
 
 import FreeCAD, FreeCADGui
-import Part
+import numpy as np
 from freecad.trails import ICONPATH, geo_origin
-from ..surface import surface
+from ..surface import surface, daylight
 from ..point import point_group
 
 
@@ -59,10 +59,9 @@ class CreatePad:
 
     def Activated(self):
         """
-        Command activation method
+        Grade the selected polyline to the selected surface
         """
         slope = 1
-        lenght = 30000
         self.origin = geo_origin.get()
 
         polyline = FreeCADGui.Selection.getSelection()[-2]
@@ -72,38 +71,25 @@ class CreatePad:
         self.copy_shape.Placement.move(self.origin.Origin)
         self.points = self.copy_shape.discretize(Distance=5000)
 
-        self.pg = point_group.create()
-        self.surf = surface.create()
-
-        maxz = self.target.Mesh.BoundBox.ZMax
-        minz = self.target.Mesh.BoundBox.ZMin
-        fill_points = self.get_secpts(slope, minz)
-        cut_points = self.get_secpts(slope, maxz)
-
-        self.pg.Vectors = self.points + fill_points + cut_points
-        self.surf.PointGroups = [self.pg]
+        # Surface meshes are relative to the origin.
+        base = np.array(tuple(self.origin.Origin))
+        points = np.array([tuple(i) for i in self.points]) - base
 
-    def get_secpts(self,slope, z):
-        shape = self.copy_shape.copy()
-        lenght = z - shape.Placement.Base.z
-        shape.Placement.move(FreeCAD.Vector(0,0, slope*lenght))
-        offpoints = shape.makeOffset2D(
-            abs(lenght)).discretize(Angular=1,Curvature=100,Minimum=2)
+        closed = polyline.Shape.isClosed()
+        if closed:
+            points = points[:-1]
 
-        self.pg.Vectors = offpoints + self.points
-        self.surf.PointGroups = [self.pg]
-
-        intersec = self.surf.Mesh.section(
-            self.target.Mesh, MinDist=0.01)
+        engine = daylight.Daylight(self.target.Mesh.Topology, slope, slope)
+        catch, _ = engine.get_catch_points(
+            points, daylight.get_directions(points, closed))
 
-        border = []
-        for point in intersec[0]:
-            if point.z == self.copy_shape.Placement.Base.z: continue
-            border.append(point.add(self.origin.Origin))
+        catch = catch[~np.isnan(catch[:, 0])] + base
 
-        intsec = Part.makePolygon(border)
-        intpts = intsec.discretize(Distance=5000)
+        self.pg = point_group.create()
+        self.surf = surface.create()
 
-        return intpts
+        self.pg.Vectors = self.points \
+            + [FreeCAD.Vector(*i) for i in catch.tolist()]
+        self.surf.PointGroups = [self.pg]
 
 FreeCADGui.addCommand('Create Pad', CreatePad())
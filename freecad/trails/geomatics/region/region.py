@@ -109,6 +109,10 @@ class Region(RegionFunc):
             "App::PropertyLength", "EndStation", "Station",
             "Guide lines end station").EndStation = 0
 
+        obj.addProperty(
+            "App::PropertyFloatList", "AdditionalStations", "Station",
+            "User defined stations").AdditionalStations = []
+
         obj.addProperty(
             "App::PropertyLength", "IncrementAlongTangents", "Increment",
             "Distance between guide lines along tangents").IncrementAlongTangents = 10000
@@ -177,7 +181,11 @@ class Region(RegionFunc):
 
         horiz_pnts = obj.getPropertyByName("AtHorizontalAlignmentPoints")
 
-        obj.StationList = self.generate(alignment,increments, region, horiz_pnts)
+        extras = []
+        if hasattr(obj, "AdditionalStations"):
+            extras = obj.getPropertyByName("AdditionalStations")
+
+        obj.StationList = self.generate(alignment,increments, region, horiz_pnts, extras)
 
         left_offset = obj.getPropertyByName("LeftOffset")
         right_offset = obj.getPropertyByName("RightOffset")
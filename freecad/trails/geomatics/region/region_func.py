@@ -27,7 +27,8 @@ Define Region Object functions.
 
 import FreeCAD
 import Part
-import copy
+import numpy as np
+from ...design.alignment import stationing
 
 class RegionFunc:
     """
@@ -47,19 +48,20 @@ class RegionFunc:
         right_offset = offsets[1]
 
         # Computing coordinates and orthoginals for guidelines
-        for sta in stations:
-            tuple_coord, tuple_vec = alignment.Proxy.model.get_orthogonal( sta, "Left")
-            coord = FreeCAD.Vector(tuple_coord).sub(fpoint)
-            vec = FreeCAD.Vector(tuple_vec)
+        coords, vecs = alignment.Proxy.model.get_orthogonals(stations, "Left")
+        coords = coords - np.array(tuple(fpoint))
 
-            left_vec = copy.deepcopy(vec)
-            right_vec = copy.deepcopy(vec)
+        left_sides = coords + vecs * float(left_offset)
+        right_sides = coords - vecs * float(right_offset)
 
-            left_side = coord.add(left_vec.multiply(left_offset))
-            right_side = coord.add(right_vec.negative().multiply(right_offset))
+        for coord, left_side, right_side in zip(coords, left_sides, right_sides):
+            if np.isnan(coord).any(): continue
 
             # Generate guide line object and add to cluster
-            gls.append(Part.makePolygon([left_side, coord, right_side]))
+            gls.append(Part.makePolygon([
+                FreeCAD.Vector(*left_side),
+                FreeCAD.Vector(*coord),
+                FreeCAD.Vector(*right_side)]))
 
         return Part.makeCompound(gls)
 
@@ -74,10 +76,13 @@ class RegionFunc:
             end = start + length
         return start, end
 
-    def generate(self, alignment, increments, region, horiz_pnts = True):
+    def generate(self, alignment, increments, region, horiz_pnts = True, extras = None):
         """
         get guideline stations along an alignment
         """
+        if extras is None:
+            extras = []
+
         # Guideline intervals
         tangent_increment = increments[0]/1000
         curve_increment = increments[1]/1000
@@ -88,61 +93,31 @@ class RegionFunc:
         end_station = round(region[1]/1000, 3)
 
         # Retrieve alignment data get geometry and placement
-        stations = []
         if hasattr(alignment.Proxy, 'model'):
-            start = alignment.Proxy.model.data['meta']['StartStation']
-            length = alignment.Proxy.model.data['meta']['Length']
-            end = start + length/1000
-
-            geometry = alignment.Proxy.model.data['geometry']
-            for element in geometry:
-                # Get starting and ending stations based on alignment
-                elem_start = element.get('StartStation')
-                elem_end = element.get('StartStation')+element.get('Length')/1000
-
-                if elem_start != 0 and horiz_pnts:
-                        stations.append(elem_start)
-
-                # Generate line intervals
-                if element.get('Type') == 'Line':
-
-                    # Iterate the station range
-                    for sta in range(int(elem_start), int(elem_end)):
+            element_increments = {
+                'Line': tangent_increment,
+                'Curve': curve_increment,
+                'Spiral': spiral_increment}
 
-                        # Add stations which land on increments exactly
-                        if sta % int(tangent_increment) == 0:
-                            stations.append(sta)
+            # Stations are sampled per element, including critical points
+            stations, positions = stationing.generate(
+                alignment.Proxy.model, element_increments,
+                [start_station, end_station], horiz_pnts, extras)
 
-                # Generate curve intervals
-                elif element.get('Type') == 'Curve':
-                    for sta in range(int(elem_start), int(elem_end)):
-                        if sta % int(curve_increment) == 0:
-                            stations.append(sta)
-
-                #Generate spiral intervals
-                elif element.get("Type") == 'Spiral':
-                    for sta in range(int(elem_start), int(elem_end)):
-                        if sta % int(spiral_increment) == 0:
-                            stations.append(sta)
-
-            # Add the end station
-            stations.append(round(end,3))
+            return stations.tolist()
 
         # Create guide lines from standard line object
-        else:
-            length = alignment.Length.Value
-            for sta in range(0, int(length/1000)):
-                if sta % int(tangent_increment) == 0:
-                    stations.append(sta)
+        length = alignment.Length.Value/1000
+        stations = [np.empty(0), np.array([length]), np.array(extras)]
+
+        if tangent_increment > 0:
+            count = np.floor(length/tangent_increment + 1e-6)
+            stations.append(np.arange(count + 1) * tangent_increment)
 
-            # Add the end station
-            stations.append(round(length/1000,3))
+        stations = np.unique(np.round(np.concatenate(stations), 6))
 
         # Iterate the stations, appending what falls in the specified limits
-        region_stations = []
-        for sta in stations:
-            if start_station <= sta <= end_station:
-                region_stations.append(sta)
+        region_stations = stations[
+            (stations >= start_station) & (stations <= end_station)]
 
-        region_stations.sort()
-        return region_stations
+        return region_stations.tolist()
@@ -0,0 +1,175 @@
+# /**********************************************************************
+# *                                                                     *
+# * Copyright (c) 2021 Hakan Seven <hakanseven12@gmail.com>             *
+# *                                                                     *
+# * This program is free software; you can redistribute it and/or modify*
+# * it under the terms of the GNU Lesser General Public License (LGPL)  *
+# * as published by the Free Software Foundation; either version 2 of   *
+# * the License, or (at your option) any later version.                 *
+# * for detail see the LICENCE text file.                               *
+# *                                                                     *
+# * This program is distributed in the hope that it will be useful,     *
+# * but WITHOUT ANY WARRANTY; without even the implied warranty of      *
+# * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the       *
+# * GNU Library General Public License for more details.                *
+# *                                                                     *
+# * You should have received a copy of the GNU Library General Public   *
+# * License along with this program; if not, write to the Free Software *
+# * Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307*
+# * USA                                                                 *
+# *                                                                     *
+# ***********************************************************************
+
+'''
+Define per-station result cache for Region objects.
+'''
+
+import hashlib
+from collections import OrderedDict
+
+import numpy as np
+
+
+
+def get():
+    """
+    Return the document independent station cache
+    """
+    return _CACHE
+
+
+def wire_digest(wire):
+    """
+    Hash of the wire vertex coordinates.
+    """
+    points = np.array(
+        [vertex.Point for vertex in wire.Vertexes], dtype=float)
+
+    return hashlib.sha1(np.round(points, 3).tobytes()).hexdigest()
+
+
+def wires_digest(wires):
+    """
+    Hash of the vertex coordinates of a list of wires.
+    """
+    digest = hashlib.sha1()
+    for wire in wires:
+        digest.update(wire_digest(wire).encode())
+
+    return digest.hexdigest()
+
+
+class SurfaceIndex:
+    """
+    Triangle bounding box index of a surface mesh.
+    It is used to find the triangles a guide line crosses.
+    """
+    def __init__(self, mesh):
+        points, facets = mesh.Topology
+
+        self.points = np.array(points, dtype=float).reshape(-1, 3)
+        self.facets = np.array(facets, dtype=np.int64).reshape(-1, 3)
+
+        triangles = self.points[self.facets]
+        self.mins = triangles[:, :, :2].min(axis=1)
+        self.maxs = triangles[:, :, :2].max(axis=1)
+
+        # Sort triangles by their min x for slab search.
+        self.order = np.argsort(self.mins[:, 0], kind='stable')
+        self.xmins = self.mins[self.order, 0]
+
+        self.width = 0.0
+        if len(self.facets):
+            self.width = (self.maxs[:, 0] - self.mins[:, 0]).max()
+
+    def crossed(self, start, end):
+        """
+        Return indices of triangles whose bounding box crosses the segment.
+        """
+        xmin, xmax = min(start[0], end[0]), max(start[0], end[0])
+        ymin, ymax = min(start[1], end[1]), max(start[1], end[1])
+
+        # Triangles which may overlap the segment along x.
+        low = np.searchsorted(self.xmins, xmin - self.width, 'left')
+        high = np.searchsorted(self.xmins, xmax, 'right')
+        idx = self.order[low:high]
+
+        mins = self.mins[idx]
+        maxs = self.maxs[idx]
+
+        keep = (maxs[:, 0] >= xmin) & (mins[:, 1] <= ymax) & (maxs[:, 1] >= ymin)
+
+        # Separating axis test along the segment normal.
+        normal = np.array([start[1] - end[1], end[0] - start[0]])
+        center = (mins + maxs) / 2 - np.array(start[:2])
+        radius = (maxs - mins) / 2 @ np.abs(normal)
+        keep &= np.abs(center @ normal) <= radius
+
+        return idx[keep]
+
+    def digest(self, wire):
+        """
+        Hash of the triangles crossed by the wire.
+        It doesn't depend on triangle or vertex numbering.
+        """
+        points = [vertex.Point for vertex in wire.Vertexes]
+
+        crossed = [np.empty(0, dtype=np.int64)]
+        for start, end in zip(points[:-1], points[1:]):
+            crossed.append(self.crossed(start, end))
+
+        idx = np.unique(np.concatenate(crossed))
+        triangles = np.round(self.points[self.facets[idx]], 3)
+
+        # Sort vertices in each triangle, then sort triangles.
+        order = np.lexsort(
+            (triangles[:, :, 2], triangles[:, :, 1], triangles[:, :, 0]))
+        triangles = np.take_along_axis(triangles, order[:, :, None], axis=1)
+        triangles = triangles.reshape(-1, 9)
+
+        if len(triangles):
+            triangles = triangles[np.lexsort(triangles.T[::-1])]
+
+        return hashlib.sha1(triangles.tobytes()).hexdigest()
+
+
+class StationCache:
+    """
+    Content addressed cache of per-station results.
+    Keys are built from guide line and surface hashes, so entries
+    stay valid as long as their inputs don't change.
+    """
+    def __init__(self, size=100000):
+        self.size = size
+        self.items = OrderedDict()
+
+    def __contains__(self, key):
+        return key in self.items
+
+    def get(self, key, default=None):
+        """
+        Return cached value and mark it as recently used.
+        """
+        if key not in self.items:
+            return default
+
+        self.items.move_to_end(key)
+        return self.items[key]
+
+    def set(self, key, value):
+        """
+        Store value, dropping the least recently used entries.
+        """
+        self.items[key] = value
+        self.items.move_to_end(key)
+
+        while len(self.items) > self.size:
+            self.items.popitem(last=False)
+
+    def clear(self):
+        """
+        Remove all cached results.
+        """
+        self.items.clear()
+
+_CACHE = StationCache()
@@ -28,6 +28,7 @@ Define Section object functions.
 import FreeCAD
 import Part, MeshPart
 import copy, math
+from ..region import station_cache
 
 class SectionFunc:
     """
@@ -65,8 +66,16 @@ class SectionFunc:
     def minimum_elevations(self, gl, surface):
         minel = []
         mesh = surface.Mesh.copy()
+        cache = station_cache.get()
+        index = station_cache.SurfaceIndex(mesh)
         for wire in gl.Shape.Wires:
 
+            # Reuse result if guide line and crossed triangles are same.
+            key = ('MinZ', station_cache.wire_digest(wire), index.digest(wire))
+            if key in cache:
+                minel.append(cache.get(key))
+                continue
+
             points = []
             for edge in wire.Edges:
                 cs = mesh.crossSections(
@@ -78,10 +87,39 @@ class SectionFunc:
                         if  i.z < minz:
                             minz = i.z
 
+            cache.set(key, minz)
             minel.append(minz)
 
         return minel
 
+    def get_profile(self, wire, mesh, index, cache):
+        """
+        Get 2D section profile of guide line.
+        Profiles are cached by guide line and crossed triangles.
+        """
+        key = ('Profile', station_cache.wire_digest(wire), index.digest(wire))
+        if key in cache:
+            return [FreeCAD.Vector(i) for i in cache.get(key)]
+
+        points = []
+        origin = wire.Vertexes[0].Point
+        for edge in wire.Edges:
+            params = MeshPart.findSectionParameters(
+                edge, mesh, FreeCAD.Vector(0, 0, 1))
+            params.insert(0, edge.FirstParameter+1)
+            params.append(edge.LastParameter-1)
+
+            values = [edge.valueAt(glp) for glp in params]
+            points.extend(values)
+
+        section_3d = MeshPart.projectPointsOnMesh(
+            points, mesh, FreeCAD.Vector(0, 0, 1))
+
+        section_2d = self.section_converter(section_3d, origin)
+        cache.set(key, [tuple(i) for i in section_2d])
+
+        return section_2d
+
     def draw_2d_sections(self, position, gl, surface, geometry, gaps, horizons):
         counter = 0
         buffer = 50000
@@ -89,24 +127,13 @@ class SectionFunc:
 
         multi_views_nor = math.ceil(len(gl.Shape.Wires)**0.5)
 
+        mesh = surface.Mesh
+        cache = station_cache.get()
+        index = station_cache.SurfaceIndex(mesh)
+
         section_list = []
         for i, wire in enumerate(gl.Shape.Wires):
-
-            points = []
-            origin = wire.Vertexes[0].Point
-            for edge in wire.Edges:
-                params = MeshPart.findSectionParameters(
-                    edge, surface.Mesh, FreeCAD.Vector(0, 0, 1))
-                params.insert(0, edge.FirstParameter+1)
-                params.append(edge.LastParameter-1)
-
-                values = [edge.valueAt(glp) for glp in params]
-                points.extend(values)
-
-            section_3d = MeshPart.projectPointsOnMesh(
-                points, surface.Mesh, FreeCAD.Vector(0, 0, 1))
-
-            section_2d = self.section_converter(section_3d, origin)
+            section_2d = self.get_profile(wire, mesh, index, cache)
             if not section_2d:
                 section_2d = [FreeCAD.Vector(0,0,0),FreeCAD.Vector(0,1,0)]
 
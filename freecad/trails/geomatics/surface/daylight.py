@@ -0,0 +1,450 @@
+# /**********************************************************************
+# *                                                                     *
+# * Copyright (c) 2021 Hakan Seven <hakanseven12@gmail.com>             *
+# *                                                                     *
+# * This program is free software; you can redistribute it and/or modify*
+# * it under the terms of the GNU Lesser General Public License (LGPL)  *
+# * as published by the Free Software Foundation; either version 2 of   *
+# * the License, or (at your option) any later version.                 *
+# * for detail see the LICENCE text file.                               *
+# *                                                                     *
+# * This program is distributed in the hope that it will be useful,     *
+# * but WITHOUT ANY WARRANTY; without even the implied warranty of      *
+# * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the       *
+# * GNU Library General Public License for more details.                *
+# *                                                                     *
+# * You should have received a copy of the GNU Library General Public   *
+# * License along with this program; if not, write to the Free Software *
+# * Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307*
+# * USA                                                                 *
+# *                                                                     *
+# ***********************************************************************
+
+'''
+Define daylight (cut / fill slope) intersection with surfaces.
+'''
+
+import numpy as np
+
+# Tolerance of ray parameters and barycentric coordinates.
+TOLERANCE = 1e-9
+
+# Number of rays intersected at once, bounding the memory of batches.
+BATCH = 2048
+
+# Length of the first span rays are cast over, in index cells.
+SPAN = 1
+
+
+
+def get_directions(points, closed=True, side='Right'):
+    """
+    Return horizontal unit vectors orthogonal to a polyline at its points.
+    Closed polylines point outward, open ones toward the given side.
+    Directions at vertices are averaged between the adjoining segments.
+    """
+    points = np.asarray(points, dtype=float).reshape(-1, 3)
+
+    if closed:
+        segments = np.roll(points, -1, axis=0) - points
+    else:
+        segments = np.diff(points, axis=0)
+
+    # Right normals of the segments.
+    normals = np.zeros(segments.shape)
+    normals[:, 0] = segments[:, 1]
+    normals[:, 1] = -segments[:, 0]
+    normals /= np.linalg.norm(normals, axis=1)[:, None]
+
+    if closed:
+        # Right normals point outward of counter-clockwise polylines.
+        x, y = points[:, 0], points[:, 1]
+        area = np.dot(x, np.roll(y, -1)) - np.dot(np.roll(x, -1), y)
+
+        if area < 0:
+            normals = -normals
+
+        directions = normals + np.roll(normals, 1, axis=0)
+
+    else:
+        if side.lower() in ['l', 'lt', 'left']:
+            normals = -normals
+
+        directions = np.concatenate(
+            [normals[:1], normals[:-1] + normals[1:], normals[-1:]])
+
+    return directions / np.linalg.norm(directions, axis=1)[:, None]
+
+
+class TriangleIndex:
+    """
+    Uniform grid index of the triangles of a surface mesh.
+    Each cell lists the triangles whose bounding box overlaps it.
+    """
+    def __init__(self, mesh, size=None):
+        """
+        mesh - Mesh object or it's (points, facets) topology
+        size - cell size, twice the mean triangle size by default
+        """
+        points, facets = getattr(mesh, 'Topology', mesh)
+
+        self.points = np.array(points, dtype=float).reshape(-1, 3)
+        self.facets = np.array(facets, dtype=np.int64).reshape(-1, 3)
+
+        triangles = self.points[self.facets][:, :, :2]
+        mins, maxs = triangles.min(axis=1), triangles.max(axis=1)
+
+        self.origin = np.zeros(2)
+        self.shape = np.ones(2, dtype=np.int64)
+        self.size = 1.0
+        self.starts = np.zeros(2, dtype=np.int64)
+        self.cells = np.empty(0, dtype=np.int64)
+
+        if not len(self.facets):
+            return
+
+        if not size:
+            size = 2 * (maxs - mins).mean()
+
+        self.origin = mins.min(axis=0)
+        self.size = max(size, TOLERANCE)
+        self.shape = np.floor(
+            (maxs.max(axis=0) - self.origin) / self.size).astype(np.int64) + 1
+
+        low = self.get_cell(mins)
+        high = self.get_cell(maxs)
+        width = high[:, 0] - low[:, 0] + 1
+        counts = width * (high[:, 1] - low[:, 1] + 1)
+
+        # Expand each triangle into the cells of its bounding box.
+        triangle = np.repeat(np.arange(len(self.facets)), counts)
+        step = np.arange(counts.sum()) - np.repeat(counts.cumsum() - counts, counts)
+
+        cells = (low[triangle, 0] + step % width[triangle]) * self.shape[1] \
+            + low[triangle, 1] + step // width[triangle]
+
+        order = np.argsort(cells, kind='stable')
+
+        self.cells = triangle[order]
+        self.starts = np.searchsorted(
+            cells[order], np.arange(self.shape.prod() + 1))
+
+    def get_cell(self, points):
+        """
+        Return the grid column and row of the points, clipped to the grid.
+        """
+        cell = np.floor((np.asarray(points)[..., :2] - self.origin) / self.size)
+        return np.clip(cell, 0, self.shape - 1).astype(np.int64)
+
+    def crossed(self, start, end):
+        """
+        Return indices of triangles indexed in the cells the segment crosses.
+        """
+        return np.unique(self.gather([start], [end])[1])
+
+    def gather(self, starts, ends):
+        """
+        Return the (segment, triangle) index pairs of the triangles indexed
+        in the cells each segment crosses.  Triangles in more than one cell
+        of a segment are listed once per cell.
+        """
+        starts = np.asarray(starts, dtype=float).reshape(len(starts), -1)
+        ends = np.asarray(ends, dtype=float).reshape(len(ends), -1)
+
+        starts = (starts[:, :2] - self.origin) / self.size
+        ends = (ends[:, :2] - self.origin) / self.size
+
+        swap = starts[:, 0] > ends[:, 0]
+        starts, ends = (np.where(swap[:, None], ends, starts),
+            np.where(swap[:, None], starts, ends))
+
+        first = np.maximum(np.floor(starts[:, 0]), 0)
+        last = np.minimum(np.floor(ends[:, 0]), self.shape[0] - 1)
+        counts = np.maximum(last - first + 1, 0).astype(np.int64)
+
+        # Expand each segment into the grid columns it spans.
+        segment = np.repeat(np.arange(len(starts)), counts)
+        step = np.arange(counts.sum()) - np.repeat(counts.cumsum() - counts, counts)
+        columns = first[segment] + step
+
+        start, end = starts[segment], ends[segment]
+        dx = end[:, 0] - start[:, 0]
+        vertical = dx <= 0
+        dx[vertical] = 1.0
+
+        # Segment rows at the limits of each column.
+        x = np.clip(np.stack([columns, columns + 1]), start[:, 0], end[:, 0])
+        y = start[:, 1] + (x - start[:, 0]) * (end[:, 1] - start[:, 1]) / dx
+        y[:, vertical] = np.stack([start[vertical, 1], end[vertical, 1]])
+
+        rows = np.floor(np.sort(y, axis=0))
+        low = np.clip(rows[0], 0, self.shape[1] - 1).astype(np.int64)
+        high = np.clip(rows[1], 0, self.shape[1] - 1).astype(np.int64)
+
+        # Segments which pass the grid leave no rows.
+        keep = (rows[1] >= 0) & (rows[0] < self.shape[1])
+        segment, columns = segment[keep], columns[keep].astype(np.int64)
+        low, high = low[keep], high[keep]
+
+        counts = high - low + 1
+        step = np.arange(counts.sum()) - np.repeat(counts.cumsum() - counts, counts)
+        cells = np.repeat(columns * self.shape[1] + low, counts) + step
+        segment = np.repeat(segment, counts)
+
+        # Gather the triangles of the cells.
+        sizes = self.starts[cells + 1] - self.starts[cells]
+        offset = np.arange(sizes.sum()) - np.repeat(sizes.cumsum() - sizes, sizes)
+
+        triangles = self.cells[np.repeat(self.starts[cells], sizes) + offset]
+
+        return np.repeat(segment, sizes), triangles
+
+
+class Daylight:
+    """
+    Daylight engine.
+    Slope rays are cast from edge points against a surface, rising with
+    the cut slope where the point is below the surface and falling with
+    the fill slope where it is above. Slopes are rise over run.
+    """
+    def __init__(self, mesh, cut=1.0, fill=1.0):
+        """
+        mesh - Mesh object or it's (points, facets) topology
+        """
+        self.index = TriangleIndex(mesh)
+        self.cut = cut
+        self.fill = fill
+
+        points = self.index.points
+        self.extent = 0.0
+        self.zmin = self.zmax = 0.0
+        if len(points):
+            self.extent = np.linalg.norm(
+                points[:, :2].max(axis=0) - points[:, :2].min(axis=0))
+            self.zmin, self.zmax = points[:, 2].min(), points[:, 2].max()
+
+        # Triangle corners and edges, ready for intersection.
+        triangles = points[self.index.facets]
+        self.corners = triangles[:, 0]
+        self.edges = triangles[:, 1:] - triangles[:, :1]
+        self.heights = np.stack(
+            [triangles[:, :, 2].min(axis=1), triangles[:, :, 2].max(axis=1)])
+
+    def intersect(self, origin, direction, idx):
+        """
+        Return the ray parameters at which the rays cross the triangles,
+        NaN where they miss them (Moller-Trumbore).
+        origin, direction - a ray, or (N,3) arrays of a ray per triangle
+        """
+        v0 = self.corners[idx]
+        edge1 = self.edges[idx, 0]
+        edge2 = self.edges[idx, 1]
+        direction = np.broadcast_to(direction, v0.shape)
+
+        p = np.cross(direction, edge2)
+        det = np.einsum('ij,ij->i', edge1, p)
+
+        valid = np.abs(det) > TOLERANCE
+        det[~valid] = 1.0
+
+        s = origin - v0
+        u = np.einsum('ij,ij->i', s, p) / det
+
+        q = np.cross(s, edge1)
+        v = np.einsum('ij,ij->i', q, direction) / det
+        t = np.einsum('ij,ij->i', edge2, q) / det
+
+        valid &= (u >= -TOLERANCE) & (v >= -TOLERANCE)
+        valid &= u + v <= 1 + TOLERANCE
+
+        t[~valid] = np.nan
+        return t
+
+    def get_elevation(self, point):
+        """
+        Return the surface elevation beneath the point, NaN outside it.
+        """
+        return self.get_elevations([point])[0]
+
+    def get_elevations(self, points):
+        """
+        Return the surface elevations beneath the points, NaN outside it.
+        """
+        points = np.asarray(points, dtype=float).reshape(-1, 3)
+        elevations = np.full(len(points), np.nan)
+
+        ray, idx = self.index.gather(points, points)
+        if not len(idx):
+            return elevations
+
+        origins = np.zeros((len(ray), 3))
+        origins[:, :2] = points[ray, :2]
+
+        t = self.intersect(origins, np.array([0.0, 0.0, 1.0]), idx)
+
+        # fmax skips the NaN of missed triangles.
+        np.fmax.at(elevations, ray, t)
+
+        return elevations
+
+    def get_catch_point(self, point, direction):
+        """
+        Return the catch point of the slope ray from the point along the
+        horizontal direction, and True for cut.
+        Returns None if the point or the ray leave the surface.
+        """
+        point = np.array(point, dtype=float)
+        ground = self.get_elevation(point)
+
+        if np.isnan(ground):
+            return None, False
+
+        is_cut = point[2] < ground
+        slope = self.cut if is_cut else -self.fill
+
+        ray = np.array([direction[0], direction[1], slope], dtype=float)
+
+        # The ray ends where it leaves the elevation range of the surface.
+        if is_cut:
+            length = (self.zmax - point[2]) / self.cut
+        else:
+            length = (point[2] - self.zmin) / self.fill
+
+        end = point + ray * min(length, self.extent)
+        idx = self.index.crossed(point, end)
+
+        if not len(idx):
+            return None, is_cut
+
+        t = self.intersect(point, ray, idx)
+        t = t[t >= -TOLERANCE]
+
+        if not len(t):
+            return None, is_cut
+
+        return point + ray * max(t.min(), 0), is_cut
+
+    def cast(self, points, rays, near, far):
+        """
+        Return the smallest ray parameters between near and far at which
+        the rays cross the surface, NaN where they do not.
+        """
+        ray, idx = self.index.gather(
+            points + rays * near[:, None], points + rays * far[:, None])
+
+        # Skip triangles outside the elevations of the ray spans.
+        low = points[:, 2] + rays[:, 2] * np.where(rays[:, 2] > 0, near, far)
+        high = points[:, 2] + rays[:, 2] * np.where(rays[:, 2] > 0, far, near)
+
+        keep = (self.heights[0, idx] <= high[ray] + TOLERANCE) \
+            & (self.heights[1, idx] >= low[ray] - TOLERANCE)
+        ray, idx = ray[keep], idx[keep]
+
+        t = self.intersect(points[ray], rays[ray], idx)
+        t[(t < near[ray] - TOLERANCE) | (t > far[ray] + TOLERANCE)] = np.nan
+
+        # fmin skips the NaN of missed triangles.
+        nearest = np.full(len(points), np.nan)
+        np.fmin.at(nearest, ray, t)
+
+        return nearest
+
+    def get_catch_points(self, points, directions):
+        """
+        Return the (N,3) catch points of the slope rays from the points,
+        NaN for rays which miss the surface, and a bool array, True for
+        cut.
+        """
+        points = np.asarray(points, dtype=float).reshape(-1, 3)
+        directions = np.asarray(directions, dtype=float).reshape(len(points), -1)
+
+        catch = np.full(points.shape, np.nan)
+        ground = self.get_elevations(points)
+
+        on_surface = ~np.isnan(ground)
+        is_cut = on_surface & (points[:, 2] < ground)
+
+        rays = np.zeros(points.shape)
+        rays[:, :2] = directions[:, :2]
+        rays[:, 2] = np.where(is_cut, self.cut, -self.fill)
+
+        # Rays end where they leave the elevation range of the surface.
+        with np.errstate(divide='ignore', invalid='ignore'):
+            length = np.where(is_cut, (self.zmax - points[:, 2]) / self.cut,
+                (points[:, 2] - self.zmin) / self.fill)
+
+        length = np.minimum(length, self.extent)
+
+        # Rays are cast in spans of growing length, so that most of them
+        # stop at a catch point near their start.
+        hit = np.zeros(len(points), dtype=bool)
+        near = np.zeros(len(points))
+        span = SPAN * self.index.size
+        todo = np.flatnonzero(on_surface)
+
+        while len(todo):
+            far = np.minimum(near[todo] + span, length[todo])
+            nearest = np.full(len(todo), np.nan)
+
+            for first in range(0, len(todo), BATCH):
+                batch = slice(first, first + BATCH)
+
+                nearest[batch] = self.cast(points[todo[batch]],
+                    rays[todo[batch]], near[todo[batch]], far[batch])
+
+            found = ~np.isnan(nearest)
+            idx = todo[found]
+
+            catch[idx] = points[idx] \
+                + rays[idx] * np.maximum(nearest[found], 0)[:, None]
+            hit[idx] = True
+
+            near[todo] = far
+            todo = todo[~found & (far < length[todo])]
+            span *= 2
+
+        # Rays from the surface which hit nothing are cast one by one.
+        for i in np.flatnonzero(on_surface & ~hit):
+            result, is_cut[i] = self.get_catch_point(points[i], directions[i])
+
+            if result is not None:
+                catch[i] = result
+
+        return catch, is_cut
+
+    @staticmethod
+    def get_graded_surface(points, catch, closed=True):
+        """
+        Return the points and faces of the graded surface between the edge
+        points and their catch points. Faces with missing catch points are
+        left out.
+        """
+        points = np.asarray(points, dtype=float).reshape(-1, 3)
+        count = len(points)
+
+        first = np.arange(count if closed else count - 1)
+        second = (first + 1) % count
+
+        # Drop quads with a missing catch point.
+        valid = ~np.isnan(catch[:, 0])
+        keep = valid[first] & valid[second]
+        first, second = first[keep], second[keep]
+
+        faces = np.concatenate([
+            np.column_stack([first, second + count, second]),
+            np.column_stack([first, first + count, second + count])])
+
+        # Keep only the points of the faces.
+        used, faces = np.unique(faces, return_inverse=True)
+        points = np.concatenate([points, catch])[used]
+
+        return points, faces.reshape(-1, 3)
+
+    def grade(self, points, directions, closed=True):
+        """
+        Return the catch points, the cut flags and the graded surface
+        (points, faces) of the edge points.
+        """
+        catch, is_cut = self.get_catch_points(points, directions)
+
+        return catch, is_cut, self.get_graded_surface(points, catch, closed)
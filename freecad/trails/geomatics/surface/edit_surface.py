@@ -24,6 +24,93 @@ import FreeCAD
 import FreeCADGui
 from pivy import coin
 from freecad.trails import ICONPATH
+from .surface_edits import SurfaceEditor, encode
+
+
+
+class EditSession:
+    """
+    Edit session of a surface.
+    Edits are applied in place to the triangulation and only the changed
+    faces of the view are updated. The surface is updated once, when the
+    session is finished.
+    """
+
+    def __init__(self, surface):
+        """
+        Constructor
+        """
+        self.surface = surface
+        self.editor = SurfaceEditor.from_mesh(surface.Mesh)
+        self.view = surface.ViewObject.Proxy
+        self.view.show_editor(self.editor)
+
+    def update(self, change):
+        """
+        Show the change of an edit and report the errors of the editor
+        """
+        for error in self.editor.errors:
+            print(error)
+        self.editor.errors.clear()
+
+        if change:
+            self.view.update_editor(self.editor, change)
+
+        return change
+
+    def on_key(self, event):
+        """
+        Undo or redo by Z and Y keys, return True if the session finished
+        by ESC key
+        """
+        if event.getState() != coin.SoKeyboardEvent.DOWN:
+            return False
+
+        key = event.getKey()
+        if key == coin.SoKeyboardEvent.Z:
+            self.update(self.editor.undo())
+
+        elif key == coin.SoKeyboardEvent.Y:
+            self.update(self.editor.redo())
+
+        elif key == coin.SoKeyboardEvent.ESCAPE:
+            self.finish()
+            return True
+
+        return False
+
+    def finish(self):
+        """
+        Record the edits of the session and update the surface
+        """
+        edits = encode(self.editor.get_log())
+
+        if not edits:
+            self.view.updateData(self.surface, "Mesh")
+            return
+
+        self.surface.Proxy.add_edits(self.surface)
+        self.surface.Edits = self.surface.Edits + edits
+        self.surface.Mesh = self.surface.Proxy.get_edited_mesh(self.editor)
+        FreeCAD.ActiveDocument.recompute()
+
+
+def get_face_index(cb):
+    """
+    Return the index of the triangle at picked point, None if no triangle
+    is picked
+    """
+    picked_point = cb.getPickedPoint()
+
+    if picked_point:
+        detail = picked_point.getDetail()
+
+        if detail.isOfType(coin.SoFaceDetail.getClassTypeId()):
+            face_detail = coin.cast(
+                detail, str(detail.getTypeId().getName()))
+            return face_detail.getFaceIndex()
+
+    return None
 
 
 
@@ -66,21 +153,22 @@ class AddPoint:
         Command activation method
         """
         # Create an event callback for add_point() function
+        surface = FreeCADGui.Selection.getSelection()[-1]
+        self.session = EditSession(surface)
         self.view = FreeCADGui.ActiveDocument.ActiveView
         self.event_callback = self.view.addEventCallbackPivy(
             coin.SoButtonEvent.getClassTypeId(), self.add_point)
 
     def add_point(self, cb):
         """
-        Take two triangle by mouse clicks and swap edge between them
+        Add a point to the triangle at mouse click
         """
         # Get event
         event = cb.getEvent()
 
-        # If mouse right button pressed finish swap edge operation
+        # If ESC pressed finish add point operation, Z and Y undo and redo
         if event.getTypeId().isDerivedFrom(coin.SoKeyboardEvent.getClassTypeId()):
-            if event.getKey() == coin.SoKeyboardEvent.ESCAPE \
-                and event.getState() == coin.SoKeyboardEvent.DOWN:
+            if self.session.on_key(event):
                 self.view.removeEventCallbackPivy(
                     coin.SoButtonEvent.getClassTypeId(), self.event_callback)
 
@@ -88,26 +176,16 @@ class AddPoint:
         elif event.getTypeId().isDerivedFrom(coin.SoMouseButtonEvent.getClassTypeId()):
             if event.getButton() == coin.SoMouseButtonEvent.BUTTON1 \
                 and event.getState() == coin.SoMouseButtonEvent.DOWN:
-                picked_point = cb.getPickedPoint()
 
                 # Get triangle index at picket point
-                if picked_point:
-                    detail = picked_point.getDetail()
+                index = get_face_index(cb)
 
-                    if detail.isOfType(coin.SoFaceDetail.getClassTypeId()):
-                        face_detail = coin.cast(
-                            detail, str(detail.getTypeId().getName()))
-                        index = face_detail.getFaceIndex()
+                if index is not None:
+                    obj = self.view.getObjectInfo(self.view.getCursorPos())
+                    curpos = (float(obj["x"]), float(obj["y"]), float(obj["z"]))
 
-                        obj = self.view.getObjectInfo(self.view.getCursorPos())
-                        curpos = FreeCAD.Vector(float(obj["x"]),float(obj["y"]),float(obj["z"]))           
-
-                        surface = FreeCADGui.Selection.getSelection()[-1]
-                        copy_mesh = surface.Mesh.copy()
-                        copy_mesh.insertVertex(index, curpos)
-                        surface.Mesh = copy_mesh
-                else:
-                    pass
+                    self.session.update(
+                        self.session.editor.insert(curpos, index))
 
 FreeCADGui.addCommand('Add Point', AddPoint())
 
@@ -194,6 +272,8 @@ class DeleteTriangle:
         Command activation method
         """
         # Create an event callback for delete() function
+        surface = FreeCADGui.Selection.getSelection()[-1]
+        self.session = EditSession(surface)
         self.view = FreeCADGui.ActiveDocument.ActiveView
         self.event_callback = self.view.addEventCallbackPivy(
             coin.SoButtonEvent.getClassTypeId(), self.delete)
@@ -201,15 +281,20 @@ class DeleteTriangle:
 
     def delete(self, cb):
         """
-        Take two triangle by mouse clicks and swap edge between them
+        Take triangles by mouse clicks and delete them by R key
         """
         # Get event
         event = cb.getEvent()
 
-        # If mouse right button pressed finish swap edge operation
+        # If ESC pressed finish delete operation, Z and Y undo and redo
         if event.getTypeId().isDerivedFrom(coin.SoKeyboardEvent.getClassTypeId()):
-            if event.getKey() == coin.SoKeyboardEvent.ESCAPE \
+            if event.getKey() == coin.SoKeyboardEvent.R \
                 and event.getState() == coin.SoKeyboardEvent.DOWN:
+
+                self.session.update(self.session.editor.delete(self.indexes))
+                self.indexes.clear()
+
+            elif self.session.on_key(event):
                 self.view.removeEventCallbackPivy(
                     coin.SoButtonEvent.getClassTypeId(), self.event_callback)
 
@@ -217,30 +302,12 @@ class DeleteTriangle:
         elif event.getTypeId().isDerivedFrom(coin.SoMouseButtonEvent.getClassTypeId()):
             if event.getButton() == coin.SoMouseButtonEvent.BUTTON1 \
                 and event.getState() == coin.SoMouseButtonEvent.DOWN:
-                picked_point = cb.getPickedPoint()
 
                 # Get triangle index at picket point
-                if picked_point:
-                    detail = picked_point.getDetail()
+                index = get_face_index(cb)
 
-                    if detail.isOfType(coin.SoFaceDetail.getClassTypeId()):
-                        face_detail = coin.cast(
-                            detail, str(detail.getTypeId().getName()))
-                        index = face_detail.getFaceIndex()
-                        self.indexes.append(index)
-
-        # If mouse left button pressed get picked point
-        if event.getTypeId().isDerivedFrom(coin.SoKeyboardEvent.getClassTypeId()):
-            if event.getKey() == coin.SoKeyboardEvent.R \
-                and event.getState() == coin.SoKeyboardEvent.DOWN:
-
-                surface = FreeCADGui.Selection.getSelection()[-1]
-                copy_mesh = surface.Mesh.copy()
-                copy_mesh.removeFacets(self.indexes)
-                self.indexes.clear()
-                surface.Mesh = copy_mesh
-            else:
-                pass
+                if index is not None:
+                    self.indexes.append(index)
 
 FreeCADGui.addCommand('Delete Triangle', DeleteTriangle())
 
@@ -284,9 +351,11 @@ class SwapEdge:
         Command activation method
         """
         # Create an event callback for SwapEdge() function
+        surface = FreeCADGui.Selection.getSelection()[-1]
+        self.session = EditSession(surface)
         self.view = FreeCADGui.ActiveDocument.ActiveView
         self.face_indexes = []
-        self.MC = FreeCADGui.ActiveDocument.ActiveView.addEventCallbackPivy(
+        self.MC = self.view.addEventCallbackPivy(
             coin.SoButtonEvent.getClassTypeId(), self.SwapEdge)
 
     def SwapEdge(self, cb):
@@ -296,10 +365,9 @@ class SwapEdge:
         # Get event
         event = cb.getEvent()
 
-        # If mouse right button pressed finish swap edge operation
+        # If ESC pressed finish swap edge operation, Z and Y undo and redo
         if event.getTypeId().isDerivedFrom(coin.SoKeyboardEvent.getClassTypeId()):
-            if event.getKey() == coin.SoKeyboardEvent.ESCAPE \
-                and event.getState() == coin.SoKeyboardEvent.DOWN:
+            if self.session.on_key(event):
                 self.view.removeEventCallbackPivy(
                     coin.SoButtonEvent.getClassTypeId(), self.MC)
 
@@ -307,33 +375,18 @@ class SwapEdge:
         elif event.getTypeId().isDerivedFrom(coin.SoMouseButtonEvent.getClassTypeId()):
             if event.getButton() == coin.SoMouseButtonEvent.BUTTON1 \
                 and event.getState() == coin.SoMouseButtonEvent.DOWN:
-                picked_point = cb.getPickedPoint()
 
                 # Get triangle index at picket point
-                if picked_point is not None:
-                    detail = picked_point.getDetail()
-
-                    if detail.isOfType(coin.SoFaceDetail.getClassTypeId()):
-                        face_detail = coin.cast(
-                            detail, str(detail.getTypeId().getName()))
-                        index = face_detail.getFaceIndex()
-                        self.face_indexes.append(index)
-
-                        # try to swap edge between picked triangle
-                        if len(self.face_indexes) == 2:
-                            surface = FreeCADGui.Selection.getSelection()[-1]
-                            copy_mesh = surface.Mesh.copy()
-
-                            try:
-                                copy_mesh.swapEdge(
-                                    self.face_indexes[0], self.face_indexes[1])
-
-                            except Exception:
-                                print("The edge between these triangles cannot be swappable")
-
-                            surface.Mesh = copy_mesh
-                            self.face_indexes.clear()
-                            FreeCAD.ActiveDocument.recompute()
+                index = get_face_index(cb)
+
+                if index is not None:
+                    self.face_indexes.append(index)
+
+                    # try to swap edge between picked triangle
+                    if len(self.face_indexes) == 2:
+                        self.session.update(
+                            self.session.editor.flip(*self.face_indexes))
+                        self.face_indexes.clear()
 
 FreeCADGui.addCommand('Swap Edge', SwapEdge())
 
@@ -0,0 +1,96 @@
+# /**********************************************************************
+# *                                                                     *
+# * Copyright (c) 2021 Hakan Seven <hakanseven12@gmail.com>             *
+# *                                                                     *
+# * This program is free software; you can redistribute it and/or modify*
+# * it under the terms of the GNU Lesser General Public License (LGPL)  *
+# * as published by the Free Software Foundation; either version 2 of   *
+# * the License, or (at your option) any later version.                 *
+# * for detail see the LICENCE text file.                               *
+# *                                                                     *
+# * This program is distributed in the hope that it will be useful,     *
+# * but WITHOUT ANY WARRANTY; without even the implied warranty of      *
+# * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the       *
+# * GNU Library General Public License for more details.                *
+# *                                                                     *
+# * You should have received a copy of the GNU Library General Public   *
+# * License along with this program; if not, write to the Free Software *
+# * Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307*
+# * USA                                                                 *
+# *                                                                     *
+# ***********************************************************************
+
+import FreeCAD
+import FreeCADGui
+from PySide2 import QtWidgets
+from freecad.trails import ICONPATH
+from ...design.project.support import units
+from ...design.project.xml.surface_exporter import SurfaceExporter
+from . import surfaces
+
+
+class ExportSurface:
+    """
+    Command to export surfaces and point groups to a LandXML file.
+    """
+
+    def __init__(self):
+        """
+        Constructor
+        """
+        pass
+
+    def GetResources(self):
+        """
+        Return the command resources dictionary.
+        """
+        return {
+            'Pixmap': ICONPATH + '/icons/Surface.svg',
+            'MenuText': "Export Surface",
+            'ToolTip': "Export selected surfaces and point groups to LandXML file."
+            }
+
+    def IsActive(self):
+        """
+        Define tool button activation situation
+        """
+        # Check for document
+        if FreeCAD.ActiveDocument:
+            return True
+        return False
+
+    def Activated(self):
+        """
+        Command activation method
+        """
+        # Export selected objects, or all surfaces if nothing is selected
+        selection = FreeCADGui.Selection.getSelection()
+
+        if not selection:
+            selection = surfaces.get().Group
+
+        # Select file
+        parameter = FreeCAD.ParamGet("User parameter:BaseApp/Preferences/General")
+        path = parameter.GetString("FileOpenSavePath")
+        file_name = QtWidgets.QFileDialog.getSaveFileName(
+            None, 'Export LandXML', path, Filter='*.xml')
+
+        if not file_name[0]:
+            return
+
+        # Add ".xml" if needed
+        if file_name[0][-4:] == ".xml":
+            fn = file_name[0]
+        else:
+            fn = file_name[0] + ".xml"
+
+        template = ICONPATH + '/data/landXML-' \
+            + units.get_doc_units()[1] + '.xml'
+
+        exporter = SurfaceExporter()
+        exporter.write_objects(selection, template, fn)
+
+        for error in exporter.errors:
+            FreeCAD.Console.PrintError(error + '\n')
+
+FreeCADGui.addCommand('Export Surface', ExportSurface())
@@ -30,14 +30,17 @@ from pivy import coin
 from .surface_func import DataFunctions, ViewFunctions
 from freecad.trails import ICONPATH, line_patterns, geo_origin
 from . import surfaces
+import numpy as np
 import random
 
 
 
-def create(points=[], label="Surface"):
+def create(points=[], label="Surface", delaunay=None):
     """
     Class construction method
     label - Optional. Name of new object.
+    delaunay - Optional. Index of Delaunay vertices, to use instead of
+    triangulating the points.
     """
 
     obj=FreeCAD.ActiveDocument.addObject("App::FeaturePython", "Surface")
@@ -49,7 +52,15 @@ def create(points=[], label="Surface"):
     group.addObject(obj)
 
     obj.Label = label
-    obj.Vectors = points
+
+    if delaunay is None:
+        obj.Vectors = points
+
+    else:
+        obj.Proxy.triangulate_vectors = False
+        obj.Vectors = points
+        obj.Proxy.triangulate_vectors = True
+        obj.Delaunay = delaunay
 
     return obj
 
@@ -97,6 +108,8 @@ class Surface(DataFunctions):
         obj.addProperty("Part::PropertyPartShape", "BoundaryShapes", "Triangulation",
             "Boundary Shapes").BoundaryShapes = Part.Shape()
 
+        self.add_edits(obj)
+
         # Analysis properties.
         obj.addProperty(
             "App::PropertyEnumeration", "AnalysisType", "Analysis",
@@ -120,6 +133,22 @@ class Surface(DataFunctions):
 
         obj.Proxy = self
 
+    @staticmethod
+    def add_edits(obj):
+        '''
+        Add the property recording surface edits, if it is missing.
+        '''
+        if not hasattr(obj, "Edits"):
+            obj.addProperty(
+                "App::PropertyStringList", "Edits", "Triangulation",
+                "Surface edits replayed after triangulation", 4).Edits = []
+
+    def onDocumentRestored(self, obj):
+        '''
+        Add properties missing from surfaces saved by older versions.
+        '''
+        self.add_edits(obj)
+
     def onChanged(self, obj, prop):
         '''
         Do something when a data property has changed.
@@ -143,6 +172,10 @@ class Surface(DataFunctions):
             if vectors:
                 base = geo_origin.get(vectors[0]).Origin
 
+                # Imported triangulations are assigned after the points.
+                if not getattr(self, 'triangulate_vectors', True):
+                    return
+
                 if len(vectors) > 2:
                     pts = []
                     for i in vectors:
@@ -164,8 +197,8 @@ class Surface(DataFunctions):
                 pts.append(i.sub(base))
 
             if delaunay:
-                obj.Mesh = self.test_delaunay(
-                    pts, delaunay, lmax, amax)
+                mesh = self.test_delaunay(pts, delaunay, lmax, amax)
+                obj.Mesh = self.replay_edits(mesh, getattr(obj, 'Edits', []))
 
         if prop == "MinorInterval":
             min_int = obj.getPropertyByName(prop)
@@ -529,6 +562,39 @@ class ViewProviderSurface(ViewFunctions):
                 colorlist = self.slope_analysis(obj.Mesh, ranges)
                 self.face_material.diffuseColor.setValues(0,len(colorlist),colorlist)
 
+    def show_editor(self, editor):
+        '''
+        Show the triangulation of an edit session, a coordinate index slot
+        for each face of the editor.
+        '''
+        origin = geo_origin.get()
+        points = editor.points + tuple(origin.Origin)
+
+        self.geo_coords.point.values = points.tolist()
+        self.triangles.coordIndex.values = self.face_index(
+            editor.facets, editor.alive)
+
+    def update_editor(self, editor, change):
+        '''
+        Update only the points and face slots an edit changed.
+        '''
+        origin = tuple(geo_origin.get().Origin)
+
+        # Points appended by inserts.
+        count = self.geo_coords.point.getNum()
+        if len(editor.points) > count:
+            points = editor.points[count:] + origin
+            self.geo_coords.point.setValues(count, len(points), points.tolist())
+
+        for i, old, new in change['Moved']:
+            point = editor.points[i] + origin
+            self.geo_coords.point.setValues(i, 1, [point.tolist()])
+
+        for face in np.concatenate([change['Removed'], change['Added']]).tolist():
+            index = self.face_index(
+                editor.facets[face:face+1], editor.alive[face:face+1])
+            self.triangles.coordIndex.setValues(4*face, 4, index)
+
     def getDisplayModes(self,vobj):
         '''
         Return a list of display modes.
@@ -0,0 +1,349 @@
+# /**********************************************************************
+# *                                                                     *
+# * Copyright (c) 2021 Hakan Seven <hakanseven12@gmail.com>             *
+# *                                                                     *
+# * This program is free software; you can redistribute it and/or modify*
+# * it under the terms of the GNU Lesser General Public License (LGPL)  *
+# * as published by the Free Software Foundation; either version 2 of   *
+# * the License, or (at your option) any later version.                 *
+# * for detail see the LICENCE text file.                               *
+# *                                                                     *
+# * This program is distributed in the hope that it will be useful,     *
+# * but WITHOUT ANY WARRANTY; without even the implied warranty of      *
+# * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the       *
+# * GNU Library General Public License for more details.                *
+# *                                                                     *
+# * You should have received a copy of the GNU Library General Public   *
+# * License along with this program; if not, write to the Free Software *
+# * Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307*
+# * USA                                                                 *
+# *                                                                     *
+# ***********************************************************************
+
+'''
+Define in place surface edits with an undo log.
+'''
+
+import json
+import numpy as np
+
+# Distance within which recorded coordinates match surface points.
+TOLERANCE = 1e-3
+
+
+
+def encode(operations):
+    """
+    Return the operations as a list of strings for a StringList property.
+    """
+    return [json.dumps(op, sort_keys=True) for op in operations]
+
+
+def decode(edits):
+    """
+    Return the operations stored in a StringList property.
+    """
+    return [json.loads(edit) for edit in edits]
+
+
+class SurfaceEditor:
+    """
+    Edit layer of a surface triangulation.
+    Faces are edited in place: removed faces are only marked dead and new
+    faces are appended, so face indices stay valid for the whole session.
+    Operations refer to points by their coordinates, so the edit log can
+    be replayed on a new triangulation of the surface points.
+    """
+    def __init__(self, points, facets):
+        """
+        points - (N,3) surface points
+        facets - (M,3) point indices of the counter-clockwise faces
+        """
+        self.points = np.array(points, dtype=float).reshape(-1, 3)
+        self.facets = np.array(facets, dtype=np.int64).reshape(-1, 3)
+        self.alive = np.ones(len(self.facets), dtype=bool)
+
+        self.done = []
+        self.undone = []
+        self.errors = []
+
+    @classmethod
+    def from_mesh(cls, mesh):
+        """
+        Create the editor of a Mesh object or it's (points, facets) topology.
+        """
+        points, facets = getattr(mesh, 'Topology', mesh)
+        points = [tuple(point) for point in points]
+
+        return cls(points, facets)
+
+    def get_topology(self):
+        """
+        Return the points and faces of the edited surface, leaving out
+        dead faces and the points no face uses.
+        """
+        used, facets = np.unique(
+            self.facets[self.alive], return_inverse=True)
+
+        return self.points[used], facets.reshape(-1, 3)
+
+    def get_log(self):
+        """
+        Return the operations applied since the editor was created.
+        """
+        return [op for op, change in self.done]
+
+    def find_point(self, coord):
+        """
+        Return the index of the point at the coordinates, None if no point
+        is within the tolerance.
+        """
+        if not len(self.points):
+            return None
+
+        distance = np.linalg.norm(self.points - coord, axis=1)
+        idx = int(distance.argmin())
+
+        if distance[idx] > TOLERANCE:
+            return None
+
+        return idx
+
+    def find_face(self, coord):
+        """
+        Return the index of the live face under the coordinates in plan,
+        None if they are outside the surface.
+        """
+        idx = np.flatnonzero(self.alive)
+        triangles = self.points[self.facets[idx]][:, :, :2]
+
+        v0 = triangles[:, 0]
+        edge1 = triangles[:, 1] - v0
+        edge2 = triangles[:, 2] - v0
+        s = np.asarray(coord, dtype=float)[:2] - v0
+
+        det = edge1[:, 0] * edge2[:, 1] - edge1[:, 1] * edge2[:, 0]
+        valid = np.abs(det) > 0
+        det[~valid] = 1.0
+
+        u = (s[:, 0] * edge2[:, 1] - s[:, 1] * edge2[:, 0]) / det
+        v = (edge1[:, 0] * s[:, 1] - edge1[:, 1] * s[:, 0]) / det
+
+        inside = valid & (u >= 0) & (v >= 0) & (u + v <= 1)
+        if not inside.any():
+            return None
+
+        return int(idx[inside.argmax()])
+
+    def find_faces(self, vertices):
+        """
+        Return the indices of the live faces using all the point indices.
+        """
+        used = np.isin(self.facets, vertices).sum(axis=1) == len(vertices)
+
+        return np.flatnonzero(used & self.alive)
+
+    def get_face_points(self, face):
+        """
+        Return the point indices of the face recorded by it's coordinates.
+        """
+        vertices = [self.find_point(coord) for coord in face]
+
+        if None in vertices:
+            return None
+
+        return vertices
+
+    def commit(self, op, removed=(), added=(), moved=()):
+        """
+        Apply a change to the surface and push it to the undo log.
+        removed - indices of the faces to remove
+        added - point indices of the faces to append
+        moved - (point index, old coordinates, new coordinates) triples
+        """
+        added = np.array(added, dtype=np.int64).reshape(-1, 3)
+        start = len(self.facets)
+
+        self.facets = np.concatenate([self.facets, added])
+        self.alive = np.concatenate([self.alive, np.zeros(len(added), bool)])
+
+        change = {
+            'Removed': np.array(removed, dtype=np.int64),
+            'Added': np.arange(start, start + len(added)),
+            'Moved': list(moved),
+            }
+
+        self.apply_change(change)
+        self.done.append((op, change))
+        self.undone.clear()
+
+        return change
+
+    def apply_change(self, change, reverse=False):
+        """
+        Apply a change or it's inverse in place.
+        """
+        self.alive[change['Removed']] = reverse
+        self.alive[change['Added']] = not reverse
+
+        for i, old, new in change['Moved']:
+            self.points[i] = old if reverse else new
+
+    def undo(self):
+        """
+        Revert the last operation, return it's change or None.
+        """
+        if not self.done:
+            return None
+
+        op, change = self.done.pop()
+        self.apply_change(change, reverse=True)
+        self.undone.append((op, change))
+
+        return change
+
+    def redo(self):
+        """
+        Apply the last reverted operation again, return it's change or None.
+        """
+        if not self.undone:
+            return None
+
+        op, change = self.undone.pop()
+        self.apply_change(change)
+        self.done.append((op, change))
+
+        return change
+
+    def insert(self, coord, face=None):
+        """
+        Insert a point into the face under it, splitting the face in three.
+        """
+        coord = np.array(coord, dtype=float)
+
+        if face is None:
+            face = self.find_face(coord)
+
+        if face is None or not self.alive[face]:
+            self.errors.append('No surface face under point {}'.format(
+                coord.tolist()))
+            return None
+
+        # Keep inserted points even if the insertion is undone,
+        # so the indices of later points stay valid.
+        point = len(self.points)
+        self.points = np.concatenate([self.points, [coord]])
+
+        a, b, c = self.facets[face]
+        op = {'Type': 'Insert', 'Point': coord.tolist()}
+
+        return self.commit(op, [face], [[a, b, point], [b, c, point], [c, a, point]])
+
+    def delete(self, faces):
+        """
+        Delete the faces.
+        """
+        faces = [i for i in dict.fromkeys(faces) if self.alive[i]]
+        if not faces:
+            return None
+
+        op = {'Type': 'Delete', 'Faces': [
+            self.points[self.facets[i]].tolist() for i in faces]}
+
+        return self.commit(op, faces)
+
+    def flip(self, first, second):
+        """
+        Swap the edge shared by two faces to the opposite corners of them.
+        """
+        if first == second or not (self.alive[first] and self.alive[second]):
+            self.errors.append('Faces {} and {} can not be swapped'.format(
+                first, second))
+            return None
+
+        face1, face2 = self.facets[first], self.facets[second]
+        shared = np.isin(face1, face2)
+
+        if shared.sum() != 2:
+            self.errors.append('Faces {} and {} share no edge'.format(
+                first, second))
+            return None
+
+        # Roll the first face so the shared edge comes first.
+        face1 = np.roll(face1, -int(np.flatnonzero(~shared)[0]) - 1)
+        a, b, c = face1
+        d = face2[~np.isin(face2, face1)][0]
+
+        # The new faces must keep counter-clockwise order in plan.
+        new = np.array([[a, d, c], [d, b, c]])
+        plan = self.points[new][:, :, :2]
+        edge1 = plan[:, 1] - plan[:, 0]
+        edge2 = plan[:, 2] - plan[:, 0]
+        area = edge1[:, 0] * edge2[:, 1] - edge1[:, 1] * edge2[:, 0]
+
+        if np.any(area <= 0):
+            self.errors.append('Edge of faces {} and {} is not swappable'.format(
+                first, second))
+            return None
+
+        op = {'Type': 'Flip', 'Edge': self.points[[a, b]].tolist()}
+
+        return self.commit(op, [first, second], new)
+
+    def move(self, point, coord):
+        """
+        Move the point to the coordinates.
+        """
+        coord = np.array(coord, dtype=float)
+        old = self.points[point].copy()
+
+        op = {'Type': 'Move', 'From': old.tolist(), 'To': coord.tolist()}
+
+        return self.commit(op, moved=[(point, old, coord)])
+
+    def apply(self, op):
+        """
+        Apply a recorded operation, locating it's targets by coordinates.
+        Return the change, None if the targets are not found.
+        """
+        change = None
+
+        if op['Type'] == 'Insert':
+            change = self.insert(op['Point'])
+
+        elif op['Type'] == 'Delete':
+            faces = []
+            for face in op['Faces']:
+                vertices = self.get_face_points(face)
+                if vertices is not None:
+                    faces.extend(self.find_faces(vertices).tolist())
+
+            change = self.delete(faces)
+
+        elif op['Type'] == 'Flip':
+            vertices = self.get_face_points(op['Edge'])
+            faces = [] if vertices is None else self.find_faces(vertices)
+
+            if len(faces) == 2:
+                change = self.flip(*faces)
+
+        elif op['Type'] == 'Move':
+            point = self.find_point(op['From'])
+            if point is not None:
+                change = self.move(point, op['To'])
+
+        if change is None:
+            self.errors.append('Surface edit can not be replayed: {}'.format(
+                json.dumps(op)))
+
+        return change
+
+    def replay(self, operations):
+        """
+        Apply recorded operations in order, skipping the ones whose targets
+        are no longer on the surface.
+        """
+        for op in operations:
+            self.apply(op)
+
+        return self
@@ -33,6 +33,7 @@ import scipy.spatial
 import itertools as itools
 from collections import Counter
 from ast import literal_eval
+from .surface_edits import SurfaceEditor, decode
 
 class DataFunctions:
     """
@@ -88,6 +89,27 @@ class DataFunctions:
 
         return Mesh.Mesh(mesh_index)
 
+    @staticmethod
+    def replay_edits(mesh, edits):
+        """
+        Replay recorded surface edits on a new triangulation.
+        """
+        if not edits:
+            return mesh
+
+        editor = SurfaceEditor.from_mesh(mesh).replay(decode(edits))
+        for error in editor.errors:
+            print(error)
+
+        return DataFunctions.get_edited_mesh(editor)
+
+    @staticmethod
+    def get_edited_mesh(editor):
+        """
+        Create the mesh of an edited triangulation.
+        """
+        points, facets = editor.get_topology()
+        return Mesh.Mesh([FreeCAD.Vector(*point) for point in points[facets.ravel()]])
 
     @staticmethod
     def max_length(lmax, p1, p2, p3):
@@ -200,6 +222,17 @@ class ViewFunctions:
     def __init__(self):
         pass
 
+    @staticmethod
+    def face_index(facets, alive):
+        """
+        Return the coordinate index of faces, four values per face.
+        Dead faces collapse to their first point, so each face keeps it's slot.
+        """
+        index = np.column_stack([facets, np.full(len(facets), -1)])
+        index[~alive, 1:3] = index[~alive, :1]
+
+        return index.ravel().tolist()
+
     def wire_view(self, shape, base, closed=False):
         points = []
         vertices = []
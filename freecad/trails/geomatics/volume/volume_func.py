@@ -25,6 +25,7 @@ Define Volume Object functions.
 '''
 import FreeCAD
 import Part
+from ..region import station_cache
 
 
 
@@ -106,8 +107,21 @@ class VolumeFunc:
 
     def get_areas(self, gl, tops, bottoms):
         shapes = []
+        cache = station_cache.get()
         for i in range(len(gl.Shape.Wires)):
-            result = self.area_between(tops, bottoms, i)
+
+            # Areas only change when one of the station sections changes.
+            top_wires = [sec.Shape.Wires[i] for sec in tops]
+            bottom_wires = [sec.Shape.Wires[i] for sec in bottoms]
+            key = ('Area',
+                station_cache.wires_digest(top_wires),
+                station_cache.wires_digest(bottom_wires))
+
+            result = cache.get(key)
+            if result is None:
+                result = self.area_between(tops, bottoms, i)
+                cache.set(key, result)
+
             shapes.append(result)
 
         return Part.makeCompound(shapes)
@@ -112,7 +112,8 @@ class TrailsWorkbench(Gui.Workbench):
                 'gui': self.menu + self.toolbar + self.context,
                 'cmd': [
                     'Create Surface',
-                    'Surface Editor'
+                    'Surface Editor',
+                    'Export Surface'
                     ]
             },
 
@@ -229,7 +230,7 @@ class TrailsWorkbench(Gui.Workbench):
         from .design.project.commands import trails_guide_cmd
 
         from .geomatics.point import import_points, export_points, create_pointgroup
-        from .geomatics.surface import create_surface, edit_surface
+        from .geomatics.surface import create_surface, edit_surface, export_surface
         from .geomatics.region import create_region
         from .geomatics.section import create_sections
         from .geomatics.volume import compute_areas